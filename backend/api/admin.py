@@ -2,10 +2,20 @@ from django.contrib import admin
 
 
 
-from api.models import InterviewAnalysis
+from api.models import (
+    InterviewAnalysis, AnalysisCacheEntry, UploadSession, InterviewQuestion, RoleSearchStat,
+    UserStats, MediaBlob, AnalysisBatch
+)
 
 admin.site.register(InterviewAnalysis)
+admin.site.register(AnalysisCacheEntry)
+admin.site.register(UploadSession)
+admin.site.register(InterviewQuestion)
+admin.site.register(RoleSearchStat)
 
 
 
 
+admin.site.register(UserStats)
+admin.site.register(MediaBlob)
+admin.site.register(AnalysisBatch)
@@ -0,0 +1,113 @@
+"""
+Async counterparts of the I/O-bound API views, for ASGI deployments.
+
+With API_ASYNC_VIEWS enabled, api/urls.py routes question search, the
+profile and the analysis list here instead of to the DRF views. They return
+the same payloads, but a question search waiting on the LLM awaits it
+(bounded by the LLM client's asyncio semaphore) rather than holding a
+worker thread, and the profile reads through the async ORM.
+
+Whether that buys throughput has not been measured on a production database:
+against SQLite, ``manage.py loadtest_api`` mostly measures lock contention
+(bank writes fail with "database is locked" under both servers), and the
+async profile view served fewer requests per second than gunicorn with 16
+threads. Compare both deployments on MySQL before turning this on.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .models import InterviewAnalysis
+from .pagination import AnalysisCursorPagination
+from .serializers import AnalysisListSerializer, UserSerializer
+from .utils import stats as user_stats
+from .utils.questions import asearch_questions
+from .views import authenticate_token, profile_payload
+
+logger = logging.getLogger(__name__)
+
+
+def _render(data, status_code=status.HTTP_200_OK):
+    # DRF's renderer, so dates and decimals come out exactly as from the sync views.
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+async def _authenticate(request):
+    user = await sync_to_async(authenticate_token)(request)
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def _unauthorized():
+    return _render({'detail': 'Authentication credentials were not provided.'}, status.HTTP_401_UNAUTHORIZED)
+
+
+@require_GET
+async def search_interview_questions(request):
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+    query = request.GET.get('query', '').strip()
+    if not query:
+        return _render({'error': 'Query parameter is required'}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return _render(await asearch_questions(query))
+    except Exception as e:
+        logger.exception("An error occurred in search_interview_questions: %s", e)
+        return _render({'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _update_profile(request, user):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return _render({'error': 'Invalid JSON'}, status.HTTP_400_BAD_REQUEST)
+    serializer = UserSerializer(user, data=data, partial=True)
+    if serializer.is_valid():
+        serializer.save()
+        return _render(serializer.data)
+    return _render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+
+@csrf_exempt  # token-authenticated, like the DRF views
+@require_http_methods(['GET', 'PUT'])
+async def user_profile(request):
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+    if request.method == 'PUT':
+        return await sync_to_async(_update_profile)(request, user)
+
+    stats = await user_stats.aget_stats(user)
+    recent = [row async for row in user_stats.recent_history(user)]
+    return _render(profile_payload(user, stats, recent))
+
+
+def _analyses_page(request, user):
+    # DRF's cursor pagination evaluates the queryset synchronously, so this one
+    # query runs in a worker thread.
+    drf_request = Request(request)
+    columns = set(AnalysisListSerializer.selected_fields(drf_request)) | {'id', 'created_at'}
+    paginator = AnalysisCursorPagination()
+    page = paginator.paginate_queryset(
+        InterviewAnalysis.objects.for_user(user).only(*columns), drf_request
+    )
+    data = AnalysisListSerializer(page, many=True, context={'request': drf_request}).data
+    return _render(paginator.get_paginated_response(data).data)
+
+
+@require_GET
+async def user_analyses(request):
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+    return await sync_to_async(_analyses_page)(request, user)
@@ -1,8 +1,17 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
 from django.core.cache import cache
 from django.conf import settings
+from django.db import close_old_connections
+from asgiref.sync import sync_to_async
 import hashlib
 import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 def cache_response(timeout=None, key_prefix='view'):
     """
@@ -62,4 +71,143 @@ def cache_method(timeout=None, key_prefix='method'):
             
             return result
         return _wrapped_method
-    return decorator 
\ No newline at end of file
+    return decorator 
+
+def stale_while_revalidate(fresh_timeout, stale_timeout, key_prefix='swr', wait_timeout=30):
+    """
+    Cache decorator for functions with JSON-serializable arguments.
+    Results younger than `fresh_timeout` are served as-is; older ones (up to
+    `stale_timeout`) are served immediately while one background refresh runs.
+    Concurrent misses for the same key share a single call, within a process
+    and (through a cache lock) across processes.
+    `await f.acall(...)` serves async views from the same cache; on a miss it
+    awaits the coroutine registered with `@f.async_implementation`, if any,
+    instead of tying up a thread with `func`.
+    Usage: @stale_while_revalidate(fresh_timeout=3600, stale_timeout=86400, key_prefix='questions')
+    """
+    def decorator(func):
+        inflight = {}
+        inflight_lock = threading.Lock()
+        async_inflight = {}
+        refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f'{key_prefix}-refresh')
+
+        def store(cache_key, value):
+            cache.set(cache_key, {'value': value, 'fresh_until': time.time() + fresh_timeout}, stale_timeout)
+
+        def wait_for_other_process(cache_key):
+            deadline = time.monotonic() + wait_timeout
+            while time.monotonic() < deadline:
+                entry = cache.get(cache_key)
+                if entry is not None:
+                    return entry
+                time.sleep(0.1)
+            return None
+
+        def compute(cache_key, args, kwargs):
+            with inflight_lock:
+                future = inflight.get(cache_key)
+                owner = future is None
+                if owner:
+                    future = inflight[cache_key] = Future()
+            if not owner:
+                return future.result(timeout=wait_timeout)
+
+            lock_key = f"{cache_key}:lock"
+            acquired = False
+            try:
+                entry = None
+                acquired = cache.add(lock_key, 1, wait_timeout)
+                if not acquired:
+                    entry = wait_for_other_process(cache_key)
+                if entry is not None:
+                    value = entry['value']
+                else:
+                    value = func(*args, **kwargs)
+                    store(cache_key, value)
+                future.set_result(value)
+                return value
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                # Only the holder may release the lock; another process may still be computing.
+                if acquired:
+                    cache.delete(lock_key)
+                with inflight_lock:
+                    inflight.pop(cache_key, None)
+
+        def refresh(cache_key, args, kwargs):
+            try:
+                store(cache_key, func(*args, **kwargs))
+            except Exception as e:
+                logger.exception("Background refresh of %s failed: %s", cache_key, e)
+            finally:
+                cache.delete(f"{cache_key}:refreshing")
+                close_old_connections()
+
+        def make_key(args, kwargs):
+            key_data = json.dumps([args, kwargs], sort_keys=True)
+            return f"{key_prefix}:{func.__name__}:{hashlib.md5(key_data.encode()).hexdigest()}"
+
+        @wraps(func)
+        def _wrapped(*args, **kwargs):
+            cache_key = make_key(args, kwargs)
+            entry = cache.get(cache_key)
+            if entry is None:
+                return compute(cache_key, args, kwargs)
+            if entry['fresh_until'] < time.time() and cache.add(f"{cache_key}:refreshing", 1, wait_timeout):
+                refresher.submit(refresh, cache_key, args, kwargs)
+            return entry['value']
+
+        async def acompute(cache_key, args, kwargs):
+            future = async_inflight.get(cache_key)
+            if future is not None:
+                return await asyncio.wait_for(asyncio.shield(future), wait_timeout)
+            future = async_inflight[cache_key] = asyncio.get_running_loop().create_future()
+
+            lock_key = f"{cache_key}:lock"
+            acquired = False
+            try:
+                entry = None
+                acquired = await cache.aadd(lock_key, 1, wait_timeout)
+                if not acquired:
+                    deadline = time.monotonic() + wait_timeout
+                    while entry is None and time.monotonic() < deadline:
+                        await asyncio.sleep(0.1)
+                        entry = await cache.aget(cache_key)
+                if entry is not None:
+                    value = entry['value']
+                else:
+                    implementation = _wrapped.afunc or sync_to_async(func, thread_sensitive=False)
+                    value = await implementation(*args, **kwargs)
+                    await cache.aset(cache_key, {'value': value, 'fresh_until': time.time() + fresh_timeout}, stale_timeout)
+                future.set_result(value)
+                return value
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else is waiting
+                raise
+            finally:
+                if acquired:
+                    await cache.adelete(lock_key)
+                async_inflight.pop(cache_key, None)
+
+        async def acall(*args, **kwargs):
+            cache_key = make_key(args, kwargs)
+            entry = await cache.aget(cache_key)
+            if entry is None:
+                return await acompute(cache_key, args, kwargs)
+            if entry['fresh_until'] < time.time() and await cache.aadd(f"{cache_key}:refreshing", 1, wait_timeout):
+                refresher.submit(refresh, cache_key, args, kwargs)
+            return entry['value']
+
+        def async_implementation(afunc):
+            _wrapped.afunc = afunc
+            return afunc
+
+        _wrapped.invalidate = lambda *args, **kwargs: cache.delete(make_key(args, kwargs))
+        _wrapped.afunc = None
+        _wrapped.acall = acall
+        _wrapped.async_implementation = async_implementation
+        return _wrapped
+    return decorator
@@ -0,0 +1,75 @@
+import json
+import os
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import InterviewAnalysis
+from api.utils import batches
+from api.utils.jobs import claim_group, run_jobs
+
+
+class Command(BaseCommand):
+    help = ("Queue every recording in a directory as one analysis batch, like POST /api/batches/. "
+            "With --process the batch is analyzed in this process instead of by the workers.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--user', required=True, help="Username that will own the analyses.")
+        parser.add_argument('--name', default='', help="Batch name; defaults to the directory name.")
+        parser.add_argument('--recursive', action='store_true', help="Include subdirectories.")
+        parser.add_argument('--process', action='store_true', help="Analyze the batch here and wait for it.")
+        parser.add_argument('--group-size', type=int, default=None,
+                            help="Recordings whose text inference runs together (default ANALYSIS_BATCH_GROUP_SIZE).")
+        parser.add_argument('--quality', choices=InterviewAnalysis.Quality.values,
+                            default=InterviewAnalysis.Quality.BALANCED, help="Whisper tier hint for every recording.")
+        parser.add_argument('--output', help="Write the final batch summary to this JSON file.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}")
+        paths = self._recordings(options['directory'], options['recursive'])
+        if not paths:
+            raise CommandError(f"No recordings found in {options['directory']}")
+
+        name = options['name'] or os.path.basename(os.path.abspath(options['directory']))
+        with ExitStack() as stack:
+            files = [File(stack.enter_context(open(path, 'rb')), name=os.path.basename(path)) for path in paths]
+            try:
+                batch = batches.create_batch(user, files=files, name=name, quality=options['quality'])
+            except ValueError as e:
+                raise CommandError(str(e))
+        self.stdout.write(f"Queued batch {batch.pk} with {len(paths)} recording(s)")
+
+        if options['process']:
+            while True:
+                group = claim_group(limit=options['group_size'], batch_id=batch.pk)
+                if not group:
+                    break
+                run_jobs(group)
+                counts = batches.summary(batch)['counts']
+                self.stdout.write(f"  {counts['completed']} completed, {counts['failed']} failed, "
+                                  f"{counts['queued']} queued")
+
+        summary = batches.summary(batch)
+        throughput = summary['throughput']
+        self.stdout.write(self.style.SUCCESS(
+            f"Batch {batch.pk}: {summary['status']}, {throughput['recordings_per_minute']:.1f} recordings/min, "
+            f"{throughput['audio_seconds_per_second']:.1f} audio-s/s"
+        ))
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(summary, f, indent=2, default=str)
+
+    def _recordings(self, directory, recursive):
+        if not os.path.isdir(directory):
+            raise CommandError(f"{directory} is not a directory")
+        if recursive:
+            found = [os.path.join(root, name) for root, _, names in os.walk(directory) for name in names]
+        else:
+            found = [os.path.join(directory, name) for name in os.listdir(directory)]
+        return sorted(path for path in found if os.path.isfile(path) and batches.is_media(path))
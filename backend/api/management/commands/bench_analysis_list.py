@@ -0,0 +1,79 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import InterviewAnalysis
+from api.serializers import InterviewAnalysisSerializer
+from api.views import UserAnalysesView
+
+
+class Command(BaseCommand):
+    help = ("Compare the old unpaginated full-payload listing with the paginated slim list. "
+            "Synthetic rows are created inside a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10_000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--transcript-chars', type=int, default=8000)
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            with transaction.atomic():
+                user = self._populate(rows, options['transcript_chars'])
+                self._report(rows, user, options['repeat'])
+                transaction.set_rollback(True)
+
+    def _populate(self, rows, transcript_chars):
+        user = User.objects.create_user(f'bench-list-{rows}', password=None)
+        transcript = ('lorem ipsum ' * (transcript_chars // 12 + 1))[:transcript_chars]
+        InterviewAnalysis.objects.bulk_create([
+            InterviewAnalysis(
+                user=user, candidate_name=f'Candidate {i}', video_file=f'interview_videos/{i}.mp4',
+                transcript=transcript, feedback=transcript[:2000], sentiment_score=0.5,
+                emotion_scores={'joy': 0.4, 'neutral': 0.6},
+                pause_analytics={'total_pauses': 3, 'avg_pause': 1.2, 'pauses': [{'start': 1.0, 'duration': 1.2}] * 3},
+                sentiment_timeline=[{'start': 0.0, 'end': 30.0, 'label': 'POSITIVE', 'score': 0.9}] * 10,
+                interview_score=0.6, status=InterviewAnalysis.Status.COMPLETED,
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+        return user
+
+    def _time(self, repeat, func):
+        timings, size = [], 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            size = len(func())
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), size
+
+    def _report(self, rows, user, repeat):
+        def full_listing():
+            # The previous behaviour: every row, full serializer, nested user.
+            queryset = InterviewAnalysis.objects.filter(user=user)
+            return JSONRenderer().render(InterviewAnalysisSerializer(queryset, many=True).data)
+
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        view = UserAnalysesView.as_view()
+
+        def slim_page(query=''):
+            def run():
+                request = factory.get(f'/api/analyses/{query}')
+                force_authenticate(request, user)
+                return view(request).render().content
+            return run
+
+        self.stdout.write(f"{rows} rows:")
+        for name, func in [
+            ('full, unpaginated', full_listing),
+            ('slim first page', slim_page()),
+            ('slim page, dashboard fields', slim_page('?page_size=100&fields=id,candidate_name,created_at,'
+                                                       'sentiment_score,emotion_scores,pause_analytics')),
+        ]:
+            latency, size = self._time(repeat, func)
+            self.stdout.write(f"  {name:<30} {latency:8.1f} ms  {size / 1024:10.1f} KiB")
@@ -0,0 +1,62 @@
+import os
+import statistics
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from api.utils.benchmark import make_test_video, run_isolated
+
+
+def wav_path(video_path, transcribe):
+    """Old path: ffmpeg -> WAV on disk -> Whisper re-reads it with a second ffmpeg."""
+    from api.utils.analyzer import extract_audio, transcribe_whisper
+    from api.utils.scratch import scratch_dir
+    import whisper
+
+    with scratch_dir(prefix='bench-') as workdir:
+        audio_path = extract_audio(video_path, workdir)
+        if transcribe:
+            return len(transcribe_whisper(audio_path)[0])
+        return len(whisper.load_audio(audio_path))
+
+
+def pipe_path(video_path, transcribe):
+    """New path: ffmpeg -> pipe -> float32 array handed straight to Whisper."""
+    from api.utils.analyzer import load_audio, transcribe_whisper
+
+    audio = load_audio(video_path)
+    if transcribe:
+        return len(transcribe_whisper(audio)[0])
+    return len(audio)
+
+
+class Command(BaseCommand):
+    help = "Compare wall time and peak RSS of WAV-file vs in-memory audio extraction."
+
+    def add_arguments(self, parser):
+        parser.add_argument('video', nargs='?', help="Video to decode; a synthetic one is generated if omitted.")
+        parser.add_argument('--duration', type=int, default=1800,
+                            help="Length in seconds of the generated video (default: 30 minutes).")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--transcribe', action='store_true',
+                            help="Also run Whisper, not just the decode/load step.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            video = options['video']
+            if not video:
+                video = os.path.join(tmp, 'bench.mp4')
+                self.stdout.write(f"Generating {options['duration']}s test video...")
+                make_test_video(video, options['duration'])
+
+            for name, func in (('wav file', wav_path), ('in-memory pipe', pipe_path)):
+                runs = [run_isolated(func, video, options['transcribe']) for _ in range(options['repeat'])]
+                errors = [r['error'] for r in runs if r['error']]
+                if errors:
+                    self.stderr.write(f"{name}: {errors[0]}")
+                    continue
+                self.stdout.write(
+                    f"{name:>15}: wall {statistics.median(r['wall_time'] for r in runs):7.2f}s  "
+                    f"peak RSS {max(r['peak_rss_mb'] for r in runs):8.1f} MB  "
+                    f"ffmpeg peak RSS {max(r['children_peak_rss_mb'] for r in runs):7.1f} MB"
+                )
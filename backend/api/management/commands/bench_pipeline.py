@@ -0,0 +1,159 @@
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils.benchmark import has_flite, make_test_video, run_isolated
+
+STAGES = ('extract', 'transcribe', 'text_analysis', 'pauses', 'scoring', 'feedback')
+
+
+def run_pipeline(video_path, iterations):
+    """
+    Drive the analysis hot path over ``video_path`` ``iterations`` times in
+    this process and return per-iteration stage timings. Runs in a spawned
+    child (see run_isolated) so peak memory covers only the pipeline.
+    """
+    from api.utils import registry, scoring
+    from api.utils.analyzer import (
+        SAMPLE_RATE, analyze_text, extract_audio, get_pause_analytics, read_wav, transcribe_whisper
+    )
+    from api.utils.feedback import generate_feedback
+
+    start = time.perf_counter()
+    registry.warm_up()
+    model_load = time.perf_counter() - start
+
+    runs, audio_seconds = [], 0.0
+    for _ in range(iterations):
+        timings = {}
+        with tempfile.TemporaryDirectory() as workdir:
+            start = time.perf_counter()
+            audio = read_wav(extract_audio(video_path, workdir))
+            timings['extract'] = time.perf_counter() - start
+        audio_seconds = len(audio) / SAMPLE_RATE
+
+        start = time.perf_counter()
+        transcript, segments = transcribe_whisper(audio)
+        timings['transcribe'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sentiment, emotions, _ = analyze_text(transcript, segments)
+        emotions = emotions or {}
+        timings['text_analysis'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pauses = get_pause_analytics(segments) if segments else {}
+        timings['pauses'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sentiment_score = float(sentiment.get('score', 0.0))
+        score = scoring.score(sentiment_score, emotions, pauses)
+        timings['scoring'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        generate_feedback(transcript, sentiment_score, emotions, pauses, score)
+        timings['feedback'] = time.perf_counter() - start
+        runs.append(timings)
+
+    return {'model_load': model_load, 'audio_seconds': audio_seconds, 'runs': runs}
+
+
+def _percentiles(samples):
+    values = np.asarray(samples, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'mean': float(values.mean()), 'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the analysis pipeline end to end on synthetic recordings with a stubbed LLM; "
+            "reports latency percentiles, throughput and peak memory, optionally as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--durations', type=int, nargs='+', default=[30, 120, 600],
+                            help="Lengths in seconds of the generated recordings.")
+        parser.add_argument('--iterations', type=int, default=5, help="Timed runs per recording.")
+        parser.add_argument('--fixture', choices=['speech', 'tone'], default='speech',
+                            help="Synthesized speech (falls back to tones without ffmpeg flite) or tones.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--baseline', help="Earlier --output file to compare p50 latencies against.")
+
+    def handle(self, *args, **options):
+        # The spawned children build their settings from the environment.
+        os.environ['LLM_BACKEND'] = 'stub'
+        fixture = 'speech' if options['fixture'] == 'speech' and has_flite() else 'tone'
+        if fixture != options['fixture']:
+            self.stderr.write("ffmpeg has no flite filter; using tone fixtures with pauses instead.")
+
+        report = {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'models': settings.ANALYSIS_MODELS,
+                'fixture': fixture,
+            },
+            'results': [],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            for duration in options['durations']:
+                video = os.path.join(tmp, f'bench-{duration}.mp4')
+                make_test_video(video, duration, speech=fixture == 'speech', pause_every=6)
+                stats = run_isolated(run_pipeline, video, options['iterations'])
+                if stats['error']:
+                    self.stderr.write(f"{duration}s: {stats['error']}")
+                    continue
+                result = self._summarize(duration, stats)
+                report['results'].append(result)
+                self._print(result)
+
+        if options['baseline']:
+            self._compare(report, options['baseline'])
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def _summarize(self, duration, stats):
+        runs = stats['result']['runs']
+        totals = [sum(run.values()) for run in runs]
+        audio_seconds = stats['result']['audio_seconds']
+        return {
+            'duration': duration,
+            'audio_seconds': audio_seconds,
+            'iterations': len(runs),
+            'model_load_seconds': stats['result']['model_load'],
+            'stages': {stage: _percentiles([run[stage] for run in runs]) for stage in STAGES},
+            'total': _percentiles(totals),
+            'real_time_factor': float(np.median(totals)) / audio_seconds if audio_seconds else None,
+            'throughput_audio_seconds_per_second': audio_seconds * len(runs) / sum(totals),
+            'peak_rss_mb': stats['peak_rss_mb'],
+            'children_peak_rss_mb': stats['children_peak_rss_mb'],
+        }
+
+    def _print(self, result):
+        total = result['total']
+        self.stdout.write(
+            f"{result['duration']:>5}s: p50 {total['p50']:.2f}s  p95 {total['p95']:.2f}s  p99 {total['p99']:.2f}s  "
+            f"RTF {result['real_time_factor']:.3f}  {result['throughput_audio_seconds_per_second']:.1f} audio-s/s  "
+            f"peak {result['peak_rss_mb']:.0f} MB (+{result['children_peak_rss_mb']:.0f} MB ffmpeg)"
+        )
+        for stage, figures in result['stages'].items():
+            self.stdout.write(f"        {stage:<14} p50 {figures['p50'] * 1000:9.1f} ms  p95 {figures['p95'] * 1000:9.1f} ms")
+
+    def _compare(self, report, path):
+        with open(path) as f:
+            baseline = {result['duration']: result for result in json.load(f)['results']}
+        for result in report['results']:
+            before = baseline.get(result['duration'])
+            if before is None:
+                continue
+            change = result['total']['p50'] / before['total']['p50'] - 1
+            self.stdout.write(f"{result['duration']:>5}s: p50 {before['total']['p50']:.2f}s -> "
+                              f"{result['total']['p50']:.2f}s ({change:+.1%})")
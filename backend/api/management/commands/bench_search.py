@@ -0,0 +1,53 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from api.utils import search
+
+
+class Command(BaseCommand):
+    help = "Build a synthetic search index and report query latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--similar', action='store_true', help="Also benchmark the embedding index.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = [f"word{i}" for i in range(20_000)] + [
+            'python', 'leadership', 'deadline', 'database', 'conflict', 'scalable', 'mentoring', 'design',
+        ]
+        with tempfile.TemporaryDirectory() as tmp, \
+                override_settings(SEARCH_EMBEDDINGS_ENABLED=options['similar']):
+            path = os.path.join(tmp, 'bench.sqlite3')
+            start = time.perf_counter()
+            batch = []
+            for i in range(options['documents']):
+                batch.append({
+                    'kind': 'analysis', 'ref_id': i, 'owner_id': rng.randint(1, options['users']),
+                    'title': f"Candidate {i}",
+                    'body': ' '.join(rng.choices(vocabulary, k=300)),
+                })
+                if len(batch) == 5000:
+                    search.index_documents(batch, path=path)
+                    batch = []
+            search.index_documents(batch, path=path)
+            self.stdout.write(f"Indexed {options['documents']} documents in {time.perf_counter() - start:.1f}s")
+
+            finders = [('text', search.search)] + ([('similar', search.similar)] if options['similar'] else [])
+            for name, finder in finders:
+                timings = []
+                for _ in range(options['queries']):
+                    query = ' '.join(rng.choices(vocabulary[-8:], k=2))
+                    start = time.perf_counter()
+                    finder(query, rng.randint(1, options['users']), page=1, page_size=20, path=path)
+                    timings.append((time.perf_counter() - start) * 1000)
+                cuts = statistics.quantiles(timings, n=100)
+                self.stdout.write(f"{name:>8}: p50 {cuts[49]:.1f} ms  p95 {cuts[94]:.1f} ms  p99 {cuts[98]:.1f} ms")
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils import transcription, vad
+from api.utils.analyzer import SAMPLE_RATE, load_audio, transcribe_speech
+from api.utils.benchmark import make_test_video
+from api.utils.registry import get_whisper_model
+
+
+class Command(BaseCommand):
+    help = "Measure chunked parallel transcription speedup against the sequential path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('video', nargs='?', help="Recording to transcribe; a synthetic one is generated if omitted.")
+        parser.add_argument('--duration', type=int, default=3600,
+                            help="Length in seconds of the generated video (default: one hour).")
+        parser.add_argument('--workers', default=','.join(
+            str(n) for n in (2, 4, 8, 16) if n <= (os.cpu_count() or 1)
+        ), help="Comma-separated worker counts to try.")
+        parser.add_argument('--chunk-seconds', type=float, default=None)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            video = options['video']
+            if not video:
+                video = os.path.join(tmp, 'bench.mp4')
+                self.stdout.write(f"Generating {options['duration']}s test video...")
+                make_test_video(video, options['duration'])
+            audio = load_audio(video)
+
+        speech_map = vad.detect_speech(audio, SAMPLE_RATE)
+        speech_seconds = sum(end - start for start, end in speech_map['speech'])
+        self.stdout.write(f"{len(audio) / SAMPLE_RATE:.0f}s of audio, {speech_seconds:.0f}s of speech, "
+                          f"{os.cpu_count()} CPUs")
+
+        get_whisper_model()
+        start = time.perf_counter()
+        transcribe_speech(audio, speech_map)
+        baseline = time.perf_counter() - start
+        self.stdout.write(f"{'sequential':>12}: {baseline:8.1f}s  speedup 1.00x")
+
+        for workers in [int(n) for n in options['workers'].split(',') if n]:
+            pool = transcription.get_pool(workers)
+            # Wait for every worker to load its model so only transcription is timed.
+            list(pool.map(abs, range(workers * 4)))
+            start = time.perf_counter()
+            transcription.transcribe_parallel(audio, speech_map, workers, SAMPLE_RATE, options['chunk_seconds'])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{workers:>4} workers: {elapsed:8.1f}s  speedup {baseline / elapsed:.2f}x")
+        transcription.shutdown_pool()
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.utils import storage
+
+
+class Command(BaseCommand):
+    help = ("Move finished uploads into the content-addressed blob store, replace old originals "
+            "with audio-only renditions and delete unreferenced blobs. Safe to run from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=float, default=settings.ANALYSIS_MEDIA_RETENTION_DAYS,
+            help="Keep originals until all their analyses finished this many days ago.",
+        )
+        parser.add_argument(
+            '--grace', type=int, default=settings.ANALYSIS_MEDIA_GC_GRACE,
+            help="Seconds a blob must be unreferenced before it is deleted.",
+        )
+        parser.add_argument('--limit', type=int, default=None, help="Process at most this many items per step.")
+        parser.add_argument('--workers', type=int, default=1, help="Concurrent ffmpeg transcodes.")
+        parser.add_argument('--no-transcode', action='store_false', dest='transcode',
+                            help="Only adopt uploads and collect garbage.")
+
+    def handle(self, *args, **options):
+        adopted = storage.adopt_uploads(limit=options['limit'])
+        self.stdout.write(f"Adopted {adopted} upload(s) into the blob store")
+
+        if options['transcode']:
+            older_than = timezone.now() - timedelta(days=options['retention_days'])
+            compacted, saved = storage.compact(older_than, limit=options['limit'], workers=options['workers'])
+            self.stdout.write(f"Replaced {compacted} original(s) with audio-only renditions, "
+                              f"saving {saved / 1024 / 1024:.1f} MB")
+
+        deleted, freed = storage.collect_garbage(grace=options['grace'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} blob(s), freed {freed / 1024 / 1024:.1f} MB"))
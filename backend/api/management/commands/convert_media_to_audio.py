@@ -0,0 +1,28 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.utils import storage
+
+
+class Command(BaseCommand):
+    help = ("Convert the stored videos of all finished analyses to audio-only renditions "
+            "(see ANALYSIS_MEDIA_KEEP), dropping originals nothing else uses.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Concurrent ffmpeg transcodes.")
+        parser.add_argument('--limit', type=int, default=None, help="Convert at most this many originals.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        adopted = storage.adopt_uploads(limit=options['limit'])
+        if adopted:
+            self.stdout.write(f"Adopted {adopted} upload(s) into the blob store")
+        converted, saved = storage.compact(timezone.now(), limit=options['limit'], workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Converted {converted} original(s) in {time.perf_counter() - start:.1f}s, "
+            f"saving {saved / 1024 / 1024:.1f} MB"
+        ))
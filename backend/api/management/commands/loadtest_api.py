@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+ENDPOINTS = {
+    'questions': '/api/interview-questions/search/',
+    'profile': '/api/profile/',
+    'analyses': '/api/analyses/',
+}
+
+
+async def fetch(host, port, path, token, timeout):
+    """One plain HTTP/1.1 GET; returns the status code (0 on a network error or timeout)."""
+    async def run():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write((
+                f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                f"Authorization: Bearer {token}\r\nConnection: close\r\n\r\n"
+            ).encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    try:
+        return await asyncio.wait_for(run(), timeout)
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        return 0
+
+
+async def load(url, paths, token, concurrency, timeout):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    slots = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def one(path):
+        async with slots:
+            start = time.perf_counter()
+            statuses.append(await fetch(host, port, path, token, timeout))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(path) for path in paths))
+    return time.perf_counter() - start, latencies, statuses
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running API servers, e.g. to compare WSGI and ASGI deployments:\n"
+        "  LLM_BACKEND=stub LLM_STUB_LATENCY=0.5 gunicorn backend.wsgi -b :8000 --threads 16\n"
+        "  LLM_BACKEND=stub LLM_STUB_LATENCY=0.5 API_ASYNC_VIEWS=true uvicorn backend.asgi:application --port 8001\n"
+        "  manage.py loadtest_api --target wsgi=http://localhost:8000 --target asgi=http://localhost:8001"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True,
+                            help="name=http://host:port of a server to test (can be repeated).")
+        parser.add_argument('--endpoint', choices=ENDPOINTS, default='questions')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--distinct', type=int, default=None,
+                            help="Distinct question-search roles; defaults to --requests, i.e. every search misses the cache.")
+        parser.add_argument('--timeout', type=float, default=60.0)
+        parser.add_argument('--token', help="JWT access token; by default one is minted for a 'loadtest' user.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        token = options['token'] or str(AccessToken.for_user(User.objects.get_or_create(username='loadtest')[0]))
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or urlsplit(url).scheme != 'http':
+                raise CommandError(f"Expected name=http://host:port, got {target!r}")
+            targets.append((name, url))
+
+        results = {}
+        for name, url in targets:
+            # Fresh roles per target so neither server is helped by the other's cache.
+            run_id = uuid.uuid4().hex[:8]
+            distinct = options['distinct'] or options['requests']
+            paths = [self._path(options['endpoint'], f"loadtest {run_id} role {i % distinct}")
+                     for i in range(options['requests'])]
+            elapsed, latencies, statuses = asyncio.run(
+                load(url, paths, token, options['concurrency'], options['timeout'])
+            )
+            ok = sum(1 for s in statuses if 200 <= s < 300)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            results[name] = {
+                'url': url, 'requests': len(paths), 'ok': ok, 'errors': len(paths) - ok,
+                'seconds': elapsed, 'requests_per_second': ok / elapsed,
+                'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+            }
+            self.stdout.write(
+                f"{name:>8}: {ok / elapsed:8.1f} req/s  p50 {p50 * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  "
+                f"p99 {p99 * 1000:7.0f} ms  errors {len(paths) - ok}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'endpoint': options['endpoint'], 'concurrency': options['concurrency'],
+                           'results': results}, f, indent=2)
+
+    def _path(self, endpoint, role):
+        path = ENDPOINTS[endpoint]
+        return f"{path}?{urlencode({'query': role})}" if endpoint == 'questions' else path
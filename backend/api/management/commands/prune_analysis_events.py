@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils import events
+
+
+class Command(BaseCommand):
+    help = ("Delete the progress events of analyses that finished more than "
+            "ANALYSIS_EVENTS_RETENTION seconds ago. Safe to run from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention', type=int, default=settings.ANALYSIS_EVENTS_RETENTION,
+                            help="Seconds to keep events after an analysis' final status.")
+
+    def handle(self, *args, **options):
+        deleted = events.prune(retention=options['retention'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} event(s)"))
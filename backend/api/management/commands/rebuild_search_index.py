@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.models import InterviewAnalysis, InterviewQuestion
+from api.utils import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the local search index from stored transcripts and the question bank."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        search.clear()
+
+        analyses = (
+            InterviewAnalysis.objects
+            .filter(status=InterviewAnalysis.Status.COMPLETED)
+            .exclude(transcript='')
+            .only('id', 'user_id', 'candidate_name', 'transcript')
+        )
+        questions = InterviewQuestion.objects.only('id', 'role', 'question', 'answer')
+        for queryset, to_document in ((analyses, search.analysis_document), (questions, search.question_document)):
+            batch = []
+            count = 0
+            for obj in queryset.iterator(chunk_size=batch_size):
+                batch.append(to_document(obj))
+                if len(batch) >= batch_size:
+                    search.index_documents(batch)
+                    count += len(batch)
+                    batch = []
+            search.index_documents(batch)
+            count += len(batch)
+            self.stdout.write(f"Indexed {count} {queryset.model._meta.verbose_name_plural}")
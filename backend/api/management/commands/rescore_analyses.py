@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import InterviewAnalysis
+from api.utils import scoring, stats
+
+
+class Command(BaseCommand):
+    help = "Recompute interview_score for completed analyses in chunks with the vectorized scorer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scoring-version', default=None,
+                            help="Weight config to apply (default: ANALYSIS_SCORING_VERSION).")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--all', action='store_true',
+                            help="Also rescore rows already scored with this version.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        version = options['scoring_version'] or scoring.current_version()
+        if version not in scoring.WEIGHTS:
+            raise CommandError(f"Unknown scoring version {version!r}; known: {', '.join(scoring.WEIGHTS)}")
+
+        queryset = InterviewAnalysis.objects.filter(status=InterviewAnalysis.Status.COMPLETED)
+        if not options['all']:
+            queryset = queryset.exclude(scoring_version=version)
+
+        start = time.perf_counter()
+        rescored, changed, last_pk = 0, 0, 0
+        while True:
+            # Keyset pagination on pk keeps every chunk an index range scan.
+            rows = list(
+                queryset.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'interview_score', 'sentiment_score', 'emotion_scores', 'pause_analytics')
+                [:options['chunk_size']]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            scores = scoring.score_rows([row[2:] for row in rows], version)
+            changed += sum(1 for row, new in zip(rows, scores) if abs(row[1] - new) > 1e-9)
+            if not options['dry_run']:
+                self._write_scores([(float(new), version, row[0]) for row, new in zip(rows, scores)])
+            rescored += len(rows)
+            self.stdout.write(f"Rescored {rescored} rows ({time.perf_counter() - start:.1f}s)")
+
+        if options['dry_run']:
+            self.stdout.write(f"Dry run: {changed} of {rescored} scores would change under {version}")
+            return
+        # Raw updates skip the post_save signals that keep profile totals current.
+        with transaction.atomic():
+            users = stats.recompute_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {rescored} analyses with {version} ({changed} changed) in "
+            f"{time.perf_counter() - start:.1f}s; refreshed stats for {users} users"
+        ))
+
+    def _write_scores(self, params):
+        # A parameterised executemany UPDATE. QuerySet.bulk_update builds a CASE
+        # expression per row and was ~80x slower here, which dominated the run.
+        quote = connection.ops.quote_name
+        sql = (
+            f"UPDATE {quote(InterviewAnalysis._meta.db_table)} "
+            f"SET {quote('interview_score')} = %s, {quote('scoring_version')} = %s "
+            f"WHERE {quote('id')} = %s"
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, params)
@@ -0,0 +1,69 @@
+import multiprocessing
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _worker_main(poll_interval, max_jobs, warm_up):
+    # Needed when the start method is 'spawn'; a no-op for forked children.
+    django.setup()
+    from api.utils.jobs import run_worker
+    from api.utils import registry
+
+    if warm_up:
+        registry.warm_up()
+    run_worker(poll_interval=poll_interval, max_jobs=max_jobs)
+
+
+class Command(BaseCommand):
+    help = "Run worker processes that pick up queued interview analyses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.ANALYSIS_WORKER_PROCESSES,
+            help="Number of worker processes to start.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.ANALYSIS_WORKER_POLL_INTERVAL,
+            help="Seconds to wait between polls of an empty queue.",
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=None,
+            help="Exit each worker after processing this many jobs.",
+        )
+        parser.add_argument(
+            '--no-warm-up', action='store_false', dest='warm_up', default=settings.ANALYSIS_WARM_UP_MODELS,
+            help="Load models on the first job instead of when each worker starts.",
+        )
+
+    def handle(self, *args, **options):
+        from api.utils.jobs import requeue_stale
+
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} abandoned analyses")
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=_worker_main,
+                args=(options['poll_interval'], options['max_jobs'], options['warm_up']),
+                name=f"analysis-worker-{i}",
+            )
+            for i in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {len(workers)} analysis worker(s)"))
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
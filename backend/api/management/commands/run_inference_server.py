@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils import inference, registry
+
+
+class Command(BaseCommand):
+    help = ("Hold the sentiment and emotion models for every analysis worker on this host and "
+            "serve them micro-batched over a Unix socket (ANALYSIS_INFERENCE['BACKEND'] = 'socket').")
+
+    def add_arguments(self, parser):
+        config = settings.ANALYSIS_INFERENCE
+        parser.add_argument('--socket', default=config['SOCKET'], help="Path of the Unix socket to listen on.")
+        parser.add_argument('--max-batch', type=int, default=config['MAX_BATCH'],
+                            help="Most windows run in one model call.")
+        parser.add_argument('--max-wait-ms', type=float, default=config['MAX_WAIT_MS'],
+                            help="How long a batch waits for more requests before it runs.")
+
+    def handle(self, *args, **options):
+        registry.get_sentiment_model()
+        registry.get_emotion_model()
+        inference.start_batchers(max_batch=options['max_batch'], max_wait=options['max_wait_ms'])
+        self.stdout.write(self.style.SUCCESS(f"Serving {', '.join(inference.MODELS)} on {options['socket']}"))
+        try:
+            inference.serve(options['socket'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.questions import cached_questions, generate_questions, normalize_query, top_roles
+
+
+class Command(BaseCommand):
+    help = "Pre-generate interview questions for the most searched roles into the question bank."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help="Number of roles to warm.")
+        parser.add_argument('--role', action='append', default=[],
+                            help="Warm this role as well (can be repeated).")
+
+    def handle(self, *args, **options):
+        roles = [normalize_query(role) for role in options['role']]
+        roles += [role for role in top_roles(options['top']) if role not in roles]
+        for role in roles:
+            try:
+                questions = generate_questions(role)
+            except Exception as e:
+                self.stderr.write(f"{role}: {e}")
+                continue
+            # Drop any cached copy so the next search is served from the fresh bank entry.
+            cached_questions.invalidate(role)
+            self.stdout.write(f"{role}: {len(questions)} questions")
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(roles)} roles"))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:31
+
+from django.db import migrations, models
+
+
+def mark_existing_completed(apps, schema_editor):
+    # Analyses created before the job queue were processed synchronously.
+    InterviewAnalysis = apps.get_model('api', 'InterviewAnalysis')
+    InterviewAnalysis.objects.update(status='completed', stage='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_interviewanalysis_interview_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='stage',
+            field=models.CharField(choices=[('queued', 'Queued'), ('extracting', 'Extracting audio'), ('transcribing', 'Transcribing'), ('scoring', 'Scoring'), ('feedback', 'Generating feedback'), ('done', 'Done')], default='queued', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='interviewanalysis',
+            name='feedback',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='interviewanalysis',
+            name='transcript',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(mark_existing_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_interviewanalysis_job_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='sentiment_timeline',
+            field=models.JSONField(blank=True, default=list, help_text='Per-window sentiment and emotion scores'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_interviewanalysis_sentiment_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the uploaded video', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='AnalysisCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model_version', models.CharField(max_length=16)),
+                ('transcript', models.TextField(blank=True)),
+                ('segments', models.JSONField(default=list)),
+                ('sentiment_score', models.FloatField(default=0.0)),
+                ('emotion_scores', models.JSONField(default=dict)),
+                ('sentiment_timeline', models.JSONField(default=list)),
+                ('pause_analytics', models.JSONField(default=dict)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'model_version')},
+            },
+        ),
+    ]
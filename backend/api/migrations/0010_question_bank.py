@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterviewQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=255)),
+                ('normalized_role', models.CharField(db_index=True, max_length=255)),
+                ('category', models.CharField(blank=True, max_length=50)),
+                ('difficulty', models.CharField(blank=True, max_length=50)),
+                ('question', models.TextField()),
+                ('answer', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RoleSearchStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_role', models.CharField(max_length=255, unique=True)),
+                ('search_count', models.PositiveIntegerField(default=0)),
+                ('last_searched_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
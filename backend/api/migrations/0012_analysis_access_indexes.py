@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_user_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interviewanalysis',
+            index=models.Index(fields=['user', '-created_at'], name='analysis_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewanalysis',
+            index=models.Index(fields=['user', 'status', '-created_at'], name='analysis_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewanalysis',
+            index=models.Index(fields=['status', 'created_at'], name='analysis_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_analysis_access_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='scoring_version',
+            field=models.CharField(blank=True, help_text='Weight config that produced interview_score', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_interviewanalysis_scoring_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict, help_text='Stage timings and pipeline measurements'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_interviewanalysis_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('stage', 'Stage change'), ('segments', 'Transcribed segments'), ('status', 'Final status')], max_length=20)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='api.interviewanalysis')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_analysis_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Name in the default storage', max_length=255)),
+                ('kind', models.CharField(choices=[('original', 'Original upload'), ('audio', 'Audio-only rendition')], default='original', max_length=20)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, help_text='Last time an upload or rendition resolved to this blob')),
+                ('source', models.ForeignKey(blank=True, help_text='Original this rendition was transcoded from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='renditions', to='api.mediablob')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='media',
+            field=models.ForeignKey(blank=True, help_text='Stored blob video_file points at; null until a chunked upload has been adopted', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='analyses', to='api.mediablob'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_analysis_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='quality',
+            field=models.CharField(choices=[('fast', 'Fast'), ('balanced', 'Balanced'), ('high', 'High')], default='balanced', help_text='Hint for the Whisper tier router (see api.utils.routing)', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='refinement',
+            field=models.CharField(blank=True, choices=[('', 'Not needed'), ('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='', help_text='State of the background re-transcription with the target tier', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='interviewanalysis',
+            name='whisper_model',
+            field=models.CharField(blank=True, help_text='Whisper tier that produced the transcript', max_length=20),
+        ),
+    ]
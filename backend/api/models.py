@@ -1,55 +1,268 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 
+class InterviewAnalysisQuerySet(models.QuerySet):
+    # Multi-KB columns that only the detail view and the pipeline read.
+    TEXT_FIELDS = ('transcript', 'feedback', 'sentiment_timeline')
+
+    def for_user(self, user):
+        """A user's analyses, newest first; served by analysis_user_created_idx."""
+        return self.filter(user=user).order_by('-created_at')
+
+    def without_text(self):
+        return self.defer(*self.TEXT_FIELDS)
+
+    def ready(self):
+        """Queued analyses a worker can start: chunked uploads wait for their first chunk."""
+        return self.filter(status=InterviewAnalysis.Status.QUEUED).exclude(
+            upload_session__received_bytes=0, upload_session__finalized_at__isnull=True
+        )
+
+
 class InterviewAnalysis(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        PROCESSING = 'processing', _('Processing')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
+
+    class Stage(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        EXTRACTING = 'extracting', _('Extracting audio')
+        TRANSCRIBING = 'transcribing', _('Transcribing')
+        SCORING = 'scoring', _('Scoring')
+        FEEDBACK = 'feedback', _('Generating feedback')
+        DONE = 'done', _('Done')
+
+    class Quality(models.TextChoices):
+        FAST = 'fast', _('Fast')
+        BALANCED = 'balanced', _('Balanced')
+        HIGH = 'high', _('High')
+
+    class Refinement(models.TextChoices):
+        NONE = '', _('Not needed')
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analyses')
+    batch = models.ForeignKey(
+        'AnalysisBatch', on_delete=models.SET_NULL, null=True, blank=True, related_name='analyses'
+    )
     candidate_name = models.CharField(max_length=255)
     video_file = models.FileField(upload_to='interview_videos/')
-    transcript = models.TextField()
+    media = models.ForeignKey(
+        'MediaBlob', on_delete=models.PROTECT, null=True, blank=True, related_name='analyses',
+        help_text="Stored blob video_file points at; null until a chunked upload has been adopted"
+    )
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the uploaded video")
+    quality = models.CharField(
+        max_length=20, choices=Quality.choices, default=Quality.BALANCED,
+        help_text="Hint for the Whisper tier router (see api.utils.routing)"
+    )
+    whisper_model = models.CharField(max_length=20, blank=True, help_text="Whisper tier that produced the transcript")
+    refinement = models.CharField(
+        max_length=20, choices=Refinement.choices, default=Refinement.NONE, blank=True, db_index=True,
+        help_text="State of the background re-transcription with the target tier"
+    )
+    transcript = models.TextField(blank=True)
     sentiment_score = models.FloatField(default=0.0)
     emotion_scores = models.JSONField(default=dict)
     pause_analytics = models.JSONField(default=dict)
-    feedback = models.TextField()
+    sentiment_timeline = models.JSONField(default=list, blank=True, help_text="Per-window sentiment and emotion scores")
+    feedback = models.TextField(blank=True)
     interview_score = models.FloatField(default=0.0, help_text="Overall interview performance score")
+    scoring_version = models.CharField(max_length=20, blank=True, help_text="Weight config that produced interview_score")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    stage = models.CharField(max_length=20, choices=Stage.choices, default=Stage.QUEUED)
+    error = models.TextField(blank=True)
+    metrics = models.JSONField(default=dict, blank=True, help_text="Stage timings and pipeline measurements")
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InterviewAnalysisQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Listing, detail lookups and history are filtered by user, newest first.
+            models.Index(fields=['user', '-created_at'], name='analysis_user_created_idx'),
+            # Profile stats only look at a user's completed analyses.
+            models.Index(fields=['user', 'status', '-created_at'], name='analysis_user_status_idx'),
+            # Workers claim the oldest queued row.
+            models.Index(fields=['status', 'created_at'], name='analysis_status_created_idx'),
+        ]
+
+    # What this row last contributed to its owner's UserStats, as (count, score).
+    # New instances contribute nothing; loaded rows are snapshotted in from_db.
+    _stats_snapshot = (0, 0.0)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stats_snapshot = instance.stats_contribution()
+        return instance
+
+    def stats_contribution(self):
+        """(count, score) this row adds to UserStats, or None if the fields were deferred."""
+        if self.get_deferred_fields() & {'status', 'interview_score'}:
+            return None
+        if self.status != self.Status.COMPLETED:
+            return (0, 0.0)
+        return (1, self.interview_score)
 
     def __str__(self):
         return f"Analysis for {self.candidate_name} by {self.user.username}"
 
     def calculate_interview_score(self):
         """Calculate overall interview score based on various factors"""
-        # Base score starts with sentiment
-        score = self.sentiment_score * 0.4  # 40% weight for sentiment
-
-        # Add emotion scores (30% weight)
-        if self.emotion_scores:
-            positive_emotions = ['joy', 'confidence', 'enthusiasm']
-            emotion_score = sum(
-                self.emotion_scores.get(emotion, 0) * 0.1
-                for emotion in positive_emotions
-            )
-            score += emotion_score
-
-        # Add pause analytics (30% weight)
-        if self.pause_analytics:
-            total_pauses = self.pause_analytics.get('total_pauses', 0)
-            avg_pause = self.pause_analytics.get('avg_pause', 0)
-            
-            # Penalize for too many pauses or long pauses
-            pause_score = 1.0
-            if total_pauses > 5:
-                pause_score -= (total_pauses - 5) * 0.05
-            if avg_pause > 2.0:
-                pause_score -= (avg_pause - 2.0) * 0.1
-            
-            pause_score = max(0.0, pause_score)  # Ensure score doesn't go below 0
-            score += pause_score * 0.3
-
-        # Normalize score to be between 0 and 1
-        self.interview_score = max(0.0, min(1.0, score))
+        from .utils import scoring
+
+        self.scoring_version = scoring.current_version()
+        self.interview_score = scoring.score(
+            self.sentiment_score, self.emotion_scores, self.pause_analytics, self.scoring_version
+        )
         return self.interview_score
+
+
+class AnalysisBatch(models.Model):
+    """Recordings submitted together; workers process queued items of a batch as one group."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analysis_batches')
+    name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'analysis batches'
+
+    def __str__(self):
+        return f"Batch {self.pk} by {self.user.username}"
+
+
+class AnalysisEvent(models.Model):
+    """A progress event for an in-flight analysis, relayed to clients over SSE."""
+    class Kind(models.TextChoices):
+        STAGE = 'stage', _('Stage change')
+        SEGMENTS = 'segments', _('Transcribed segments')
+        STATUS = 'status', _('Final status')
+
+    analysis = models.ForeignKey(InterviewAnalysis, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.kind} event for analysis {self.analysis_id}"
+
+
+class AnalysisCacheEntry(models.Model):
+    """Media analysis results for one video content hash and model configuration."""
+    content_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=16)
+    transcript = models.TextField(blank=True)
+    segments = models.JSONField(default=list)
+    sentiment_score = models.FloatField(default=0.0)
+    emotion_scores = models.JSONField(default=dict)
+    sentiment_timeline = models.JSONField(default=list)
+    pause_analytics = models.JSONField(default=dict)
+    size_bytes = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'model_version')
+
+    def __str__(self):
+        return f"Cached analysis {self.content_hash[:12]} ({self.model_version})"
+
+
+class UploadSession(models.Model):
+    """A resumable chunked upload; its analysis starts while chunks are still arriving."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    analysis = models.OneToOneField(InterviewAnalysis, on_delete=models.CASCADE, related_name='upload_session')
+    filename = models.CharField(max_length=255)
+    received_bytes = models.BigIntegerField(default=0)
+    expected_bytes = models.BigIntegerField(null=True, blank=True)
+    finalized_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.received_bytes} bytes)"
+
+
+class InterviewQuestion(models.Model):
+    """A generated interview question, banked so popular roles skip the LLM."""
+    role = models.CharField(max_length=255)
+    normalized_role = models.CharField(max_length=255, db_index=True)
+    category = models.CharField(max_length=50, blank=True)
+    difficulty = models.CharField(max_length=50, blank=True)
+    question = models.TextField()
+    answer = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.role}: {self.question[:50]}"
+
+
+class RoleSearchStat(models.Model):
+    """How often a role has been searched; drives question bank pre-warming."""
+    normalized_role = models.CharField(max_length=255, unique=True)
+    search_count = models.PositiveIntegerField(default=0)
+    last_searched_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.normalized_role} ({self.search_count})"
+
+
+class MediaBlob(models.Model):
+    """Uploaded media stored once under its SHA-256 and shared by every analysis of the same bytes."""
+    class Kind(models.TextChoices):
+        ORIGINAL = 'original', _('Original upload')
+        AUDIO = 'audio', _('Audio-only rendition')
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, help_text="Name in the default storage")
+    kind = models.CharField(max_length=20, choices=Kind.choices, default=Kind.ORIGINAL)
+    size_bytes = models.BigIntegerField(default=0)
+    source = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='renditions',
+        help_text="Original this rendition was transcoded from"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True, help_text="Last time an upload or rendition resolved to this blob")
+
+    def __str__(self):
+        return f"{self.kind} blob {self.sha256[:12]}"
+
+
+class UserStats(models.Model):
+    """Per-user totals over completed analyses, maintained incrementally by signals."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    interviews_completed = models.PositiveIntegerField(default=0)
+    total_score = models.FloatField(default=0.0)
+    last_interview_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'user stats'
+
+    @property
+    def average_score(self):
+        if not self.interviews_completed:
+            return 0
+        return self.total_score / self.interviews_completed
+
+    def __str__(self):
+        return f"Stats for user {self.user_id}"
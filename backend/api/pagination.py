@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AnalysisCursorPagination(CursorPagination):
+    """Keyset pagination over a user's analyses, newest first; no COUNT query."""
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import InterviewAnalysis
+from .models import InterviewAnalysis, UploadSession
+from .utils import events
 from django.contrib.auth.models import User
 
 User = get_user_model()
@@ -35,9 +36,73 @@ class InterviewAnalysisSerializer(serializers.ModelSerializer):
         model = InterviewAnalysis
         fields = ('id', 'user', 'candidate_name', 'video_file', 'transcript',
                  'sentiment_score', 'emotion_scores', 'pause_analytics',
-                 'feedback', 'interview_score', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'user', 'interview_score',
+                 'sentiment_timeline', 'feedback', 'interview_score', 'status',
+                 'stage', 'error', 'quality', 'whisper_model', 'refinement',
+                 'created_at', 'updated_at')
+        read_only_fields = ('id', 'user', 'interview_score', 'sentiment_timeline',
+                          'status', 'stage', 'error', 'whisper_model', 'refinement',
                           'created_at', 'updated_at')
         extra_kwargs = {
             'feedback': {'required': False}
-        } 
\ No newline at end of file
+        }
+
+class AnalysisListSerializer(serializers.ModelSerializer):
+    """Lightweight row for analysis listings.
+
+    Returns DEFAULT_FIELDS unless the request passes ``?fields=a,b``, in which
+    case only the named fields that appear in Meta.fields are rendered.
+    """
+    DEFAULT_FIELDS = ('id', 'candidate_name', 'interview_score', 'status', 'created_at')
+
+    class Meta:
+        model = InterviewAnalysis
+        fields = ('id', 'candidate_name', 'interview_score', 'sentiment_score',
+                 'emotion_scores', 'pause_analytics', 'status', 'stage',
+                 'created_at', 'completed_at')
+        read_only_fields = fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_fields(self.context.get('request'))
+        for name in set(self.fields) - set(selected):
+            self.fields.pop(name)
+
+    @classmethod
+    def selected_fields(cls, request):
+        raw = request.query_params.get('fields') if request is not None else None
+        if not raw:
+            return cls.DEFAULT_FIELDS
+        requested = {name.strip() for name in raw.split(',')}
+        return tuple(name for name in cls.Meta.fields if name in requested) or cls.DEFAULT_FIELDS
+
+class AnalysisStatusSerializer(serializers.ModelSerializer):
+    events_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = InterviewAnalysis
+        fields = ('id', 'status', 'stage', 'error', 'whisper_model', 'refinement',
+                 'created_at', 'started_at', 'completed_at', 'events_url')
+        read_only_fields = fields
+
+    def get_events_url(self, obj):
+        request = self.context.get('request')
+        return events.events_url(obj, request) if request is not None else None
+
+class UploadInitSerializer(serializers.Serializer):
+    candidate_name = serializers.CharField(max_length=255)
+    filename = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    size = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    quality = serializers.ChoiceField(
+        choices=InterviewAnalysis.Quality.choices, default=InterviewAnalysis.Quality.BALANCED
+    )
+
+class UploadChunkSerializer(serializers.Serializer):
+    chunk = serializers.FileField(allow_empty_file=True)
+    offset = serializers.IntegerField(min_value=0, required=False)
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'analysis', 'filename', 'received_bytes', 'expected_bytes',
+                 'finalized_at', 'created_at')
+        read_only_fields = fields
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import InterviewAnalysis, InterviewQuestion
+from .utils import search, stats
+
+
+@receiver(post_save, sender=InterviewAnalysis)
+def update_user_stats(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stats.record_save(instance)
+
+
+@receiver(post_delete, sender=InterviewAnalysis)
+def remove_from_user_stats(sender, instance, **kwargs):
+    stats.record_delete(instance)
+
+
+@receiver(post_save, sender=InterviewAnalysis)
+def index_analysis(sender, instance, **kwargs):
+    if instance.status == InterviewAnalysis.Status.COMPLETED and instance.transcript:
+        search.update_on_commit(search.index_documents, [search.analysis_document(instance)])
+
+
+@receiver(post_delete, sender=InterviewAnalysis)
+def unindex_analysis(sender, instance, **kwargs):
+    search.update_on_commit(search.remove_documents, 'analysis', [instance.pk])
+
+
+@receiver(post_save, sender=InterviewQuestion)
+def index_question(sender, instance, **kwargs):
+    search.update_on_commit(search.index_documents, [search.question_document(instance)])
+
+
+@receiver(post_delete, sender=InterviewQuestion)
+def unindex_question(sender, instance, **kwargs):
+    search.update_on_commit(search.remove_documents, 'question', [instance.pk])
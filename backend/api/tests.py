@@ -1,3 +1,1135 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .decorators import stale_while_revalidate
+from .models import AnalysisCacheEntry, InterviewAnalysis, InterviewAnalysisQuerySet, InterviewQuestion, UserStats
+from .serializers import AnalysisListSerializer
+from .utils import llm
+from .utils.scratch import scratch_dir
+
+
+class FakeFFmpegStream:
+    """Stands in for an ffmpeg-python stream; 'decodes' by copying the input path into the output."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def output(self, target, **kwargs):
+        self.target = target
+        return self
+
+    def overwrite_output(self):
+        return self
+
+    def run(self, **kwargs):
+        time.sleep(0.01)
+        with open(self.target, 'w') as f:
+            f.write(self.source)
+        return b'', b''
+
+
+class ScratchDirTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, self.root)
+
+    def test_scratch_dir_is_removed_on_error(self):
+        with override_settings(ANALYSIS_SCRATCH_ROOT=self.root):
+            with self.assertRaises(RuntimeError):
+                with scratch_dir() as path:
+                    self.assertTrue(path.startswith(self.root))
+                    raise RuntimeError("boom")
+        self.assertFalse(os.path.exists(path))
+
+    def test_concurrent_extractions_do_not_clobber_each_other(self):
+        from .utils import analyzer
+
+        def analyze(i):
+            source = f"video-{i}.mp4"
+            with scratch_dir() as workdir:
+                audio_path = analyzer.extract_audio(source, workdir)
+                time.sleep(0.02)  # let the other jobs write their own audio
+                with open(audio_path) as f:
+                    return source, f.read()
+
+        with override_settings(ANALYSIS_SCRATCH_ROOT=self.root), \
+                mock.patch.object(analyzer.ffmpeg, 'input', FakeFFmpegStream):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(analyze, range(16)))
+
+        for source, extracted in results:
+            self.assertEqual(source, extracted)
+        self.assertEqual(os.listdir(self.root), [])
+
+
+class InMemoryAudioTests(TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+
+    def lavfi(self, name, *args):
+        import subprocess
+
+        path = os.path.join(self.workdir, name)
+        subprocess.run(['ffmpeg', '-v', 'error', *args, path], check=True)
+        return path
+
+    @skipUnless(shutil.which('ffmpeg'), "ffmpeg is not installed")
+    def test_load_audio_decodes_a_clip_into_float_samples(self):
+        from .utils import analyzer
+
+        clip = self.lavfi('tone.mp4', '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100:duration=0.5',
+                          '-f', 'lavfi', '-i', 'color=size=32x32:duration=0.5', '-c:v', 'mpeg4', '-shortest')
+        audio = analyzer.load_audio(clip)
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertAlmostEqual(len(audio), analyzer.SAMPLE_RATE // 2, delta=analyzer.SAMPLE_RATE // 20)
+        self.assertTrue(0.01 < np.abs(audio).max() <= 1.0)
+
+    @skipUnless(shutil.which('ffmpeg'), "ffmpeg is not installed")
+    def test_load_audio_rejects_a_clip_without_audio(self):
+        from .utils import analyzer
+
+        clip = self.lavfi('silent.mp4', '-f', 'lavfi', '-i', 'color=size=32x32:duration=0.5', '-c:v', 'mpeg4')
+        with self.assertRaisesMessage(Exception, analyzer.NO_AUDIO_MESSAGE):
+            analyzer.load_audio(clip)
+
+    def test_load_audio_scales_the_piped_pcm(self):
+        from .utils import analyzer
+
+        pcm = np.array([0, 16384, -32768, 32767], dtype=np.int16).tobytes()
+        with mock.patch('ffmpeg._run.subprocess.Popen') as popen:
+            popen.return_value.communicate.return_value = (pcm, b'')
+            popen.return_value.poll.return_value = 0
+            audio = analyzer.load_audio('talk.mp4')
+
+        args = popen.call_args[0][0]
+        self.assertEqual(args[-2:], ['pipe:', '-y'])
+        self.assertEqual(args[args.index('-ar') + 1], str(analyzer.SAMPLE_RATE))
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_allclose(audio, [0.0, 0.5, -1.0, 32767 / 32768])
+
+        with mock.patch('ffmpeg._run.subprocess.Popen') as popen:
+            popen.return_value.communicate.return_value = (b'', b'Output file does not contain any stream')
+            popen.return_value.poll.return_value = 1
+            with self.assertRaisesMessage(Exception, analyzer.NO_AUDIO_MESSAGE):
+                analyzer.load_audio('slides.mp4')
+
+
+class JobQueueTests(TestCase):
+    def test_only_jobs_without_a_heartbeat_are_requeued(self):
+        from .utils import jobs
+
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        long_ago = timezone.now() - timedelta(hours=2)
+        running, abandoned = [
+            InterviewAnalysis.objects.create(
+                user=user, candidate_name=name, video_file='interview_videos/a.mp4',
+                status=InterviewAnalysis.Status.PROCESSING,
+            )
+            for name in ('Ada', 'Grace')
+        ]
+        # Both started long ago, but only the running one still has a fresh heartbeat.
+        InterviewAnalysis.objects.update(started_at=long_ago)
+        InterviewAnalysis.objects.filter(pk=abandoned.pk).update(updated_at=long_ago)
+
+        self.assertEqual(jobs.requeue_stale(timeout=600), 1)
+        self.assertEqual(InterviewAnalysis.objects.get(pk=running.pk).status, InterviewAnalysis.Status.PROCESSING)
+        self.assertEqual(InterviewAnalysis.objects.get(pk=abandoned.pk).status, InterviewAnalysis.Status.QUEUED)
+
+        with override_settings(ANALYSIS_JOB_HEARTBEAT=0.01), \
+                mock.patch.object(InterviewAnalysis.objects, 'filter') as filter_:
+            with jobs.heartbeat([running]):
+                time.sleep(0.1)
+        filter_.assert_called_with(pk__in=[running.pk])
+        self.assertTrue(filter_.return_value.update.called)
+
+    def test_running_workers_pick_up_jobs_of_a_dead_worker(self):
+        from .utils import jobs
+
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        abandoned = InterviewAnalysis.objects.create(
+            user=user, candidate_name='Ada', video_file='interview_videos/a.mp4',
+            status=InterviewAnalysis.Status.PROCESSING,
+        )
+        InterviewAnalysis.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+
+        with mock.patch.object(jobs, 'run_jobs') as run_jobs:
+            self.assertEqual(jobs.run_worker(poll_interval=0, max_jobs=1), 1)
+        self.assertEqual([a.pk for a in run_jobs.call_args.args[0]], [abandoned.pk])
+
+
+class ModelRegistryTests(TestCase):
+    def test_importing_the_pipeline_loads_no_models(self):
+        from .utils import pipeline, registry  # noqa: F401
+
+        self.assertEqual(registry.loaded_models(), [])
+
+
+class FakeTokenizer:
+    def __call__(self, texts, add_special_tokens=False):
+        return {'input_ids': [text.split() for text in texts]}
+
+
+class FakeClassifier:
+    """Gives a window full marks for every label that appears in it as a word."""
+
+    tokenizer = FakeTokenizer()
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(texts)
+        self.kwargs = kwargs
+        return [
+            [{'label': label, 'score': 1.0 if label in text.split() else 0.0} for label in self.labels]
+            for text in texts
+        ]
+
+
+class WindowedTextAnalysisTests(TestCase):
+    segments = [
+        {'start': 0.0, 'end': 2.0, 'text': 'POSITIVE joy one two'},
+        {'start': 2.0, 'end': 4.0, 'text': 'three four'},
+        {'start': 5.0, 'end': 6.0, 'text': 'NEGATIVE fear'},
+    ]
+
+    @override_settings(ANALYSIS_TEXT_WINDOW_TOKENS=6)
+    def test_scores_cover_the_whole_transcript_in_one_batched_call(self):
+        from .utils import analyzer
+
+        sentiment_model = FakeClassifier(['POSITIVE', 'NEGATIVE'])
+        emotion_model = FakeClassifier(['joy', 'fear'])
+        with mock.patch.object(analyzer, 'get_sentiment_model', return_value=sentiment_model), \
+                mock.patch.object(analyzer, 'get_emotion_model', return_value=emotion_model):
+            sentiment, emotions, timeline = analyzer.analyze_text('', self.segments)
+
+        # Two windows: the first two segments (6 tokens) and the last one (2 tokens).
+        self.assertEqual(len(sentiment_model.calls), 1)
+        self.assertEqual(len(sentiment_model.calls[0]), 2)
+        self.assertEqual([(w['start'], w['end']) for w in timeline], [(0.0, 4.0), (5.0, 6.0)])
+        self.assertEqual(sentiment['label'], 'POSITIVE')
+        self.assertAlmostEqual(sentiment['score'], 6 / 8)
+        self.assertAlmostEqual(emotions['joy'], 6 / 8)
+        self.assertAlmostEqual(emotions['fear'], 2 / 8)
+
+
+class ResultCacheTests(TestCase):
+    results = {
+        'transcript': 'hello there', 'segments': [], 'sentiment_score': 0.9,
+        'emotion_scores': {'joy': 0.8}, 'sentiment_timeline': [], 'pause_analytics': {},
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_miss_and_lru_eviction(self):
+        from .utils import result_cache
+
+        self.assertIsNone(result_cache.lookup('a' * 64))
+        result_cache.store('a' * 64, self.results)
+        result_cache.store('b' * 64, self.results)
+        self.assertEqual(result_cache.lookup('a' * 64)['transcript'], 'hello there')
+
+        # 'b' is now the least recently used entry and goes first.
+        entry_size = AnalysisCacheEntry.objects.first().size_bytes
+        self.assertEqual(result_cache.evict(max_bytes=entry_size), 1)
+        self.assertIsNotNone(result_cache.lookup('a' * 64))
+        self.assertIsNone(result_cache.lookup('b' * 64))
+
+        stats = result_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 2, 1))
+
+
+class InferenceServerTests(TestCase):
+    def test_concurrent_requests_share_one_model_call(self):
+        from .utils import inference, registry
+
+        model = FakeClassifier(['POSITIVE', 'NEGATIVE'])
+        batcher = inference.MicroBatcher('sentiment', max_batch=64, max_wait=200)
+        texts = [['POSITIVE a', 'b'], ['NEGATIVE c'], ['d', 'POSITIVE e', 'f']]
+        with mock.patch.object(registry, 'get_sentiment_model', return_value=model):
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                results = list(pool.map(batcher.classify, texts))
+
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(sorted(model.calls[0]), sorted(t for request in texts for t in request))
+        self.assertEqual(model.kwargs['batch_size'], 6)
+        self.assertEqual([len(r) for r in results], [2, 1, 3])
+        self.assertEqual(results[1][0][1], {'label': 'NEGATIVE', 'score': 1.0})
+        self.assertEqual(results[2][1][0], {'label': 'POSITIVE', 'score': 1.0})
+
+    def test_workers_score_windows_through_the_socket(self):
+        import threading
+
+        from .utils import analyzer, inference, registry
+
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        path = os.path.join(workdir, 'inference.sock')
+        server = inference.InferenceServer(path, inference._Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        segments = WindowedTextAnalysisTests.segments
+        config = {**settings.ANALYSIS_INFERENCE, 'BACKEND': 'socket', 'SOCKET': path}
+        with mock.patch.object(registry, 'get_sentiment_model', return_value=FakeClassifier(['POSITIVE', 'NEGATIVE'])), \
+                mock.patch.object(registry, 'get_emotion_model', return_value=FakeClassifier(['joy', 'fear'])), \
+                mock.patch.object(analyzer, 'get_text_tokenizer', return_value=FakeTokenizer()), \
+                mock.patch.object(inference, '_client', None), \
+                override_settings(ANALYSIS_INFERENCE=config, ANALYSIS_TEXT_WINDOW_TOKENS=6):
+            sentiment, emotions, timeline = analyzer.analyze_text('', segments)
+            with self.assertRaises(inference.InferenceError):
+                inference.get_client().classify('pitch', ['text'])
+
+        self.assertEqual(len(timeline), 2)
+        self.assertEqual(timeline[1]['sentiment']['label'], 'NEGATIVE')
+        self.assertAlmostEqual(emotions['joy'], 0.75)
+
+
+class VoiceActivityDetectionTests(TestCase):
+    sample_rate = 16000
+
+    def tone(self, seconds):
+        t = np.arange(int(seconds * self.sample_rate)) / self.sample_rate
+        return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    def silence(self, seconds):
+        rng = np.random.default_rng(0)
+        return (0.0005 * rng.standard_normal(int(seconds * self.sample_rate))).astype(np.float32)
+
+    def test_speech_regions_silences_and_timestamp_remapping(self):
+        from .utils import vad
+
+        audio = np.concatenate([self.silence(1), self.tone(1), self.silence(2), self.tone(1), self.silence(1)])
+        speech_map = vad.detect_speech(audio, self.sample_rate)
+
+        self.assertEqual(len(speech_map['speech']), 2)
+        self.assertEqual(len(speech_map['silences']), 1)
+        start, end = speech_map['silences'][0]
+        self.assertAlmostEqual(start, 2.0, delta=0.05)
+        self.assertAlmostEqual(end, 4.0, delta=0.05)
+
+        compacted, offsets = vad.compact(audio, speech_map['speech'], self.sample_rate)
+        self.assertLess(len(compacted), len(audio) * 0.6)
+        # A segment at the start of the second region in compacted audio lands at ~3.8s originally.
+        second_region_start = offsets[1][0]
+        segments = vad.remap_segments([{'start': second_region_start, 'end': second_region_start + 1.0}], offsets)
+        self.assertAlmostEqual(segments[0]['start'], speech_map['speech'][1][0], places=3)
+
+    @override_settings(ANALYSIS_VAD_ENABLED=False, ANALYSIS_TRANSCRIBE_WORKERS=1)
+    def test_live_transcription_without_vad_keeps_the_whole_recording(self):
+        from .utils import pipeline
+
+        audio = np.concatenate([self.silence(1), self.tone(1), self.silence(2)])
+        analysis = InterviewAnalysis(candidate_name='Ada', metrics={})
+        with mock.patch.object(pipeline.vad, 'detect_speech') as detect_speech, \
+                mock.patch.object(pipeline, 'transcribe_chunked', return_value=('hi', [])) as transcribe:
+            self.assertEqual(pipeline.transcribe_audio(analysis, audio, live=True), ('hi', [], None))
+        detect_speech.assert_not_called()
+        self.assertEqual(transcribe.call_args.args[1]['speech'], [[0.0, 4.0]])
+
+
+class ParallelTranscriptionTests(TestCase):
+    def test_stitch_removes_words_repeated_across_chunk_boundaries(self):
+        from .utils.transcription import stitch
+
+        transcript, segments = stitch([
+            (' I led the team', [{'start': 0.0, 'end': 2.0, 'text': ' I led the team'}]),
+            (' the team shipped it.', [{'start': 2.5, 'end': 4.0, 'text': ' the team shipped it.'}]),
+        ])
+        self.assertEqual(transcript, ' I led the team shipped it.')
+        self.assertEqual([seg['id'] for seg in segments], [0, 1])
+
+    def test_live_segments_match_the_stitched_transcript(self):
+        from .utils import transcription
+
+        chunk_results = iter([
+            (' I led the team', [{'start': 0.0, 'end': 2.0, 'text': ' I led the team'}]),
+            (' the team shipped it.', [{'start': 2.5, 'end': 4.0, 'text': ' the team shipped it.'}]),
+        ])
+        live = []
+        speech_map = {'speech': [[0.0, 2.0], [2.5, 4.0]], 'silences': [[2.0, 2.5]], 'duration': 4.0}
+        with mock.patch.object(transcription, '_transcribe_chunk', side_effect=lambda *args: next(chunk_results)):
+            transcript, _ = transcription.transcribe_chunked(
+                np.zeros(16000 * 4, dtype=np.float32), speech_map, chunk_seconds=2, on_segments=live.extend
+            )
+        self.assertEqual([seg['text'] for seg in live], [' I led the team', ' shipped it.'])
+        self.assertEqual(''.join(seg['text'] for seg in live), transcript)
+
+    def test_chunks_split_at_silences(self):
+        from .utils.transcription import plan_chunks
+
+        speech = [[0.0, 50.0], [51.0, 100.0], [101.0, 150.0]]
+        chunks = plan_chunks(np.zeros(16000 * 150, dtype=np.float32), speech, target_seconds=100)
+        self.assertEqual(chunks, [[[0.0, 50.0], [51.0, 100.0]], [[101.0, 150.0]]])
+
+
+class ChunkedUploadTests(TestCase):
+    def test_continuous_audio_is_cut_before_the_buffer_grows_unbounded(self):
+        from .utils import streaming
+
+        sample_rate = 16000
+        t = np.arange(sample_rate) / sample_rate
+        pieces = []
+
+        def transcribe(piece, speech_map, model=None):
+            pieces.append(len(piece))
+            text = f' piece{len(pieces)}'
+            return text, [{'start': 0.0, 'end': len(piece) / sample_rate, 'text': text}]
+
+        transcriber = streaming.IncrementalTranscriber(2, sample_rate)
+        with mock.patch.object(streaming, 'transcribe_speech', side_effect=transcribe):
+            for second in range(20):
+                # A tone with no silence in it, only a slight dip in level each second.
+                transcriber.feed((0.3 * (1 - 0.2 * t) * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+                self.assertLess(len(transcriber.pending), 5 * sample_rate)
+            audio, _, segments = transcriber.finish()
+
+        self.assertGreater(len(pieces), 5)
+        self.assertEqual(sum(pieces), len(audio))
+        self.assertEqual(segments[-1]['end'], 20.0)
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_chunks_are_appended_in_order_and_finalize_reports_status(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            init = self.client.post('/api/uploads/', {'candidate_name': 'Ada', 'filename': 'talk.webm', 'size': 6})
+            self.assertEqual(init.status_code, 201)
+            chunk_url = init.data['chunk_url']
+            # Nothing to decode yet, so no worker should be tied up waiting for it.
+            self.assertFalse(InterviewAnalysis.objects.ready().exists())
+
+            response = self.client.post(chunk_url, {'chunk': SimpleUploadedFile('c0', b'abc'), 'offset': 0})
+            self.assertEqual(response.data['received_bytes'], 3)
+            self.assertEqual(InterviewAnalysis.objects.ready().get().pk, init.data['analysis'])
+            response = self.client.post(chunk_url, {'chunk': SimpleUploadedFile('c1', b'xyz'), 'offset': 0})
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.data['received_bytes'], 3)
+            self.client.post(chunk_url, {'chunk': SimpleUploadedFile('c1', b'def'), 'offset': 3})
+
+            response = self.client.post(init.data['finalize_url'])
+            self.assertEqual(response.status_code, 202)
+            analysis = InterviewAnalysis.objects.get(pk=init.data['analysis'])
+            with open(analysis.video_file.path, 'rb') as f:
+                self.assertEqual(f.read(), b'abcdef')
+
+    def test_malformed_sizes_and_offsets_are_rejected(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            for size in ('lots', -1):
+                response = self.client.post('/api/uploads/', {'candidate_name': 'Ada', 'size': size})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('size', response.data)
+            self.assertEqual(self.client.post('/api/uploads/', {'size': 3}).status_code, 400)
+
+            chunk_url = self.client.post('/api/uploads/', {'candidate_name': 'Ada'}).data['chunk_url']
+            for offset in ('start', -3):
+                response = self.client.post(chunk_url, {'chunk': SimpleUploadedFile('c0', b'abc'), 'offset': offset})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('offset', response.data)
+            self.assertEqual(self.client.post(chunk_url, {'offset': 0}).status_code, 400)
+
+
+class MediaStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_identical_uploads_are_written_once_and_share_a_blob(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with override_settings(MEDIA_ROOT=self.media_root):
+            for name in ('first.mp4', 'second.mp4'):
+                response = client.post('/api/analyze/', {
+                    'candidate_name': 'Ada', 'video': SimpleUploadedFile(name, b'same video bytes'),
+                })
+                self.assertEqual(response.status_code, 202)
+
+        first, second = InterviewAnalysis.objects.order_by('id')
+        self.assertEqual(first.media_id, second.media_id)
+        self.assertEqual(first.content_hash, first.media_id)
+        self.assertEqual(self.stored_files(), [first.video_file.name])
+        self.assertTrue(first.video_file.name.startswith('media/original/'))
+
+    def test_compaction_swaps_originals_for_audio_and_collects_garbage(self):
+        from django.core.management import call_command
+        from .models import MediaBlob
+        from .utils import storage
+
+        old = timezone.now() - timedelta(days=30)
+        with override_settings(MEDIA_ROOT=self.media_root):
+            blob = storage.put(SimpleUploadedFile('talk.mp4', b'video'))
+            finished = InterviewAnalysis.objects.create(
+                user=self.user, candidate_name='Ada', video_file=blob.name, media=blob,
+                status=InterviewAnalysis.Status.COMPLETED, completed_at=old,
+            )
+            # A finished chunked upload that is not in the blob store yet.
+            storage.backend.save('interview_videos/chunked.webm', ContentFile(b'chunks'))
+            chunked = InterviewAnalysis.objects.create(
+                user=self.user, candidate_name='Ada', video_file='interview_videos/chunked.webm',
+                status=InterviewAnalysis.Status.FAILED, completed_at=timezone.now(),
+            )
+            # Deleted analyses leave their blob behind until garbage collection.
+            orphan = storage.put(SimpleUploadedFile('gone.mp4', b'deleted'))
+
+            with mock.patch.object(storage.ffmpeg, 'input', FakeFFmpegStream):
+                call_command('compact_media', retention_days=7, grace=0, stdout=StringIO())
+
+            finished.refresh_from_db()
+            chunked.refresh_from_db()
+            self.assertEqual(finished.media.kind, MediaBlob.Kind.AUDIO)
+            self.assertTrue(finished.video_file.name.endswith('.ogg'))
+            # Recently finished: adopted, but the original is kept.
+            self.assertEqual(chunked.media.kind, MediaBlob.Kind.ORIGINAL)
+            self.assertFalse(MediaBlob.objects.filter(pk__in=[blob.pk, orphan.pk]).exists())
+            self.assertEqual(self.stored_files(), sorted([finished.video_file.name, chunked.video_file.name]))
+
+    def test_audio_rendition_is_written_by_the_extraction_run(self):
+        from .utils import analyzer, storage
+
+        with mock.patch('ffmpeg._run.subprocess.Popen') as popen:
+            popen.return_value.communicate.return_value = (b'\x00\x00' * 1600, b'')
+            popen.return_value.poll.return_value = 0
+            audio = analyzer.load_audio('talk.mp4', storage.audio_rendition('/scratch'))
+
+        self.assertEqual(len(audio), 1600)
+        args = popen.call_args[0][0]
+        self.assertEqual(popen.call_count, 1)
+        self.assertEqual(args.count('-i'), 1)
+        self.assertIn('pipe:', args)
+        self.assertIn('libopus', args)
+        self.assertEqual(args[-2:], ['/scratch/rendition.ogg', '-y'])
+
+    @override_settings(ANALYSIS_MEDIA_KEEP='audio')
+    def test_audio_only_mode_drops_originals_once_unused(self):
+        from .models import MediaBlob
+        from .utils import storage
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            original = storage.put(SimpleUploadedFile('talk.mp4', b'video'))
+            first, second = [
+                InterviewAnalysis.objects.create(
+                    user=self.user, candidate_name='Ada', video_file=original.name, media=original,
+                    status=InterviewAnalysis.Status.PROCESSING,
+                )
+                for _ in range(2)
+            ]
+            rendition = os.path.join(self.media_root, 'rendition.ogg')
+            with open(rendition, 'wb') as f:
+                f.write(b'opus')
+
+            storage.keep_audio(first, rendition)
+            self.assertEqual(first.media.kind, MediaBlob.Kind.AUDIO)
+            self.assertFalse(storage.needs_audio_rendition(first))
+            # Still used by the second analysis.
+            self.assertTrue(storage.backend.exists(original.name))
+
+            second.refresh_from_db()
+            storage.keep_audio(second, rendition)
+            self.assertEqual(second.media_id, first.media_id)
+            self.assertFalse(MediaBlob.objects.filter(pk=original.pk).exists())
+            self.assertFalse(storage.backend.exists(original.name))
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+
+    def create(self, score, status=InterviewAnalysis.Status.COMPLETED):
+        return InterviewAnalysis.objects.create(
+            user=self.user, candidate_name='Ada', video_file='interview_videos/a.mp4',
+            interview_score=score, status=status,
+        )
+
+    def test_stats_follow_saves_and_deletes(self):
+        self.create(0.5)
+        pending = self.create(0.0, status=InterviewAnalysis.Status.QUEUED)
+        last = self.create(0.9)
+
+        pending = InterviewAnalysis.objects.get(pk=pending.pk)
+        pending.status, pending.interview_score = InterviewAnalysis.Status.COMPLETED, 0.7
+        pending.save()
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual(stats.interviews_completed, 3)
+        self.assertAlmostEqual(stats.total_score, 2.1)
+        self.assertEqual(stats.last_interview_at, last.created_at)
+
+        last.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.interviews_completed, 2)
+        self.assertAlmostEqual(stats.average_score, 0.6)
+        self.assertEqual(stats.last_interview_at, pending.created_at)
+
+    def test_recompute_all_without_conflict_target_upserts(self):
+        from django.db import connection
+
+        from .utils import stats
+
+        other = User.objects.create_user('second', 'second@example.com', 'secret-pass')
+        self.create(0.5)
+        InterviewAnalysis.objects.create(
+            user=other, candidate_name='Grace', video_file='interview_videos/b.mp4',
+            interview_score=0.8, status=InterviewAnalysis.Status.COMPLETED,
+        )
+        UserStats.objects.filter(user=other).delete()
+        # Bulk writes such as rescoring bypass the save signals.
+        InterviewAnalysis.objects.filter(user=self.user).update(interview_score=0.9)
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.assertEqual(stats.recompute_all(chunk_size=1), 2)
+        self.assertAlmostEqual(UserStats.objects.get(user=self.user).total_score, 0.9)
+        self.assertEqual(UserStats.objects.get(user=other).interviews_completed, 1)
+
+    def test_profile_query_count_does_not_grow_with_history(self):
+        for score in (0.2, 0.4, 0.6, 0.8) * 5:
+            self.create(score)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertNumQueries(2):
+            response = client.get('/api/profile/')
+        self.assertEqual(response.data['interviewsCompleted'], 20)
+        self.assertAlmostEqual(response.data['averageScore'], 0.5)
+        self.assertEqual(len(response.data['interviewHistory']), 5)
+
+
+class AnalysisListTests(TestCase):
+    def test_list_is_slim_cursor_paginated_and_single_query(self):
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        InterviewAnalysis.objects.bulk_create([
+            InterviewAnalysis(user=user, candidate_name=f'Ada {i}', video_file='interview_videos/a.mp4',
+                              transcript='long transcript', emotion_scores={'joy': 0.5})
+            for i in range(5)
+        ])
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with self.assertNumQueries(1):
+            response = client.get('/api/analyses/?page_size=3')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(set(response.data['results'][0]), set(AnalysisListSerializer.DEFAULT_FIELDS))
+        self.assertIsNotNone(response.data['next'])
+
+        response = client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+
+        response = client.get('/api/analyses/?fields=id,emotion_scores,transcript')
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'emotion_scores'})
+        self.assertEqual(row['emotion_scores'], {'joy': 0.5})
+
+
+class AnalysisIndexTests(TestCase):
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        # No separate sort step: SQLite's temp B-tree or MySQL's filesort.
+        self.assertNotIn('TEMP B-TREE', plan.upper())
+        self.assertNotIn('FILESORT', plan.upper())
+
+    def test_hot_queries_are_served_by_composite_indexes(self):
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        self.assertUsesIndex(
+            InterviewAnalysis.objects.for_user(user).only('id', 'created_at'), 'analysis_user_created_idx')
+        self.assertUsesIndex(
+            InterviewAnalysis.objects.filter(user=user, status=InterviewAnalysis.Status.COMPLETED)
+            .order_by('-created_at').values('created_at')[:5],
+            'analysis_user_status_idx')
+
+    def test_without_text_defers_large_columns(self):
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        InterviewAnalysis.objects.create(user=user, candidate_name='Ada', video_file='interview_videos/a.mp4',
+                                         transcript='x' * 10_000)
+        analysis = InterviewAnalysis.objects.without_text().get()
+        self.assertEqual(analysis.get_deferred_fields(), set(InterviewAnalysisQuerySet.TEXT_FIELDS))
+
+
+class ScoringTests(TestCase):
+    def test_vectorized_scores_match_the_original_formula(self):
+        from .utils import scoring
+
+        rows = [
+            (0.9, {'joy': 0.5, 'confidence': 0.2, 'anger': 0.9}, {'total_pauses': 8, 'avg_pause': 3.0}),
+            (0.1, {}, {}),
+            (1.0, {'joy': 1.0, 'confidence': 1.0, 'enthusiasm': 1.0}, {'total_pauses': 0, 'avg_pause': 0}),
+        ]
+        expected = [
+            0.9 * 0.4 + 0.07 + (1.0 - 3 * 0.05 - 1.0 * 0.1) * 0.3,
+            0.1 * 0.4,
+            1.0,  # clipped
+        ]
+        np.testing.assert_allclose(scoring.score_rows(rows, 'v1'), expected)
+
+    def test_rescore_command_updates_scores_and_stats(self):
+        from django.core.management import call_command
+
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        analysis = InterviewAnalysis.objects.create(
+            user=user, candidate_name='Ada', video_file='interview_videos/a.mp4', sentiment_score=0.5,
+            interview_score=0.0, status=InterviewAnalysis.Status.COMPLETED,
+        )
+        call_command('rescore_analyses', stdout=open(os.devnull, 'w'))
+        analysis.refresh_from_db()
+        self.assertAlmostEqual(analysis.interview_score, 0.2)
+        self.assertEqual(analysis.scoring_version, 'v1')
+        self.assertAlmostEqual(UserStats.objects.get(user=user).total_score, 0.2)
+
+
+class AnalysisEventsTests(TestCase):
+    async def read_stream(self, url, **headers):
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+    async def test_events_stream_until_the_final_status(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from .models import AnalysisEvent
+        from .utils import events
+
+        user = await User.objects.acreate_user('candidate', 'candidate@example.com', 'secret-pass')
+        analysis = await InterviewAnalysis.objects.acreate(
+            user=user, candidate_name='Ada', video_file='interview_videos/a.mp4',
+            status=InterviewAnalysis.Status.PROCESSING,
+        )
+        await sync_to_async(events.emit)(analysis, AnalysisEvent.Kind.STAGE, stage='transcribing')
+        await sync_to_async(events.emit_segments)(analysis, [{'start': 0.0, 'end': 1.5, 'text': ' Hello'}])
+        await sync_to_async(events.emit)(analysis, AnalysisEvent.Kind.STATUS, status='completed')
+        url = f'/api/analyses/{analysis.pk}/events/'
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 401)
+        # Access tokens are never accepted in the query string, where logs would keep them.
+        response = await self.async_client.get(f'{url}?token={AccessToken.for_user(user)}')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(f'{url}?stream_token={events.stream_token(analysis.pk + 1, user.pk)}')
+        self.assertEqual(response.status_code, 401)
+
+        body = await self.read_stream(f'{url}?stream_token={events.stream_token(analysis.pk, user.pk)}')
+        self.assertIn('event: snapshot', body)
+        self.assertIn('data: {"stage": "transcribing"}', body)
+        self.assertIn('"text": " Hello"', body)
+        self.assertTrue(body.rstrip().endswith('data: {"status": "completed"}'))
+
+        first_id = await AnalysisEvent.objects.filter(analysis=analysis).values_list('id', flat=True).afirst()
+        body = await self.read_stream(url, authorization=f'Bearer {AccessToken.for_user(user)}',
+                                      last_event_id=str(first_id))
+        self.assertNotIn('event: stage', body)
+        self.assertIn('event: segments', body)
+
+    def test_wsgi_clients_stream_and_finished_events_are_pruned(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from urllib.parse import urlsplit
+        from .models import AnalysisEvent
+        from .utils import events
+
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        analysis = InterviewAnalysis.objects.create(
+            user=user, candidate_name='Ada', video_file='interview_videos/a.mp4',
+            status=InterviewAnalysis.Status.COMPLETED,
+        )
+        events.emit_segments(analysis, [{'start': 0.0, 'end': 1.5, 'text': ' Hello'}])
+        events.emit(analysis, AnalysisEvent.Kind.STATUS, status='completed')
+        status_response = self.client.get(
+            f'/api/analyses/{analysis.pk}/status/', headers={'authorization': f'Bearer {AccessToken.for_user(user)}'}
+        )
+        events_url = urlsplit(status_response.json()['events_url'])
+        self.assertIn('stream_token=', events_url.query)
+        url = f'{events_url.path}?{events_url.query}'
+
+        response = self.client.get(url)
+        self.assertFalse(hasattr(response.streaming_content, '__aiter__'))
+        self.assertIn('"text": " Hello"', b''.join(response.streaming_content).decode())
+
+        self.assertEqual(events.prune(retention=60), 0)
+        self.assertEqual(events.prune(retention=0), 2)
+        self.assertFalse(AnalysisEvent.objects.exists())
+        body = b''.join(self.client.get(url).streaming_content).decode()
+        self.assertNotIn('event: segments', body)
+        self.assertIn('event: status', body)
+
+
+STUB_LLM = {
+    'BACKEND': 'stub', 'MODEL': 'stub', 'TIMEOUT': 0.2, 'FEEDBACK_TIMEOUT': 0.2, 'MAX_RETRIES': 0,
+    'MAX_CONCURRENCY': 1, 'CACHE_TTL': 60, 'STUB_LATENCY': 0.0,
+}
+
+
+@override_settings(LLM=STUB_LLM)
+class LLMClientTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        llm.reset_client()
+        self.addCleanup(llm.reset_client)
+
+    def test_responses_are_cached_by_prompt(self):
+        client = llm.get_client()
+        with mock.patch.object(client.backend, 'generate', wraps=client.backend.generate) as generate:
+            first = client.generate("Give feedback")
+            self.assertEqual(client.generate("Give feedback"), first)
+        self.assertEqual(generate.call_count, 1)
+        self.assertIsInstance(json.loads(client.generate("Questions", json_output=True)), list)
+
+    def test_call_times_out_when_no_slot_frees_up(self):
+        client = llm.get_client()
+        client.slots.acquire()
+        self.addCleanup(client.slots.release)
+        with self.assertRaises(llm.LLMTimeout):
+            client.generate("Give feedback", use_cache=False)
+
+    async def test_async_calls_are_bounded_by_a_semaphore(self):
+        config = {**STUB_LLM, 'STUB_LATENCY': 0.05, 'MAX_ASYNC_CONCURRENCY': 5, 'TIMEOUT': 5}
+        client = llm.LLMClient(config)
+        start = time.perf_counter()
+        results = await asyncio.gather(*[client.agenerate(f"Prompt {i}") for i in range(20)])
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(set(results)), 20)
+        # Four waves of five calls: bounded, but far quicker than one call at a time.
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 20 * 0.05)
+        self.assertEqual(await client.agenerate("Prompt 0"), results[0])
+
+
+@override_settings(LLM=STUB_LLM)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        llm.reset_client()
+        self.addCleanup(llm.reset_client)
+
+    async def test_async_views_match_the_sync_payloads(self):
+        from django.test import AsyncRequestFactory
+        from rest_framework_simplejwt.tokens import AccessToken
+        from . import async_views
+        from .models import RoleSearchStat
+
+        user = await User.objects.acreate_user('candidate', 'candidate@example.com', 'secret-pass')
+        await InterviewAnalysis.objects.acreate(
+            user=user, candidate_name='Ada', video_file='interview_videos/a.mp4',
+            interview_score=0.8, status=InterviewAnalysis.Status.COMPLETED,
+        )
+        headers = {'authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+        def get(data=None):
+            return AsyncRequestFactory().get('/', data, headers=headers)
+
+        response = await async_views.search_interview_questions(get({'query': ' Data  Engineer'}))
+        self.assertEqual(response.status_code, 200)
+        questions = json.loads(response.content)
+        self.assertEqual(len(questions), 3)
+        response = await async_views.search_interview_questions(get({'query': 'data engineer'}))
+        self.assertEqual(json.loads(response.content), questions)
+        self.assertEqual((await RoleSearchStat.objects.aget()).search_count, 2)
+
+        response = await async_views.user_profile(get())
+        profile = json.loads(response.content)
+        sync_client = APIClient()
+        sync_client.force_authenticate(user)
+        expected = (await sync_to_async(sync_client.get)('/api/profile/')).json()
+        self.assertEqual(profile, expected)
+
+        response = await async_views.user_analyses(get({'fields': 'id,interview_score'}))
+        self.assertEqual(json.loads(response.content)['results'][0]['interview_score'], 0.8)
+
+        response = await async_views.user_profile(AsyncRequestFactory().get('/'))
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(LLM=STUB_LLM, METRICS_TOKEN='')
+class PipelineMetricsTests(TestCase):
+    def test_stage_timings_are_stored_and_exported(self):
+        from .utils import metrics
+        from .utils.pipeline import finish_analysis
+
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        analysis = InterviewAnalysis.objects.create(
+            user=user, candidate_name='Ada', video_file='interview_videos/a.mp4',
+            status=InterviewAnalysis.Status.PROCESSING,
+        )
+        metrics.start(analysis)
+        metrics.record(analysis, audio_seconds=60.0)
+        with metrics.timed(analysis, 'transcribe'):
+            pass
+        finish_analysis(analysis, dict(ResultCacheTests.results))
+
+        stored = InterviewAnalysis.objects.get(pk=analysis.pk).metrics
+        self.assertEqual(set(stored['stages']), {'transcribe', 'scoring', 'feedback'})
+        self.assertIn('real_time_factor', stored)
+        self.assertEqual(stored['models']['llm'], 'stub')
+
+        response = self.client.get('/metrics')
+        body = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('screenlyze_analyses{status="completed"} 1', body)
+        self.assertIn('screenlyze_analysis_stage_seconds_count{stage="feedback"} 1', body)
+
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 401)
+        with override_settings(METRICS_PUBLIC=True):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 200)
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+
+@override_settings(LLM=STUB_LLM)
+class WhisperRoutingTests(TestCase):
+    def test_tier_follows_quality_length_and_queue_depth(self):
+        from .utils.routing import choose_tier, target_tier
+
+        self.assertEqual(target_tier('balanced'), 'base')
+        self.assertEqual(choose_tier('balanced', 30, depth=0), 'small')
+        self.assertEqual(choose_tier('balanced', 600, depth=0), 'base')
+        self.assertEqual(choose_tier('balanced', 3600, depth=0), 'tiny')
+        self.assertEqual(choose_tier('balanced', 600, depth=25), 'tiny')
+        self.assertEqual(choose_tier('high', None, depth=10), 'base')
+        self.assertEqual(choose_tier('fast', 30, depth=0), 'tiny')
+        with override_settings(ANALYSIS_WHISPER_ROUTING={**settings.ANALYSIS_WHISPER_ROUTING, 'ENABLED': False}):
+            self.assertEqual(choose_tier('high', 3600, depth=50), 'base')
+
+    def test_workers_warm_up_only_the_default_tier(self):
+        from .utils import registry
+
+        with mock.patch.object(registry, 'get_whisper_model') as whisper, \
+                mock.patch.object(registry, 'get_sentiment_model'), mock.patch.object(registry, 'get_emotion_model'):
+            registry.warm_up()
+            self.assertEqual(whisper.call_args_list, [mock.call()])
+            routing = {**settings.ANALYSIS_WHISPER_ROUTING, 'WARM_UP_TIERS': True}
+            with override_settings(ANALYSIS_WHISPER_ROUTING=routing):
+                registry.warm_up()
+            self.assertEqual(whisper.call_count, 5)
+
+    def test_downgraded_transcript_is_refined_when_idle(self):
+        from .utils import pipeline
+        from .utils.jobs import claim_refinement, run_refinement
+
+        user = User.objects.create_user('candidate', 'candidate@example.com', 'secret-pass')
+        analysis = InterviewAnalysis.objects.create(
+            user=user, candidate_name='Ada', video_file='interview_videos/a.mp4', content_hash='c' * 64,
+            status=InterviewAnalysis.Status.PROCESSING,
+        )
+        pipeline.metrics.start(analysis)
+        analysis.whisper_model = 'tiny'
+        pipeline.finish_analysis(analysis, dict(ResultCacheTests.results))
+        self.assertEqual(InterviewAnalysis.objects.get(pk=analysis.pk).refinement, 'pending')
+
+        tiers = []
+
+        def transcribe(analysis, audio):
+            tiers.append(analysis.whisper_model)
+            return 'hello there, refined', [], None
+
+        refined_results = {**ResultCacheTests.results, 'transcript': 'hello there, refined'}
+        with mock.patch.object(pipeline, 'load_audio', return_value=np.zeros(16000, dtype=np.float32)), \
+                mock.patch.object(pipeline, 'transcribe_audio', side_effect=transcribe), \
+                mock.patch.object(pipeline, '_media_results', return_value=refined_results):
+            refinement = claim_refinement()
+            self.assertIsNone(claim_refinement())
+            run_refinement(refinement)
+
+        analysis.refresh_from_db()
+        self.assertEqual(tiers, ['base'])
+        self.assertEqual(analysis.refinement, 'done')
+        self.assertEqual(analysis.whisper_model, 'base')
+        self.assertEqual(analysis.transcript, 'hello there, refined')
+        self.assertEqual(analysis.metrics['refinement']['whisper'], 'base')
+        self.assertIn('scoring', analysis.metrics['stages'])
+        self.assertIsNotNone(pipeline.result_cache.lookup('c' * 64, whisper_model='base'))
+
+
+@override_settings(LLM=STUB_LLM)
+class BatchAnalysisTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.user = User.objects.create_user('recruiter', 'recruiter@example.com', 'secret-pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_archive_and_files_are_queued_as_one_batch(self):
+        import zipfile
+
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('ada.mp4', b'first video')
+            zf.writestr('nested/grace.webm', b'second video')
+            zf.writestr('notes.txt', b'not a recording')
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.post('/api/batches/', {
+                'name': 'Spring intake',
+                'archive': SimpleUploadedFile('intake.zip', archive.getvalue()),
+                'videos': [SimpleUploadedFile('linus.mp4', b'third video')],
+            })
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data['status'], 'queued')
+            self.assertEqual(response.data['counts']['queued'], 3)
+            self.assertEqual(
+                sorted(item['candidate_name'] for item in response.data['items']), ['ada', 'grace', 'linus']
+            )
+
+            detail = self.client.get(response.data['status_url'])
+            self.assertEqual(detail.data['id'], response.data['id'])
+            bad = self.client.post('/api/batches/', {'archive': SimpleUploadedFile('bad.zip', b'nope')})
+            self.assertEqual(bad.status_code, 400)
+
+    def test_batch_items_share_one_text_inference_pass(self):
+        from .models import AnalysisBatch
+        from .utils import analyzer, batches, metrics, pipeline
+        from .utils.jobs import claim_group, run_jobs
+
+        batch = AnalysisBatch.objects.create(user=self.user)
+        transcripts = {}
+        for i, text in enumerate(['POSITIVE joy', 'NEGATIVE fear', 'POSITIVE fear']):
+            analysis = InterviewAnalysis.objects.create(
+                user=self.user, batch=batch, candidate_name=f'C{i}', video_file=f'interview_videos/{i}.mp4'
+            )
+            transcripts[analysis.pk] = (text, [{'start': 0.0, 'end': 2.0, 'text': text}], None)
+
+        def transcribe(analysis):
+            metrics.record(analysis, audio_seconds=2.0)
+            return transcripts[analysis.pk]
+
+        sentiment_model = FakeClassifier(['POSITIVE', 'NEGATIVE'])
+        emotion_model = FakeClassifier(['joy', 'fear'])
+        with mock.patch.object(analyzer, 'get_sentiment_model', return_value=sentiment_model), \
+                mock.patch.object(analyzer, 'get_emotion_model', return_value=emotion_model), \
+                mock.patch.object(pipeline, 'transcribe_video', side_effect=transcribe):
+            group = claim_group(batch_id=batch.pk)
+            self.assertEqual(len(group), 3)
+            run_jobs(group)
+
+        self.assertEqual(len(sentiment_model.calls), 1)
+        self.assertEqual(len(sentiment_model.calls[0]), 3)
+        analyses = list(batch.analyses.order_by('id'))
+        self.assertEqual([a.status for a in analyses], [InterviewAnalysis.Status.COMPLETED] * 3)
+        self.assertEqual(analyses[1].emotion_scores, {'fear': 1.0, 'joy': 0.0})
+        summary = batches.summary(batch)
+        self.assertEqual(summary['status'], 'completed')
+        self.assertEqual(summary['throughput']['audio_seconds'], 6.0)
+
+
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_share_one_call(self):
+        calls = []
+
+        @stale_while_revalidate(fresh_timeout=60, stale_timeout=120, key_prefix='test')
+        def slow_lookup(role):
+            calls.append(role)
+            time.sleep(0.1)
+            return [role]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(slow_lookup, ['data analyst'] * 8))
+        self.assertEqual(results, [['data analyst']] * 8)
+        self.assertEqual(calls, ['data analyst'])
+
+    def test_stale_value_is_served_while_refreshing(self):
+        calls = []
+
+        @stale_while_revalidate(fresh_timeout=0, stale_timeout=120, key_prefix='test')
+        def lookup(role):
+            calls.append(role)
+            return 'first' if len(calls) == 1 else 'second'
+
+        self.assertEqual(lookup('pm'), 'first')
+        self.assertEqual(lookup('pm'), 'first')  # stale, refresh kicked off in the background
+        deadline = time.monotonic() + 2
+        while lookup('pm') != 'second' and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(lookup('pm'), 'second')
+
+    def test_lock_held_by_another_process_is_not_released(self):
+        import hashlib
+
+        @stale_while_revalidate(fresh_timeout=60, stale_timeout=120, key_prefix='test', wait_timeout=0.2)
+        def lookup(role):
+            if role == 'fail':
+                raise ValueError(role)
+            return role
+
+        for role in ('pm', 'fail'):
+            digest = hashlib.md5(json.dumps([[role], {}], sort_keys=True).encode()).hexdigest()
+            lock_key = f'test:lookup:{digest}:lock'
+            cache.set(lock_key, 'other process', 60)
+            try:
+                lookup(role)
+            except ValueError:
+                pass
+            self.assertEqual(cache.get(lock_key), 'other process')
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.index_path = os.path.join(tempfile.mkdtemp(), 'index.sqlite3')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.index_path))
+
+    def test_transcripts_are_private_and_questions_are_shared(self):
+        from .utils import search
+
+        search.index_documents([
+            {'kind': 'analysis', 'ref_id': 1, 'owner_id': 7, 'title': 'Ada', 'body': 'I scaled the database'},
+            {'kind': 'analysis', 'ref_id': 2, 'owner_id': 8, 'title': 'Bob', 'body': 'Our database migration'},
+            {'kind': 'question', 'ref_id': 3, 'owner_id': search.PUBLIC_OWNER,
+             'title': 'How do you shard a database?', 'body': 'backend engineer'},
+        ], path=self.index_path)
+
+        total, results = search.search('databa', owner_id=7, path=self.index_path)
+        self.assertEqual(total, 2)
+        self.assertEqual({(r['kind'], r['id']) for r in results}, {('analysis', 1), ('question', 3)})
+
+        search.remove_documents('analysis', [1], path=self.index_path)
+        total, _ = search.search('database', owner_id=7, kind='analysis', path=self.index_path)
+        self.assertEqual(total, 0)
+
+    def test_index_failure_does_not_fail_banking_questions(self):
+        from .utils import questions, search
+
+        with mock.patch.object(search, 'index_documents', side_effect=sqlite3.OperationalError('locked')), \
+                self.captureOnCommitCallbacks(execute=True):
+            questions.save_to_bank('backend engineer', [{'question': 'What is an index?', 'answer': 'A lookup.'}])
+        self.assertEqual(InterviewQuestion.objects.filter(normalized_role='backend engineer').count(), 1)
+
+    def test_empty_llm_answer_keeps_the_banked_questions(self):
+        from .utils import questions
+
+        with override_settings(SEARCH_INDEX_PATH=self.index_path), self.captureOnCommitCallbacks(execute=True):
+            questions.save_to_bank('backend engineer', [{'question': 'What is an index?', 'answer': 'A lookup.'}])
+            questions.save_to_bank('backend engineer', [])
+            questions.save_to_bank('backend engineer', ['not a question', None])
+        self.assertEqual(InterviewQuestion.objects.filter(normalized_role='backend engineer').count(), 1)
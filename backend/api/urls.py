@@ -1,11 +1,25 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
-    RegisterView, LoginView, AnalyzeVideoAPIView,
-    UserAnalysesView, AnalysisDetailView, UserProfileView,
-    search_interview_questions
+    RegisterView, LoginView, AnalyzeVideoAPIView, AnalysisBatchView, AnalysisBatchDetailView,
+    UserAnalysesView, AnalysisDetailView, AnalysisStatusView, AnalysisCacheStatsView,
+    UploadInitView, UploadSessionView, UploadChunkView, UploadFinalizeView,
+    UserProfileView, SearchView,
+    analysis_events, search_interview_questions
 )
 
+if settings.API_ASYNC_VIEWS:
+    # Non-blocking versions of the I/O-bound endpoints for ASGI deployments.
+    from . import async_views
+    profile_view = async_views.user_profile
+    analyses_view = async_views.user_analyses
+    questions_view = async_views.search_interview_questions
+else:
+    profile_view = UserProfileView.as_view()
+    analyses_view = UserAnalysesView.as_view()
+    questions_view = search_interview_questions
+
 urlpatterns = [
     # Authentication endpoints
     path('register/', RegisterView.as_view(), name='register'),
@@ -13,13 +27,28 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
     # Profile endpoint
-    path('profile/', UserProfileView.as_view(), name='user-profile'),
+    path('profile/', profile_view, name='user-profile'),
 
     # Analysis endpoints
     path('analyze/', AnalyzeVideoAPIView.as_view(), name='analyze-video'),
-    path('analyses/', UserAnalysesView.as_view(), name='user-analyses'),
+    path('analyses/', analyses_view, name='user-analyses'),
     path('analyses/<int:pk>/', AnalysisDetailView.as_view(), name='analysis-detail'),
+    path('analyses/<int:pk>/status/', AnalysisStatusView.as_view(), name='analysis-status'),
+    path('analyses/<int:pk>/events/', analysis_events, name='analysis-events'),
+    # Many recordings in one submission
+    path('batches/', AnalysisBatchView.as_view(), name='analysis-batches'),
+    path('batches/<int:pk>/', AnalysisBatchDetailView.as_view(), name='analysis-batch-detail'),
+    # Resumable chunked upload endpoints
+    path('uploads/', UploadInitView.as_view(), name='upload-init'),
+    path('uploads/<uuid:pk>/', UploadSessionView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:pk>/chunks/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('uploads/<uuid:pk>/finalize/', UploadFinalizeView.as_view(), name='upload-finalize'),
+
+    path('analysis-cache/stats/', AnalysisCacheStatsView.as_view(), name='analysis-cache-stats'),
+
+    # Search over transcripts and the question bank
+    path('search/', SearchView.as_view(), name='search'),
 
     # Interview questions endpoint
-    path('interview-questions/search/', search_interview_questions, name='search-interview-questions'),
+    path('interview-questions/search/', questions_view, name='search-interview-questions'),
 ]
@@ -1,36 +1,103 @@
-import whisper
 import ffmpeg
-from transformers import pipeline
-import uuid, os
+import os
+import re
+import wave
+import numpy as np
+from django.conf import settings
+from . import inference, vad
+from .registry import get_whisper_model, get_sentiment_model, get_emotion_model, get_text_tokenizer
 
-whisper_model = whisper.load_model("base")
-sentiment_model = pipeline("sentiment-analysis")
-emotion_model = pipeline("text-classification", model="j-hartmann/emotion-english-distilroberta-base", top_k=None)
+SAMPLE_RATE = 16000
+NO_AUDIO_MESSAGE = "No audio stream found in the uploaded video. Please upload a video with audio."
 
-def extract_audio(video_path):
-    audio_path = "temp.wav"
+def _audio_error(e):
+    error_message = e.stderr.decode()
+    if 'Output file does not contain any stream' in error_message or 'Invalid argument' in error_message:
+        return Exception(NO_AUDIO_MESSAGE)
+    return Exception(f"Error extracting audio: {error_message}")
+
+def _with_rendition(stream, output, rendition):
+    """
+    Add ``rendition`` (an output path and ffmpeg options, see
+    storage.audio_rendition) as a second output of the same ffmpeg run, so
+    the stored audio costs no extra decode of the source.
+    """
+    if rendition is None:
+        return output
+    path, options = rendition
+    return ffmpeg.merge_outputs(output, stream.output(path, vn=None, **options))
+
+def extract_audio(video_path, output_dir, rendition=None):
+    audio_path = os.path.join(output_dir, "audio.wav")
     try:
+        stream = ffmpeg.input(video_path)
+        output = stream.output(audio_path, format='wav', acodec='pcm_s16le', ac=1, ar='16k')
         (
-            ffmpeg
-            .input(video_path)
-            .output(audio_path, format='wav', acodec='pcm_s16le', ac=1, ar='16k')
+            _with_rendition(stream, output, rendition)
             .overwrite_output()
             .run(capture_stdout=True, capture_stderr=True)
         )
         if not os.path.exists(audio_path):
-            raise Exception("No audio stream found in the uploaded video. Please upload a video with audio.")
+            raise Exception(NO_AUDIO_MESSAGE)
         return audio_path
     except ffmpeg.Error as e:
-        error_message = e.stderr.decode()
-        if 'Output file does not contain any stream' in error_message or 'Invalid argument' in error_message:
-            raise Exception("No audio stream found in the uploaded video. Please upload a video with audio.")
-        raise Exception(f"Error extracting audio: {error_message}")
+        raise _audio_error(e)
 
-def transcribe_whisper(audio_path):
-    result = whisper_model.transcribe(audio_path)
+def load_audio(video_path, rendition=None):
+    """
+    Decode the audio track into a 16 kHz mono float32 array in memory.
+    ffmpeg writes raw PCM to a pipe, so nothing touches disk and Whisper can
+    take the array directly instead of spawning its own ffmpeg to re-read a WAV.
+    """
+    try:
+        stream = ffmpeg.input(video_path)
+        output = stream.output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=SAMPLE_RATE)
+        out, _ = (
+            _with_rendition(stream, output, rendition)
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        raise _audio_error(e)
+    if not out:
+        raise Exception(NO_AUDIO_MESSAGE)
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def transcribe_whisper(audio, model=None):
+    """Transcribe a WAV path or a 16 kHz float32 array from load_audio, with the ``model`` tier."""
+    result = get_whisper_model(model).transcribe(audio)
     return result['text'], result['segments']
 
-def get_pause_analytics(segments):
+def read_wav(audio_path):
+    """Load a 16-bit PCM WAV written by extract_audio as a float32 array."""
+    with wave.open(audio_path, 'rb') as wav:
+        frames = wav.readframes(wav.getnframes())
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+
+def transcribe_speech(audio, speech_map, model=None):
+    """
+    Transcribe only the speech regions found by vad.detect_speech. The regions
+    are stitched into one shorter buffer for Whisper and the resulting segment
+    timestamps are mapped back onto the original recording.
+    """
+    if not speech_map['speech']:
+        return "", []
+    compacted, offsets = vad.compact(audio, speech_map['speech'], SAMPLE_RATE)
+    transcript, segments = transcribe_whisper(compacted, model)
+    return transcript, vad.remap_segments(segments, offsets)
+
+def get_pause_analytics(segments, silences=None):
+    """
+    Pause statistics for a recording. When the VAD silence map is available the
+    pauses are the measured silences; otherwise they are the gaps between
+    Whisper segments.
+    """
+    if silences is not None:
+        pauses = [round(end - start, 2) for start, end in silences if end - start > 0.5]
+        total_pauses = len(pauses)
+        avg_pause = round(sum(pauses) / total_pauses, 2) if pauses else 0
+        return {"total_pauses": total_pauses, "avg_pause": avg_pause, "pauses": pauses}
+
     pauses = []
     for i in range(1, len(segments)):
         prev_end = segments[i - 1].get('end')
@@ -43,8 +110,115 @@ def get_pause_analytics(segments):
     avg_pause = round(sum(pauses) / total_pauses, 2) if pauses else 0
     return {"total_pauses": total_pauses, "avg_pause": avg_pause, "pauses": pauses}
 
-def analyze_text(text):
-    sentiment = sentiment_model(text[:512])
-    emotions = emotion_model(text[:512])
-    emotion_scores = {e['label']: e['score'] for e in emotions[0]}
-    return sentiment[0], emotion_scores
+def _pseudo_segments(text):
+    """Split a transcript without timestamps into sentence-sized pieces."""
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    return [{'text': sentence, 'start': None, 'end': None} for sentence in sentences if sentence]
+
+def build_windows(text, segments, tokenizer, max_tokens):
+    """
+    Group consecutive Whisper segments into windows of at most ``max_tokens``
+    tokens. A single segment longer than that becomes its own window and is
+    truncated by the pipeline.
+    """
+    pieces = [seg for seg in (segments or []) if seg.get('text', '').strip()] or _pseudo_segments(text)
+    if not pieces:
+        return []
+    token_counts = [len(ids) for ids in tokenizer(
+        [piece['text'].strip() for piece in pieces], add_special_tokens=False
+    )['input_ids']]
+
+    windows = []
+    current = None
+    for piece, tokens in zip(pieces, token_counts):
+        if current is not None and current['tokens'] + tokens <= max_tokens:
+            current['text'] += ' ' + piece['text'].strip()
+            current['tokens'] += tokens
+            current['end'] = piece.get('end')
+            continue
+        current = {
+            'text': piece['text'].strip(),
+            'tokens': tokens,
+            'start': piece.get('start'),
+            'end': piece.get('end'),
+        }
+        windows.append(current)
+    return windows
+
+def _weighted_mean(distributions, weights):
+    labels = sorted({label for scores in distributions for label in scores})
+    matrix = np.array([[scores.get(label, 0.0) for label in labels] for scores in distributions])
+    means = weights @ matrix / weights.sum()
+    return dict(zip(labels, means.tolist()))
+
+def _summarize_windows(windows, sentiments, emotions):
+    if not windows:
+        return {}, {}, []
+    weights = np.array([max(window['tokens'], 1) for window in windows], dtype=np.float64)
+    sentiment_means = _weighted_mean(sentiments, weights)
+    label = max(sentiment_means, key=sentiment_means.get)
+    sentiment = {'label': label, 'score': sentiment_means[label]}
+    emotion_scores = _weighted_mean(emotions, weights)
+
+    timeline = []
+    for window, window_sentiment, window_emotions in zip(windows, sentiments, emotions):
+        window_label = max(window_sentiment, key=window_sentiment.get)
+        timeline.append({
+            'start': window['start'],
+            'end': window['end'],
+            'sentiment': {'label': window_label, 'score': round(window_sentiment[window_label], 4)},
+            'emotions': {k: round(v, 4) for k, v in window_emotions.items()},
+        })
+    return sentiment, emotion_scores, timeline
+
+def analyze_texts(items):
+    """
+    analyze_text for several transcripts at once, given as (text, segments)
+    pairs. The windows of all transcripts go through each model together,
+    longest first, so batches are full and each one is padded only to
+    windows of similar length. Returns one result per item, in order.
+    """
+    shared = settings.ANALYSIS_INFERENCE['BACKEND'] != 'local'
+    tokenizer = get_text_tokenizer() if shared else get_sentiment_model().tokenizer
+    windows = [
+        build_windows(text, segments, tokenizer, settings.ANALYSIS_TEXT_WINDOW_TOKENS)
+        for text, segments in items
+    ]
+    flat = [window for item_windows in windows for window in item_windows]
+    if not flat:
+        return [({}, {}, []) for _ in items]
+
+    order = sorted(range(len(flat)), key=lambda i: -flat[i]['tokens'])
+    texts = [flat[i]['text'] for i in order]
+    if shared:
+        # Batched with the windows of other analyses by the micro-batcher or inference server.
+        sentiment_scores = inference.classify('sentiment', texts)
+        emotion_scores = inference.classify('emotion', texts)
+    else:
+        batch_size = settings.ANALYSIS_TEXT_BATCH_SIZE
+        sentiment_scores = get_sentiment_model()(texts, top_k=None, truncation=True, batch_size=batch_size)
+        emotion_scores = get_emotion_model()(texts, top_k=None, truncation=True, batch_size=batch_size)
+    sentiments, emotions = [None] * len(flat), [None] * len(flat)
+    for i, scores in zip(order, sentiment_scores):
+        sentiments[i] = {e['label']: e['score'] for e in scores}
+    for i, scores in zip(order, emotion_scores):
+        emotions[i] = {e['label']: e['score'] for e in scores}
+
+    results, offset = [], 0
+    for item_windows in windows:
+        end = offset + len(item_windows)
+        results.append(_summarize_windows(item_windows, sentiments[offset:end], emotions[offset:end]))
+        offset = end
+    return results
+
+def analyze_text(text, segments=None):
+    """
+    Score sentiment and emotions over the whole transcript. The text is split
+    into token-bounded windows aligned to Whisper segments, both pipelines run
+    over all windows in batches, and the per-window scores are averaged with
+    each window weighted by its token count.
+
+    Returns the overall sentiment ({'label', 'score'}), the overall emotion
+    scores, and a per-window timeline.
+    """
+    return analyze_texts([(text, segments)])[0]
@@ -0,0 +1,126 @@
+"""
+Batch submissions: many recordings queued as one AnalysisBatch.
+
+Items are ordinary analyses with a ``batch`` foreign key, so they go through
+the same queue, status endpoints and SSE events as single uploads. Workers
+claim queued items of a batch in groups (see jobs.claim_group) and run
+their text inference together.
+"""
+import functools
+import os
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import AnalysisBatch, InterviewAnalysis
+from . import storage
+from .jobs import enqueue
+
+TERMINAL_STATUSES = storage.TERMINAL_STATUSES
+
+
+def is_media(name):
+    base = os.path.basename(name)
+    return not base.startswith('.') and os.path.splitext(base)[1].lower() in settings.ANALYSIS_BATCH_EXTENSIONS
+
+
+def candidate_name(name):
+    return os.path.splitext(os.path.basename(name))[0] or 'Candidate'
+
+
+def _archive_members(archive):
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise ValueError("archive is not a valid zip file")
+    members = [
+        info for info in zf.infolist()
+        if not info.is_dir() and '__MACOSX/' not in info.filename and is_media(info.filename)
+    ]
+    # Members cannot decompress past their declared size, so this bounds what gets written.
+    if sum(info.file_size for info in members) > settings.ANALYSIS_BATCH_MAX_BYTES:
+        raise ValueError("archive is too large")
+    return zf, members
+
+
+def create_batch(user, files=(), archive=None, name='', quality=InterviewAnalysis.Quality.BALANCED):
+    """
+    Store ``files`` (uploads or other Django Files) and the recordings inside
+    the zip ``archive``, and queue one analysis per recording with the
+    Whisper ``quality`` hint. Raises
+    ValueError for an empty, oversized or unreadable submission.
+    """
+    files = list(files)
+    zf, members = _archive_members(archive) if archive is not None else (None, [])
+    count = len(files) + len(members)
+    if not count:
+        raise ValueError("No recordings found")
+    if count > settings.ANALYSIS_BATCH_MAX_ITEMS:
+        raise ValueError(f"A batch holds at most {settings.ANALYSIS_BATCH_MAX_ITEMS} recordings")
+
+    # Written outside the transaction; blobs of a failed submission are garbage-collected.
+    stored = [(candidate_name(f.name), storage.put(f)) for f in files]
+    for info in members:
+        with zf.open(info) as member:
+            upload = File(member, name=os.path.basename(info.filename))
+            upload.size = info.file_size
+            stored.append((candidate_name(info.filename), storage.put(upload)))
+
+    with transaction.atomic():
+        batch = AnalysisBatch.objects.create(user=user, name=name)
+        for candidate, blob in stored:
+            analysis = InterviewAnalysis.objects.create(
+                user=user, batch=batch, candidate_name=candidate,
+                video_file=blob.name, media=blob, content_hash=blob.sha256, quality=quality,
+            )
+            transaction.on_commit(functools.partial(enqueue, analysis))
+    return batch
+
+
+def summary(batch):
+    """Per-item status of a batch plus its aggregate throughput so far."""
+    items = list(
+        batch.analyses.order_by('id').values(
+            'id', 'candidate_name', 'status', 'stage', 'interview_score', 'error', 'completed_at', 'metrics'
+        )
+    )
+    counts = {status: 0 for status in InterviewAnalysis.Status.values}
+    for item in items:
+        counts[item['status']] += 1
+
+    finished = [item for item in items if item['status'] in TERMINAL_STATUSES]
+    done = len(finished) == len(items)
+    end = max((item['completed_at'] for item in finished), default=None) if done else timezone.now()
+    elapsed = max((end - batch.created_at).total_seconds(), 1e-6) if end else 0.0
+    completed = [item for item in items if item['status'] == InterviewAnalysis.Status.COMPLETED]
+    audio_seconds = sum((item['metrics'] or {}).get('audio_seconds') or 0.0 for item in completed)
+    processing = [(item['metrics'] or {}).get('total_seconds') for item in completed]
+    processing = [seconds for seconds in processing if seconds is not None]
+
+    if done:
+        state = 'completed'
+    elif counts[InterviewAnalysis.Status.QUEUED] == len(items):
+        state = 'queued'
+    else:
+        state = 'processing'
+    return {
+        'id': batch.pk,
+        'name': batch.name,
+        'status': state,
+        'created_at': batch.created_at,
+        'counts': counts,
+        'throughput': {
+            'elapsed_seconds': round(elapsed, 3),
+            'recordings_per_minute': round(len(completed) / elapsed * 60, 3) if elapsed else 0.0,
+            'audio_seconds': round(audio_seconds, 3),
+            'audio_seconds_per_second': round(audio_seconds / elapsed, 3) if elapsed else 0.0,
+            'mean_processing_seconds': round(sum(processing) / len(processing), 3) if processing else None,
+        },
+        'items': [
+            {key: item[key] for key in ('id', 'candidate_name', 'status', 'stage', 'interview_score', 'error')}
+            for item in items
+        ],
+    }
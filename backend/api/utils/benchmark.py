@@ -0,0 +1,103 @@
+"""Helpers shared by the ``bench_*`` management commands."""
+import functools
+import multiprocessing
+import resource
+import subprocess
+import sys
+import time
+
+import ffmpeg
+
+
+def _peak_rss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _isolated_child(conn, func, args):
+    import django
+
+    django.setup()
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        error = None
+    except Exception as e:
+        result, error = None, str(e)
+    conn.send({
+        'wall_time': time.perf_counter() - start,
+        'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF),
+        'children_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        'result': result,
+        'error': error,
+    })
+    conn.close()
+
+
+def run_isolated(func, *args):
+    """
+    Run ``func(*args)`` in a fresh interpreter and report its wall time and
+    peak RSS (for the process and for any ffmpeg children it spawned).
+    ``func`` must be importable at module level and return something picklable.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_isolated_child, args=(child_conn, func, args))
+    process.start()
+    child_conn.close()
+    stats = parent_conn.recv()
+    process.join()
+    return stats
+
+
+# Read by flite in a loop to give Whisper and the text models real words to chew on.
+SPEECH_TEXT = (
+    "I led the migration of our billing service to a new database. "
+    "It was a difficult project and the deadline was tight, but the team stayed calm. "
+    "I am proud of how we tested every step and I learned a lot about planning."
+)
+
+
+@functools.lru_cache(maxsize=None)
+def has_flite():
+    """Whether the local ffmpeg was built with the flite speech synthesis filter."""
+    try:
+        filters = subprocess.run(['ffmpeg', '-hide_banner', '-filters'], capture_output=True, text=True).stdout
+    except OSError:
+        return False
+    return any(line.split()[1:2] == ['flite'] for line in filters.splitlines())
+
+
+def _audio_fixture(duration, frequency, speech, pause_every):
+    if speech and has_flite():
+        # Each pass of the text is followed by a one-second pause, looped to length.
+        audio = (
+            ffmpeg.input(f"flite=text='{SPEECH_TEXT}'", f='lavfi')
+            .filter('apad', pad_dur=1)
+            .filter('aloop', loop=-1, size=2 ** 31 - 1)
+            .filter('atrim', duration=duration)
+        )
+    else:
+        audio = ffmpeg.input(f'sine=frequency={frequency}:duration={duration}', f='lavfi')
+        if pause_every:
+            # Silence the last second of every period so pause analytics has work to do.
+            audio = audio.filter('volume', volume=0, enable=f'gte(mod(t,{pause_every}),{pause_every - 1})')
+    return audio
+
+
+def make_test_video(path, duration, frequency=440, speech=False, pause_every=None):
+    """
+    Render a small-resolution video with an audio track of ``duration``
+    seconds: synthesized speech when ``speech`` is set and ffmpeg has flite,
+    otherwise a sine tone, muted for one second every ``pause_every`` seconds.
+    """
+    video = ffmpeg.input(f'testsrc=size=320x240:rate=15:duration={duration}', f='lavfi')
+    audio = _audio_fixture(duration, frequency, speech, pause_every)
+    (
+        ffmpeg
+        .output(video, audio, path, vcodec='libx264', preset='ultrafast', acodec='aac', shortest=None)
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return path
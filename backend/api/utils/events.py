@@ -0,0 +1,196 @@
+"""
+Progress events for in-flight analyses.
+
+Workers append AnalysisEvent rows (stage changes, batches of freshly
+transcribed segments, the final status) as the pipeline runs; the SSE view
+tails them with the async ORM, so a connected client costs no thread while
+it waits. Using the table as the channel means the worker and the web
+process need nothing in common but the database, and a client that
+reconnects with ``Last-Event-ID`` resumes where it left off.
+
+Events are only needed while a job runs and shortly after, so prune()
+(``manage.py prune_analysis_events``) deletes them once the analysis has
+been finished for ANALYSIS_EVENTS_RETENTION seconds; a late client then gets
+the final status from the analysis row.
+
+Under WSGI Django would buffer an async iterator until it is exhausted, so
+WSGI deployments get stream_sync, which polls with blocking queries.
+
+EventSource cannot send an Authorization header, so the status and upload
+responses hand out an ``events_url`` carrying a stream_token: signed, bound
+to one analysis and short-lived, so a copy in an access or proxy log is not
+a usable API credential.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from ..models import AnalysisEvent, InterviewAnalysis
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {InterviewAnalysis.Status.COMPLETED, InterviewAnalysis.Status.FAILED}
+TOKEN_SALT = 'api.analysis-events'
+
+
+def emit(analysis, kind, **data):
+    # Progress reporting must never fail the analysis itself.
+    try:
+        AnalysisEvent.objects.create(analysis_id=analysis.pk, kind=kind, data=data)
+    except Exception as e:
+        logger.exception("Could not record %s event for analysis %s: %s", kind, analysis.pk, e)
+
+
+def emit_segments(analysis, segments):
+    segments = [
+        {'start': seg.get('start'), 'end': seg.get('end'), 'text': seg.get('text', '')}
+        for seg in segments if seg.get('text', '').strip()
+    ]
+    if segments:
+        emit(analysis, AnalysisEvent.Kind.SEGMENTS, segments=segments)
+
+
+def format_event(kind, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {kind}", f"data: {json.dumps(data, default=str)}"]
+    return '\n'.join(lines) + '\n\n'
+
+
+def _opening(analysis, has_status_event):
+    messages = [
+        f"retry: {int(settings.ANALYSIS_EVENTS_POLL_INTERVAL * 4000)}\n\n",
+        format_event('snapshot', {'status': analysis.status, 'stage': analysis.stage}),
+    ]
+    # Finished before its events existed, or they were pruned: there is nothing to wait for.
+    done = analysis.status in TERMINAL_STATUSES and not has_status_event
+    if done:
+        messages.append(format_event(AnalysisEvent.Kind.STATUS, {'status': analysis.status, 'error': analysis.error}))
+    return messages, done
+
+
+def _status_events(analysis_id):
+    return AnalysisEvent.objects.filter(analysis_id=analysis_id, kind=AnalysisEvent.Kind.STATUS)
+
+
+class _Tail:
+    """
+    Poll state shared by stream() and stream_sync(), which differ only in how
+    they run the queries and sleep between polls.
+    """
+    KEEPALIVE = ": keepalive\n\n"
+
+    def __init__(self, analysis_id, last_event_id):
+        self.analysis_id = analysis_id
+        self.last_event_id = last_event_id
+        self.idle = 0.0
+        self.finished = False
+
+    def analysis(self):
+        return InterviewAnalysis.objects.only('status', 'stage', 'error').filter(pk=self.analysis_id)
+
+    def new_events(self):
+        return AnalysisEvent.objects.filter(analysis_id=self.analysis_id, id__gt=self.last_event_id)
+
+    def format(self, event):
+        self.last_event_id = event.pk
+        self.idle = 0.0
+        self.finished = self.finished or event.kind == AnalysisEvent.Kind.STATUS
+        return format_event(event.kind, event.data, event.pk)
+
+    def waited(self):
+        """Count one poll interval of silence; True when a keepalive (and liveness check) is due."""
+        self.idle += settings.ANALYSIS_EVENTS_POLL_INTERVAL
+        if self.idle < settings.ANALYSIS_EVENTS_KEEPALIVE:
+            return False
+        self.idle = 0.0
+        return True
+
+
+async def stream(analysis_id, last_event_id=0):
+    """Yield SSE messages for an analysis until it completes or fails."""
+    tail = _Tail(analysis_id, last_event_id)
+    messages, done = _opening(await tail.analysis().aget(), await _status_events(analysis_id).aexists())
+    for message in messages:
+        yield message
+    if done:
+        return
+    while True:
+        async for event in tail.new_events():
+            yield tail.format(event)
+        if tail.finished:
+            return
+        await asyncio.sleep(settings.ANALYSIS_EVENTS_POLL_INTERVAL)
+        if tail.waited():
+            if not await tail.analysis().aexists():
+                return
+            yield tail.KEEPALIVE
+
+
+def stream_sync(analysis_id, last_event_id=0):
+    """stream() for WSGI servers; holds a worker thread for as long as the client listens."""
+    tail = _Tail(analysis_id, last_event_id)
+    messages, done = _opening(tail.analysis().get(), _status_events(analysis_id).exists())
+    yield from messages
+    if done:
+        return
+    while True:
+        for event in tail.new_events():
+            yield tail.format(event)
+        if tail.finished:
+            return
+        time.sleep(settings.ANALYSIS_EVENTS_POLL_INTERVAL)
+        if tail.waited():
+            if not tail.analysis().exists():
+                return
+            yield tail.KEEPALIVE
+
+
+def stream_token(analysis_id, user_id):
+    """A signed token that lets its bearer follow the events of one analysis, and nothing else."""
+    return signing.dumps([analysis_id, user_id], salt=TOKEN_SALT)
+
+
+def events_url(analysis, request):
+    """Absolute URL of the analysis' SSE stream, authorized for the user who requested it."""
+    url = reverse('analysis-events', args=[analysis.pk], request=request)
+    return f"{url}?{urlencode({'stream_token': stream_token(analysis.pk, analysis.user_id)})}"
+
+
+def check_stream_token(token, analysis_id):
+    """The user id a stream token for ``analysis_id`` was issued to, or None if it is invalid or expired."""
+    try:
+        token_analysis_id, user_id = signing.loads(
+            token, salt=TOKEN_SALT, max_age=settings.ANALYSIS_EVENTS_TOKEN_MAX_AGE
+        )
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    return user_id if token_analysis_id == analysis_id else None
+
+
+def prune(retention=None, chunk_size=500):
+    """
+    Delete the events of analyses whose final status event is older than
+    ``retention`` seconds. Returns the number of events deleted.
+    """
+    retention = settings.ANALYSIS_EVENTS_RETENTION if retention is None else retention
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    finished = (
+        AnalysisEvent.objects.filter(kind=AnalysisEvent.Kind.STATUS, created_at__lt=cutoff)
+        .order_by('analysis_id').values_list('analysis_id', flat=True).distinct()
+    )
+    deleted = 0
+    while True:
+        # Ids are fetched first: MySQL cannot delete from a table it is selecting from.
+        analysis_ids = list(finished[:chunk_size])
+        if not analysis_ids:
+            return deleted
+        count, _ = AnalysisEvent.objects.filter(analysis_id__in=analysis_ids).delete()
+        deleted += count
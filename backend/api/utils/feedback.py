@@ -1,14 +1,13 @@
 import json
-import google.generativeai as genai
-import os
+import logging
 from django.conf import settings
+from .llm import get_client
+
+logger = logging.getLogger(__name__)
 
 def generate_feedback(transcript, sentiment_score, emotion_scores, pause_analytics, interview_score):
     """Generates detailed interview feedback using a generative model."""
     try:
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
-        model = genai.GenerativeModel('models/gemini-1.5-flash')
-
         prompt = f"""Analyze the following interview transcript and provide detailed feedback based on the provided analysis data. 
 
 Transcript: {transcript}
@@ -27,10 +26,9 @@ Provide constructive feedback covering:
 5.  Format the feedback as a well-structured paragraph or bullet points for easy reading.
 """
 
-        response = model.generate_content(prompt)
-        return response.text
+        return get_client().generate(prompt, timeout=settings.LLM['FEEDBACK_TIMEOUT'])
 
     except Exception as e:
-        print(f"Error generating feedback with Gemini API: {e}")
+        logger.warning("Error generating feedback with Gemini API: %s", e)
         # Fallback to basic feedback or return an error message
         return "Could not generate detailed feedback at this time. Please try again later."
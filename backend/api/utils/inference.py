@@ -0,0 +1,229 @@
+"""
+Shared sentiment and emotion inference with dynamic micro-batching.
+
+By default every analysis calls its own process' transformer pipelines
+(settings.ANALYSIS_INFERENCE['BACKEND'] = 'local'). With 'batched', threads
+of one process submit their windows to a MicroBatcher, which waits up to
+MAX_WAIT_MS for more requests, runs everything it collected (at most
+MAX_BATCH windows) as one padded call and hands each caller its slice.
+With 'socket', worker processes send their windows over a Unix socket to
+``manage.py run_inference_server``, which feeds them to the same batchers,
+so the models are held once per host instead of once per worker.
+
+The wire format is one JSON object per line in each direction:
+``{"model": "sentiment", "texts": [...]}`` answered by ``{"results": [...]}``
+or ``{"error": "..."}``.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from . import registry
+
+logger = logging.getLogger(__name__)
+
+MODELS = {
+    'sentiment': lambda: registry.get_sentiment_model(),
+    'emotion': lambda: registry.get_emotion_model(),
+}
+
+
+class InferenceError(Exception):
+    pass
+
+
+def score(name, texts, batch_size):
+    """Run the ``name`` pipeline of this process over ``texts``, ``batch_size`` per forward pass."""
+    # Longest first, as in analyzer.analyze_texts, so each forward pass pads to similar lengths.
+    order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+    outputs = MODELS[name]()([texts[i] for i in order], top_k=None, truncation=True, batch_size=batch_size)
+    results = [None] * len(texts)
+    for i, scores in zip(order, outputs):
+        results[i] = scores
+    return results
+
+
+class MicroBatcher:
+    """Collects classification requests from many threads and runs them as shared batches."""
+
+    def __init__(self, name, max_batch=None, max_wait=None):
+        config = settings.ANALYSIS_INFERENCE
+        self.name = name
+        self.max_batch = max_batch or config['MAX_BATCH']
+        self.max_wait = (config['MAX_WAIT_MS'] if max_wait is None else max_wait) / 1000
+        self.requests = queue.Queue()
+        self.batches = 0
+        threading.Thread(target=self._loop, name=f'inference-{name}', daemon=True).start()
+
+    def submit(self, texts):
+        """Queue ``texts`` for the next batch; the Future resolves to one score list per text."""
+        future = Future()
+        if not texts:
+            future.set_result([])
+        else:
+            self.requests.put((list(texts), future))
+        return future
+
+    def classify(self, texts):
+        return self.submit(texts).result()
+
+    def _collect(self):
+        pending = [self.requests.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request[0])
+        return pending
+
+    def _loop(self):
+        while True:
+            pending = self._collect()
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            try:
+                # The collected windows are the batch: one forward pass, unless the last request overshot.
+                scores = score(self.name, texts, batch_size=min(len(texts), self.max_batch))
+            except Exception as e:
+                logger.exception("%s inference over %d windows failed", self.name, len(texts))
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            logger.debug("%s batch %d: %d request(s), %d windows",
+                         self.name, self.batches, len(pending), len(texts))
+            offset = 0
+            for request_texts, future in pending:
+                future.set_result(scores[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(name):
+    with _batchers_lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            if name not in MODELS:
+                raise InferenceError(f"Unknown model {name!r}")
+            batcher = _batchers[name] = MicroBatcher(name)
+        return batcher
+
+
+def start_batchers(max_batch=None, max_wait=None):
+    """Create the batchers of every model up front, overriding the configured limits."""
+    with _batchers_lock:
+        for name in MODELS:
+            if name not in _batchers:
+                _batchers[name] = MicroBatcher(name, max_batch=max_batch, max_wait=max_wait)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                reply = {'results': get_batcher(request['model']).classify(request['texts'])}
+            except Exception as e:
+                reply = {'error': str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b'\n')
+            self.wfile.flush()
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(path=None):
+    """Serve the micro-batched models on the Unix socket ``path`` until interrupted."""
+    path = path or settings.ANALYSIS_INFERENCE['SOCKET']
+    if os.path.exists(path):
+        os.unlink(path)
+    with InferenceServer(path, _Handler) as server:
+        logger.info("Inference server listening on %s", path)
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
+
+
+class InferenceClient:
+    """Talks to run_inference_server; one connection per thread, reopened after a failure."""
+
+    def __init__(self, path=None, timeout=None):
+        config = settings.ANALYSIS_INFERENCE
+        self.path = path or config['SOCKET']
+        self.timeout = config['TIMEOUT'] if timeout is None else timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            conn = self.local.conn = (sock, sock.makefile('rb'))
+        return conn
+
+    def _close(self):
+        sock, reader = self.local.__dict__.pop('conn', (None, None))
+        if sock is not None:
+            reader.close()
+            sock.close()
+
+    def classify(self, name, texts):
+        if not texts:
+            return []
+        request = json.dumps({'model': name, 'texts': list(texts)}).encode() + b'\n'
+        # A connection the server dropped since the last call fails on first use; retry once on a new one.
+        for attempt in range(2):
+            try:
+                sock, reader = self._connection()
+                sock.sendall(request)
+                line = reader.readline()
+                if not line:
+                    raise ConnectionError("inference server closed the connection")
+                break
+            except OSError as e:
+                self._close()
+                if attempt:
+                    raise InferenceError(f"Inference server at {self.path} unavailable: {e}") from e
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise InferenceError(reply['error'])
+        return reply['results']
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient()
+        return _client
+
+
+def classify(name, texts):
+    """Score ``texts`` with the 'sentiment' or 'emotion' model through the shared backend."""
+    if settings.ANALYSIS_INFERENCE['BACKEND'] == 'socket':
+        return get_client().classify(name, texts)
+    return get_batcher(name).classify(texts)
@@ -0,0 +1,256 @@
+"""Database-backed job queue for interview analyses.
+
+The ``InterviewAnalysis`` table doubles as the broker: a row in the
+``queued`` state is a pending job, and workers claim it with a conditional
+UPDATE so two workers can never pick up the same analysis.  This keeps the
+pipeline free of external services (no Redis/Celery) while still letting it
+run outside the web process.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..models import AnalysisEvent, InterviewAnalysis
+from . import events
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ANALYSIS_THREAD_WORKERS,
+                thread_name_prefix='analysis',
+            )
+        return _executor
+
+
+def enqueue(analysis):
+    """Hand a queued analysis over to the configured job backend."""
+    if settings.ANALYSIS_JOB_BACKEND == 'thread':
+        _get_executor().submit(_run_in_thread, analysis.pk)
+    # With the 'worker' backend the queued row itself is the message;
+    # `manage.py run_analysis_worker` picks it up.
+
+
+def claim(pk):
+    """Move a queued analysis to processing. Returns it, or None if already taken."""
+    claimed = InterviewAnalysis.objects.filter(
+        pk=pk, status=InterviewAnalysis.Status.QUEUED
+    ).update(status=InterviewAnalysis.Status.PROCESSING, started_at=timezone.now(), updated_at=timezone.now())
+    if not claimed:
+        return None
+    return InterviewAnalysis.objects.get(pk=pk)
+
+
+def claim_next(batch_id=None):
+    """Claim the oldest queued analysis (of a batch, if given), or return None when there is none."""
+    queued = InterviewAnalysis.objects.ready()
+    if batch_id is not None:
+        queued = queued.filter(batch_id=batch_id)
+    while True:
+        pk = (
+            queued
+            .order_by('created_at')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if pk is None:
+            return None
+        analysis = claim(pk)
+        if analysis is not None:
+            return analysis
+        # Another worker won the race for this row; try the next one.
+
+
+def claim_group(limit=None, batch_id=None):
+    """
+    Claim the oldest queued analysis and, if it belongs to a batch, up to
+    ANALYSIS_BATCH_GROUP_SIZE - 1 more queued items of the same batch, so they
+    can be processed together. Returns an empty list when the queue is empty.
+    """
+    limit = settings.ANALYSIS_BATCH_GROUP_SIZE if limit is None else min(limit, settings.ANALYSIS_BATCH_GROUP_SIZE)
+    analysis = claim_next(batch_id)
+    if analysis is None:
+        return []
+    return [analysis] + _claim_batch_items(analysis, limit - 1)
+
+
+def _claim_batch_items(analysis, limit):
+    if analysis.batch_id is None or limit <= 0:
+        return []
+    pks = list(
+        InterviewAnalysis.objects
+        .filter(batch_id=analysis.batch_id, status=InterviewAnalysis.Status.QUEUED)
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    return [peer for peer in map(claim, pks) if peer is not None]
+
+
+def claim_refinement():
+    """
+    Claim the oldest completed analysis waiting for a refinement pass (see
+    routing), or return None. Only called when nothing is queued.
+    """
+    pending = InterviewAnalysis.objects.filter(refinement=InterviewAnalysis.Refinement.PENDING)
+    while True:
+        pk = pending.order_by('completed_at').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        claimed = InterviewAnalysis.objects.filter(
+            pk=pk, refinement=InterviewAnalysis.Refinement.PENDING
+        ).update(refinement=InterviewAnalysis.Refinement.RUNNING, updated_at=timezone.now())
+        if claimed:
+            return InterviewAnalysis.objects.get(pk=pk)
+
+
+def requeue_stale(timeout=None):
+    """
+    Put analyses and refinements abandoned by a crashed worker back on the
+    queue: those whose heartbeat (``updated_at``) stopped ``timeout`` seconds
+    ago. A worker that is still running a job keeps its heartbeat fresh.
+    """
+    timeout = settings.ANALYSIS_JOB_TIMEOUT if timeout is None else timeout
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    InterviewAnalysis.objects.filter(
+        refinement=InterviewAnalysis.Refinement.RUNNING, updated_at__lt=cutoff
+    ).update(refinement=InterviewAnalysis.Refinement.PENDING)
+    return InterviewAnalysis.objects.filter(
+        status=InterviewAnalysis.Status.PROCESSING, updated_at__lt=cutoff
+    ).update(status=InterviewAnalysis.Status.QUEUED, stage=InterviewAnalysis.Stage.QUEUED)
+
+
+def _beat(pks, stop):
+    try:
+        while not stop.wait(settings.ANALYSIS_JOB_HEARTBEAT):
+            try:
+                InterviewAnalysis.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+            except Exception as e:
+                logger.warning("Heartbeat for analyses %s failed: %s", pks, e)
+    finally:
+        close_old_connections()
+
+
+@contextmanager
+def heartbeat(analyses):
+    """
+    Bump ``updated_at`` of the claimed ``analyses`` every ANALYSIS_JOB_HEARTBEAT
+    seconds while the block runs, so requeue_stale can tell a long job from
+    one whose worker died.
+    """
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=_beat, args=([analysis.pk for analysis in analyses], stop), name='analysis-heartbeat', daemon=True
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(analysis):
+    """Run the analysis pipeline for a claimed job, recording any failure on the row."""
+    from .pipeline import process_analysis
+
+    try:
+        with heartbeat([analysis]):
+            process_analysis(analysis)
+    except Exception as e:
+        _fail(analysis, e)
+
+
+def run_jobs(analyses):
+    """Run a group of claimed jobs from claim_group; batch items share their text inference."""
+    from .pipeline import process_analyses
+
+    if len(analyses) == 1:
+        run_job(analyses[0])
+        return
+    try:
+        with heartbeat(analyses):
+            failed = process_analyses(analyses)
+    except Exception as e:
+        failed = [(analysis, e) for analysis in analyses if analysis.status != InterviewAnalysis.Status.COMPLETED]
+    for analysis, e in failed:
+        _fail(analysis, e)
+
+
+def run_refinement(analysis):
+    """Re-transcribe a claimed refinement; on failure the first-pass results stay."""
+    from .pipeline import refine_analysis
+
+    try:
+        with heartbeat([analysis]):
+            refine_analysis(analysis)
+    except Exception as e:
+        logger.error("Refinement of analysis %s failed: %s", analysis.pk, e, exc_info=e)
+        InterviewAnalysis.objects.filter(pk=analysis.pk).update(refinement=InterviewAnalysis.Refinement.FAILED)
+
+
+def _fail(analysis, e):
+    logger.error("Analysis %s failed: %s", analysis.pk, e, exc_info=e)
+    InterviewAnalysis.objects.filter(pk=analysis.pk).update(
+        status=InterviewAnalysis.Status.FAILED,
+        error=str(e),
+        metrics=analysis.metrics,
+        completed_at=timezone.now(),
+    )
+    events.emit(analysis, AnalysisEvent.Kind.STATUS, status=InterviewAnalysis.Status.FAILED, error=str(e))
+
+
+def _run_in_thread(pk):
+    close_old_connections()
+    try:
+        analysis = claim(pk)
+        if analysis is not None:
+            run_jobs([analysis] + _claim_batch_items(analysis, settings.ANALYSIS_BATCH_GROUP_SIZE - 1))
+        # The thread backend has no idle loop, so refine while nothing else is waiting.
+        while not InterviewAnalysis.objects.ready().exists():
+            refinement = claim_refinement()
+            if refinement is None:
+                break
+            run_refinement(refinement)
+    finally:
+        close_old_connections()
+
+
+def run_worker(poll_interval=None, max_jobs=None):
+    """Process queued analyses until interrupted (or until ``max_jobs`` are done)."""
+    poll_interval = settings.ANALYSIS_WORKER_POLL_INTERVAL if poll_interval is None else poll_interval
+    processed = 0
+    next_sweep = 0.0
+    while max_jobs is None or processed < max_jobs:
+        close_old_connections()
+        if time.monotonic() >= next_sweep:
+            # Any live worker recovers jobs of one that died, without waiting for a restart.
+            requeued = requeue_stale()
+            if requeued:
+                logger.warning("Requeued %d abandoned analyses", requeued)
+            next_sweep = time.monotonic() + settings.ANALYSIS_JOB_TIMEOUT / 2
+        group = claim_group(limit=None if max_jobs is None else max_jobs - processed)
+        if not group:
+            # Refinements only use capacity the queue leaves idle.
+            refinement = claim_refinement()
+            if refinement is not None:
+                run_refinement(refinement)
+            else:
+                time.sleep(poll_interval)
+            continue
+        run_jobs(group)
+        processed += len(group)
+    return processed
@@ -0,0 +1,222 @@
+"""
+Shared client for LLM text generation.
+
+One client per process reuses the configured backend (and its connections),
+bounds the number of concurrent calls, enforces a deadline per call that
+covers retries, and caches responses by prompt hash. The backend is chosen by
+settings.LLM['BACKEND']: 'gemini', 'stub' for offline load tests, or the
+dotted path of a custom backend class.
+
+``agenerate`` is the asyncio counterpart for async views: it awaits the
+backend's native async call (or runs a sync-only backend in a worker
+thread) under an asyncio semaphore, so an ASGI process can keep hundreds
+of requests waiting on the LLM without a thread each.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMTimeout(LLMError):
+    pass
+
+
+class GeminiBackend:
+    def __init__(self, config):
+        import google.generativeai as genai
+        from google.api_core import exceptions
+
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        self.genai = genai
+        self.models = {}
+        self.retryable_errors = (
+            exceptions.ServiceUnavailable,
+            exceptions.ResourceExhausted,
+            exceptions.InternalServerError,
+            exceptions.DeadlineExceeded,
+        )
+
+    def _model(self, name):
+        model = self.models.get(name)
+        if model is None:
+            model = self.models[name] = self.genai.GenerativeModel(name)
+        return model
+
+    def generate(self, prompt, model, timeout, json_output=False):
+        generation_config = {'response_mime_type': 'application/json'} if json_output else None
+        response = self._model(model).generate_content(
+            prompt,
+            generation_config=generation_config,
+            request_options={'timeout': timeout},
+        )
+        return response.text
+
+    async def agenerate(self, prompt, model, timeout, json_output=False):
+        generation_config = {'response_mime_type': 'application/json'} if json_output else None
+        response = await self._model(model).generate_content_async(
+            prompt,
+            generation_config=generation_config,
+            request_options={'timeout': timeout},
+        )
+        return response.text
+
+
+class StubBackend:
+    """Canned, deterministic responses with optional simulated latency; no network access."""
+
+    retryable_errors = ()
+
+    def __init__(self, config):
+        self.latency = config.get('STUB_LATENCY', 0.0)
+
+    def generate(self, prompt, model, timeout, json_output=False):
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+        return self.respond(prompt, json_output)
+
+    async def agenerate(self, prompt, model, timeout, json_output=False):
+        if self.latency:
+            await asyncio.sleep(min(self.latency, timeout))
+        return self.respond(prompt, json_output)
+
+    def respond(self, prompt, json_output):
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        if json_output:
+            return json.dumps([
+                {
+                    'role': 'stub',
+                    'category': category,
+                    'difficulty': 'intermediate',
+                    'question': f"Stub {category} question {digest}?",
+                    'answer': "Stub answer generated offline.",
+                }
+                for category in ('technical', 'behavioral', 'problem_solving')
+            ])
+        return f"Stub feedback {digest}: clear structure, steady pacing, keep examples concrete."
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+
+class LLMClient:
+    def __init__(self, config):
+        self.config = config
+        backend_class = BACKENDS.get(config['BACKEND']) or import_string(config['BACKEND'])
+        self.backend = backend_class(config)
+        self.slots = threading.BoundedSemaphore(config['MAX_CONCURRENCY'])
+        # asyncio semaphores belong to one event loop; keep one per loop.
+        self.async_slots = weakref.WeakKeyDictionary()
+
+    def cache_key(self, prompt, model, json_output):
+        digest = hashlib.sha256(f"{model}:{json_output}:{prompt}".encode()).hexdigest()
+        return f"llm:{digest}"
+
+    def generate(self, prompt, json_output=False, timeout=None, model=None, use_cache=True):
+        """
+        Generate text for ``prompt``. Raises LLMTimeout when no answer arrives
+        within ``timeout`` seconds (waiting for a slot and retries included).
+        """
+        model = model or self.config['MODEL']
+        timeout = timeout or self.config['TIMEOUT']
+        key = self.cache_key(prompt, model, json_output)
+        if use_cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        deadline = time.monotonic() + timeout
+        for attempt in range(self.config['MAX_RETRIES'] + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.slots.acquire(timeout=remaining):
+                raise LLMTimeout(f"No LLM response within {timeout}s")
+            try:
+                text = self.backend.generate(prompt, model, deadline - time.monotonic(), json_output)
+                break
+            except self.backend.retryable_errors as e:
+                if attempt == self.config['MAX_RETRIES']:
+                    raise LLMError(str(e)) from e
+            finally:
+                self.slots.release()
+            time.sleep(min(0.5 * 2 ** attempt, max(deadline - time.monotonic(), 0)))
+
+        if use_cache:
+            cache.set(key, text, self.config['CACHE_TTL'])
+        return text
+
+    def _async_slots(self):
+        loop = asyncio.get_running_loop()
+        slots = self.async_slots.get(loop)
+        if slots is None:
+            limit = self.config.get('MAX_ASYNC_CONCURRENCY', self.config['MAX_CONCURRENCY'])
+            slots = self.async_slots[loop] = asyncio.Semaphore(limit)
+        return slots
+
+    async def agenerate(self, prompt, json_output=False, timeout=None, model=None, use_cache=True):
+        """Async ``generate``: same caching, retries and deadline, bounded by an asyncio semaphore."""
+        model = model or self.config['MODEL']
+        timeout = timeout or self.config['TIMEOUT']
+        key = self.cache_key(prompt, model, json_output)
+        if use_cache:
+            cached = await cache.aget(key)
+            if cached is not None:
+                return cached
+
+        backend_call = getattr(self.backend, 'agenerate', None)
+        if backend_call is None:
+            backend_call = sync_to_async(self.backend.generate, thread_sensitive=False)
+        deadline = time.monotonic() + timeout
+
+        async def attempt_all():
+            for attempt in range(self.config['MAX_RETRIES'] + 1):
+                async with self._async_slots():
+                    try:
+                        return await backend_call(prompt, model, deadline - time.monotonic(), json_output)
+                    except self.backend.retryable_errors as e:
+                        if attempt == self.config['MAX_RETRIES']:
+                            raise LLMError(str(e)) from e
+                await asyncio.sleep(min(0.5 * 2 ** attempt, max(deadline - time.monotonic(), 0)))
+
+        try:
+            text = await asyncio.wait_for(attempt_all(), timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeout(f"No LLM response within {timeout}s") from None
+
+        if use_cache:
+            await cache.aset(key, text, self.config['CACHE_TTL'])
+        return text
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide LLM client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(settings.LLM)
+        return _client
+
+
+def reset_client():
+    """Drop the shared client, e.g. after changing settings.LLM in tests."""
+    global _client
+    with _client_lock:
+        _client = None
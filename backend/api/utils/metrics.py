@@ -0,0 +1,134 @@
+"""
+Per-analysis instrumentation.
+
+The pipeline records stage durations and a few derived figures (audio
+length, real-time factor, queue wait, model names) in the analysis'
+``metrics`` JSON field, which is saved together with the results. The
+``/metrics`` endpoint aggregates the most recent rows into Prometheus text
+exposition format, so nothing has to be kept in process memory and every
+worker process contributes.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from ..models import InterviewAnalysis
+from . import result_cache
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'screenlyze'
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+@contextmanager
+def timed(analysis, stage):
+    """Add the wall time of the block to ``analysis.metrics['stages'][stage]``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage(analysis, stage, time.perf_counter() - start)
+
+
+def add_stage(analysis, stage, seconds):
+    stages = analysis.metrics.setdefault('stages', {})
+    stages[stage] = round(stages.get(stage, 0.0) + seconds, 4)
+    logger.debug("Analysis %s: %s took %.2fs", analysis.pk, stage, seconds)
+
+
+def record(analysis, **values):
+    analysis.metrics.update(values)
+
+
+def start(analysis):
+    """Reset the metrics of a freshly claimed analysis and note how long it queued."""
+    analysis.metrics = {
+        'stages': {},
+        'models': {
+            'whisper': settings.ANALYSIS_MODELS['WHISPER_MODEL'],
+            'sentiment': settings.ANALYSIS_MODELS['SENTIMENT_MODEL'],
+            'emotion': settings.ANALYSIS_MODELS['EMOTION_MODEL'],
+            'llm': settings.LLM['MODEL'],
+        },
+    }
+    if analysis.started_at and analysis.created_at:
+        record(analysis, queue_wait_seconds=round((analysis.started_at - analysis.created_at).total_seconds(), 4))
+
+
+def finish(analysis):
+    """Derive totals once the pipeline has run; the caller saves the row."""
+    stages = analysis.metrics.get('stages', {})
+    total = sum(stages.values())
+    record(analysis, total_seconds=round(total, 4))
+    audio_seconds = analysis.metrics.get('audio_seconds')
+    if audio_seconds:
+        media_seconds = stages.get('extract', 0.0) + stages.get('transcribe', 0.0)
+        record(analysis, real_time_factor=round(media_seconds / audio_seconds, 4))
+    logger.info(
+        "Analysis %s finished in %.2fs (stages: %s)", analysis.pk, total,
+        ', '.join(f"{name}={seconds:.2f}s" for name, seconds in stages.items()),
+    )
+
+
+def _summary(lines, name, samples, labels=''):
+    if not samples:
+        return
+    values = np.asarray(samples, dtype=float)
+    for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+        sep = ',' if labels else ''
+        lines.append(f'{name}{{{labels}{sep}quantile="{q}"}} {value:.6g}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {values.sum():.6g}')
+    lines.append(f'{name}_count{suffix} {len(values)}')
+
+
+def render_prometheus(window=None):
+    """Prometheus text exposition of pipeline metrics over the last ``window`` analyses."""
+    window = window or settings.ANALYSIS_METRICS_WINDOW
+    lines = []
+
+    lines += [f'# HELP {PREFIX}_analyses Analyses by job status.', f'# TYPE {PREFIX}_analyses gauge']
+    counts = dict(
+        InterviewAnalysis.objects.order_by().values_list('status').annotate(n=Count('id'))
+    )
+    for status in InterviewAnalysis.Status.values:
+        lines.append(f'{PREFIX}_analyses{{status="{status}"}} {counts.get(status, 0)}')
+
+    recent = list(
+        InterviewAnalysis.objects.filter(status=InterviewAnalysis.Status.COMPLETED)
+        .order_by('-id').values_list('metrics', flat=True)[:window]
+    )
+    stage_samples = {}
+    for metrics in recent:
+        for stage, seconds in (metrics or {}).get('stages', {}).items():
+            stage_samples.setdefault(stage, []).append(seconds)
+
+    name = f'{PREFIX}_analysis_stage_seconds'
+    lines += [f'# HELP {name} Wall time per pipeline stage over recent analyses.', f'# TYPE {name} summary']
+    for stage, samples in sorted(stage_samples.items()):
+        _summary(lines, name, samples, labels=f'stage="{stage}"')
+
+    for key, help_text in [
+        ('total_seconds', 'Pipeline wall time per analysis.'),
+        ('queue_wait_seconds', 'Time between upload and a worker claiming the analysis.'),
+        ('audio_seconds', 'Length of the analyzed audio.'),
+        ('real_time_factor', 'Extraction plus transcription time divided by audio length.'),
+    ]:
+        name = f'{PREFIX}_analysis_{key}'
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} summary']
+        _summary(lines, name, [m[key] for m in recent if m and m.get(key) is not None])
+
+    for key, help_text in [
+        (result_cache.HITS_KEY, 'Analysis result cache hits.'),
+        (result_cache.MISSES_KEY, 'Analysis result cache misses.'),
+    ]:
+        name = f"{PREFIX}_{key.replace(':', '_')}_total"
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {cache.get(key, 0)}']
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,336 @@
+"""The interview analysis pipeline, run by queue workers for a claimed analysis."""
+import functools
+import logging
+import time
+
+import ffmpeg
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import AnalysisEvent, InterviewAnalysis
+from . import events, metrics, result_cache, routing, storage, streaming, vad
+from .analyzer import (
+    SAMPLE_RATE, extract_audio, load_audio, read_wav, transcribe_whisper,
+    transcribe_speech, analyze_texts, get_pause_analytics
+)
+from .feedback import generate_feedback
+from .scratch import scratch_dir
+from .transcription import transcribe_chunked, transcribe_parallel
+from .uploads import hash_file
+
+logger = logging.getLogger(__name__)
+
+
+def set_stage(analysis, stage):
+    """Record the stage an analysis has reached without rewriting the whole row."""
+    analysis.stage = stage
+    InterviewAnalysis.objects.filter(pk=analysis.pk).update(stage=stage, updated_at=timezone.now())
+    events.emit(analysis, AnalysisEvent.Kind.STAGE, stage=stage)
+
+
+def transcribe_video(analysis):
+    """
+    Extract the audio track of the analysis' video and transcribe it. Returns
+    the transcript, the segments and the VAD silence map (None when VAD is off).
+    """
+    video_path = analysis.video_file.path
+    set_stage(analysis, InterviewAnalysis.Stage.EXTRACTING)
+    with scratch_dir(prefix=f"analysis-{analysis.pk}-") as workdir:
+        # In audio-only mode the same ffmpeg run also writes the rendition that replaces the video.
+        rendition = storage.audio_rendition(workdir) if storage.needs_audio_rendition(analysis) else None
+        with metrics.timed(analysis, 'extract'):
+            if settings.ANALYSIS_AUDIO_IN_MEMORY:
+                audio = load_audio(video_path, rendition)
+            else:
+                audio = read_wav(extract_audio(video_path, workdir, rendition))
+        if rendition is not None:
+            with metrics.timed(analysis, 'store_audio'):
+                storage.keep_audio(analysis, rendition[0])
+    audio_seconds = round(len(audio) / SAMPLE_RATE, 3)
+    metrics.record(analysis, audio_seconds=audio_seconds)
+    _route(analysis, audio_seconds)
+
+    set_stage(analysis, InterviewAnalysis.Stage.TRANSCRIBING)
+    return transcribe_audio(analysis, audio, live=settings.ANALYSIS_LIVE_SEGMENTS)
+
+
+def _route(analysis, audio_seconds=None):
+    analysis.whisper_model = routing.choose_tier(analysis.quality, audio_seconds)
+    analysis.metrics.setdefault('models', {})['whisper'] = analysis.whisper_model
+
+
+def transcribe_audio(analysis, audio, live=False):
+    """
+    Transcribe decoded audio with the analysis' Whisper tier. Returns the
+    transcript, the segments and the VAD silence map (None when VAD is off).
+    With ``live`` set, segments are published as progress events as they come.
+    """
+    model = analysis.whisper_model or None
+    workers = settings.ANALYSIS_TRANSCRIBE_WORKERS
+    if not settings.ANALYSIS_VAD_ENABLED and workers <= 1 and not live:
+        with metrics.timed(analysis, 'transcribe'):
+            transcript, segments = transcribe_whisper(audio, model)
+        return transcript, segments, None
+
+    on_segments = functools.partial(events.emit_segments, analysis)
+    if settings.ANALYSIS_VAD_ENABLED:
+        with metrics.timed(analysis, 'vad'):
+            speech_map = vad.detect_speech(audio, SAMPLE_RATE)
+    else:
+        # Chunking for parallel or live transcription still needs a map; keep the whole recording.
+        speech_map = vad.whole_recording(audio, SAMPLE_RATE)
+    with metrics.timed(analysis, 'transcribe'):
+        if workers > 1:
+            transcript, segments = transcribe_parallel(
+                audio, speech_map, workers, SAMPLE_RATE, on_segments=on_segments if live else None, model=model
+            )
+        elif live:
+            transcript, segments = transcribe_chunked(
+                audio, speech_map, SAMPLE_RATE, on_segments=on_segments, model=model
+            )
+        else:
+            transcript, segments = transcribe_speech(audio, speech_map, model)
+    silences = speech_map['silences'] if settings.ANALYSIS_VAD_ENABLED else None
+    return transcript, segments, silences
+
+
+def analyze_transcripts(items):
+    """
+    Sentiment, emotion and pause analysis of finished transcripts, given as
+    (transcript, segments, silences) tuples. The text models run once over the
+    windows of all of them.
+    """
+    try:
+        texts = analyze_texts([(transcript, segments) for transcript, segments, _ in items])
+    except Exception as e:
+        logger.exception("Sentiment analysis failed: %s", e)
+        texts = [({}, {}, []) for _ in items]
+
+    results = []
+    for (transcript, segments, silences), (sentiment, emotions, timeline) in zip(items, texts):
+        sentiment_score = float(sentiment.get('score', 0.0)) if isinstance(sentiment, dict) and sentiment.get('score') is not None else 0.0
+        if emotions is None:
+            emotions = {}
+        if silences is not None:
+            pause_data = get_pause_analytics(segments, silences)
+        else:
+            pause_data = get_pause_analytics(segments) if segments else {}
+        results.append({
+            'sentiment_score': sentiment_score,
+            'emotion_scores': emotions,
+            'sentiment_timeline': timeline,
+            'pause_analytics': pause_data,
+        })
+    return results
+
+
+def analyze_transcript(transcript, segments, silences=None):
+    """Sentiment, emotion and pause analysis of a finished transcript."""
+    return analyze_transcripts([(transcript, segments, silences)])[0]
+
+
+def _media_results(transcript, segments, silences, text_results=None):
+    return {
+        'transcript': transcript,
+        'segments': [
+            {'start': seg.get('start'), 'end': seg.get('end'), 'text': seg.get('text', '')}
+            for seg in segments
+        ],
+        **(text_results or analyze_transcript(transcript, segments, silences)),
+    }
+
+
+def analyze_streaming_upload(analysis):
+    """Transcribe a chunked upload while it is still arriving (see streaming.py)."""
+    session = analysis.upload_session
+    set_stage(analysis, InterviewAnalysis.Stage.TRANSCRIBING)
+    metrics.record(analysis, streaming=True)
+    # The length is unknown until the upload ends, so only the quality hint and queue count.
+    _route(analysis)
+    try:
+        # Includes time spent waiting for chunks, so this stage is bounded by the upload.
+        with metrics.timed(analysis, 'transcribe'):
+            transcript, segments, silences, content_hash = streaming.transcribe_upload(
+                session, on_segments=functools.partial(events.emit_segments, analysis),
+                model=analysis.whisper_model,
+            )
+    except ffmpeg.Error as e:
+        logger.warning(
+            "Analysis %s: upload cannot be decoded as a stream, waiting for it to finish: %s",
+            analysis.pk, e.stderr.decode(errors='replace')[-500:],
+        )
+        metrics.record(analysis, streaming=False)
+        streaming.wait_for_upload(session)
+        analysis.content_hash = hash_file(analysis.video_file.path)
+        analysis.save(update_fields=['content_hash'])
+        return analyze_media(analysis)
+
+    analysis.content_hash = content_hash
+    analysis.save(update_fields=['content_hash'])
+    set_stage(analysis, InterviewAnalysis.Stage.SCORING)
+    with metrics.timed(analysis, 'text_analysis'):
+        results = _media_results(transcript, segments, silences)
+    result_cache.store(analysis.content_hash, results, whisper_model=analysis.whisper_model)
+    return results
+
+
+def _cached_results(analysis):
+    """Results for the same bytes transcribed with the analysis' target tier, if cached."""
+    target = routing.target_tier(analysis.quality)
+    cached = result_cache.lookup(analysis.content_hash, whisper_model=target)
+    metrics.record(analysis, cache_hit=cached is not None)
+    if cached is not None:
+        analysis.whisper_model = target
+        analysis.metrics.setdefault('models', {})['whisper'] = target
+    return cached
+
+
+def analyze_media(analysis):
+    """
+    Everything that depends only on the uploaded bytes: transcript, segments,
+    sentiment, emotions and pauses. Served from the content-hash cache when
+    the same video has been analyzed before with the same models.
+    """
+    if streaming.is_streaming(analysis):
+        return analyze_streaming_upload(analysis)
+
+    cached = _cached_results(analysis)
+    if cached is not None:
+        return cached
+
+    transcript, segments, silences = transcribe_video(analysis)
+    set_stage(analysis, InterviewAnalysis.Stage.SCORING)
+    with metrics.timed(analysis, 'text_analysis'):
+        results = _media_results(transcript, segments, silences)
+    result_cache.store(analysis.content_hash, results, whisper_model=analysis.whisper_model)
+    return results
+
+
+def _apply_results(analysis, results):
+    analysis.transcript = results['transcript']
+    analysis.sentiment_score = results['sentiment_score']
+    analysis.emotion_scores = results['emotion_scores']
+    analysis.pause_analytics = results['pause_analytics']
+    analysis.sentiment_timeline = results['sentiment_timeline']
+    with metrics.timed(analysis, 'scoring'):
+        analysis.calculate_interview_score()
+
+
+def _generate_feedback(analysis):
+    with metrics.timed(analysis, 'feedback'):
+        analysis.feedback = generate_feedback(
+            analysis.transcript,
+            analysis.sentiment_score,
+            analysis.emotion_scores,
+            analysis.pause_analytics,
+            analysis.interview_score
+        )
+
+
+def finish_analysis(analysis, results):
+    """Score the analysis from its media results, then generate feedback."""
+    set_stage(analysis, InterviewAnalysis.Stage.SCORING)
+    _apply_results(analysis, results)
+    analysis.save()
+
+    set_stage(analysis, InterviewAnalysis.Stage.FEEDBACK)
+    _generate_feedback(analysis)
+    metrics.finish(analysis)
+    if routing.needs_refinement(analysis):
+        analysis.refinement = InterviewAnalysis.Refinement.PENDING
+    analysis.status = InterviewAnalysis.Status.COMPLETED
+    analysis.stage = InterviewAnalysis.Stage.DONE
+    analysis.completed_at = timezone.now()
+    analysis.save()
+    events.emit(analysis, AnalysisEvent.Kind.STATUS, status=analysis.status,
+                interview_score=analysis.interview_score)
+    return analysis
+
+
+def _keep_audio_only(analysis):
+    if storage.needs_audio_rendition(analysis):
+        try:
+            storage.convert(analysis)
+        except Exception as e:
+            # The analysis is done; compact_media retries the conversion later.
+            logger.exception("Could not keep only the audio of analysis %s: %s", analysis.pk, e)
+
+
+def process_analysis(analysis):
+    """Extract, transcribe, score and generate feedback for a claimed analysis."""
+    metrics.start(analysis)
+    analysis = finish_analysis(analysis, analyze_media(analysis))
+    _keep_audio_only(analysis)
+    return analysis
+
+
+def process_analyses(analyses):
+    """
+    Process several claimed analyses together, e.g. the items of a batch.
+    Extraction and transcription run per video; sentiment and emotion
+    inference then runs once over the windows of every transcript, so the
+    transformers see full padded batches instead of a few windows per video.
+    Returns (analysis, exception) pairs for the items that failed.
+    """
+    failed, cached, transcribed = [], [], []
+    for analysis in analyses:
+        metrics.start(analysis)
+        try:
+            metrics.record(analysis, group_size=len(analyses))
+            results = _cached_results(analysis)
+            if results is not None:
+                cached.append((analysis, results))
+            else:
+                transcribed.append((analysis, transcribe_video(analysis)))
+        except Exception as e:
+            failed.append((analysis, e))
+
+    if transcribed:
+        for analysis, _ in transcribed:
+            set_stage(analysis, InterviewAnalysis.Stage.SCORING)
+        start = time.perf_counter()
+        text_results = analyze_transcripts([transcription for _, transcription in transcribed])
+        # Each analysis is charged its share of the shared inference time.
+        share = (time.perf_counter() - start) / len(transcribed)
+        for (analysis, transcription), text in zip(transcribed, text_results):
+            metrics.add_stage(analysis, 'text_analysis', share)
+            results = _media_results(*transcription, text_results=text)
+            result_cache.store(analysis.content_hash, results, whisper_model=analysis.whisper_model)
+            cached.append((analysis, results))
+
+    for analysis, results in cached:
+        try:
+            finish_analysis(analysis, results)
+        except Exception as e:
+            failed.append((analysis, e))
+            continue
+        _keep_audio_only(analysis)
+    return failed
+
+
+def refine_analysis(analysis):
+    """
+    Re-transcribe a completed analysis with its target Whisper tier, then
+    replace the first-pass transcript, scores and feedback. The first pass'
+    metrics are kept; the refinement's go under metrics['refinement'].
+    """
+    first_pass = analysis.metrics or {}
+    analysis.metrics = {'stages': {}}
+    analysis.whisper_model = routing.target_tier(analysis.quality)
+    with metrics.timed(analysis, 'extract'):
+        audio = load_audio(analysis.video_file.path)
+    transcript, segments, silences = transcribe_audio(analysis, audio)
+    with metrics.timed(analysis, 'text_analysis'):
+        results = _media_results(transcript, segments, silences)
+    result_cache.store(analysis.content_hash, results, whisper_model=analysis.whisper_model)
+    _apply_results(analysis, results)
+    _generate_feedback(analysis)
+
+    analysis.metrics = {
+        **first_pass,
+        'refinement': {'whisper': analysis.whisper_model, 'stages': analysis.metrics['stages']},
+    }
+    analysis.refinement = InterviewAnalysis.Refinement.DONE
+    analysis.save()
+    logger.info("Analysis %s refined with whisper %s", analysis.pk, analysis.whisper_model)
+    return analysis
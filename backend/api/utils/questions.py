@@ -0,0 +1,222 @@
+"""
+Interview question search: a normalized-query cache in front of a persisted
+question bank, in front of the LLM.
+"""
+import json
+import logging
+import re
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..decorators import stale_while_revalidate
+from ..models import InterviewQuestion, RoleSearchStat
+from . import search
+from .llm import get_client
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query):
+    """'  Senior  Software Engineer ' and 'senior software engineer' share one cache entry."""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+def build_prompt(role):
+    return f"""Generate 3 interview questions and detailed answers for a {role} role.
+        Format the response as a JSON array with the following structure:
+        [
+            {{
+                "role": "{role}",
+                "category": "technical",
+                "difficulty": "intermediate",
+                "question": "question text",
+                "answer": "detailed answer with examples"
+            }}
+        ]
+        Make sure the questions are relevant to the role and include code examples where appropriate.
+        The difficulty should be one of: beginner, intermediate, advanced.
+        The category should be one of: technical, behavioral, system_design, problem_solving, leadership."""
+
+
+def parse_questions(response_text, role):
+    """Parse the LLM response as JSON, JSON in a markdown block, or loosely formatted text."""
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError:
+        logger.debug("Failed to parse JSON, attempting text extraction")
+
+    # Attempt to extract JSON from markdown code block
+    json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            logger.debug("Failed to parse JSON from extracted markdown, falling back to line extraction")
+
+    # Fallback to line-by-line text extraction
+    questions = []
+    current_question = None
+    for line in response_text.strip().split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        # Look for lines that might be questions (e.g., ends with ?, starts with a number/bullet point, or contains common question words)
+        is_potential_question = (
+            line.endswith('?') or
+            line[0].isdigit() or
+            line.startswith('-') or line.startswith('*') or
+            any(line.lower().startswith(word) for word in ['what', 'how', 'why', 'describe', 'explain', 'tell'])
+        )
+
+        if is_potential_question:
+            if current_question:
+                questions.append(current_question)
+            current_question = {'question': line, 'answer': ''}
+        elif current_question is not None:
+            if current_question['answer']:
+                current_question['answer'] += '\n' + line
+            else:
+                current_question['answer'] = line
+
+    if current_question:
+        questions.append(current_question)
+
+    return [
+        {
+            'role': role,
+            'category': 'technical',  # Default category
+            'difficulty': 'intermediate',  # Default difficulty
+            'question': q['question'].strip(),
+            'answer': q['answer'].strip(),
+        }
+        for q in questions
+    ]
+
+
+def generate_questions(role):
+    """Ask the LLM for questions about ``role`` and save them to the question bank."""
+    questions = parse_questions(get_client().generate(build_prompt(role), json_output=True), role)
+    save_to_bank(role, questions)
+    return questions
+
+
+def save_to_bank(role, questions):
+    """
+    Replace the banked questions for ``role`` with ``questions``. An empty or
+    malformed list leaves the bank as it is rather than emptying it.
+    """
+    rows = [
+        InterviewQuestion(
+            role=q.get('role') or role,
+            normalized_role=role,
+            category=q.get('category', ''),
+            difficulty=q.get('difficulty', ''),
+            question=q.get('question', ''),
+            answer=q.get('answer', ''),
+        )
+        for q in questions if isinstance(q, dict)
+    ]
+    if not rows:
+        logger.warning("Not replacing the question bank for %r with an empty question list", role)
+        return
+    with transaction.atomic():
+        InterviewQuestion.objects.filter(normalized_role=role).delete()
+        InterviewQuestion.objects.bulk_create(rows)
+        # bulk_create sends no post_save signals (and returns no ids on MySQL),
+        # so index the role's new rows once they are committed.
+        search.update_on_commit(_index_role, role)
+
+
+def _index_role(role):
+    search.index_documents([
+        search.question_document(q) for q in InterviewQuestion.objects.filter(normalized_role=role)
+    ])
+
+
+async def agenerate_questions(role):
+    """Async generate_questions: awaits the LLM instead of blocking a thread on it."""
+    questions = parse_questions(await get_client().agenerate(build_prompt(role), json_output=True), role)
+    await sync_to_async(save_to_bank)(role, questions)
+    return questions
+
+
+def _bank_rows(role):
+    cutoff = timezone.now() - timedelta(seconds=settings.QUESTION_BANK_MAX_AGE)
+    return (
+        InterviewQuestion.objects
+        .filter(normalized_role=role, created_at__gte=cutoff)
+        .order_by('id')
+        .values('role', 'category', 'difficulty', 'question', 'answer')
+    )
+
+
+def load_from_bank(role):
+    """Banked questions for ``role`` that are recent enough to serve, or None."""
+    return list(_bank_rows(role)) or None
+
+
+async def aload_from_bank(role):
+    return [row async for row in _bank_rows(role)] or None
+
+
+@stale_while_revalidate(
+    fresh_timeout=settings.QUESTION_CACHE_FRESH,
+    stale_timeout=settings.QUESTION_CACHE_STALE,
+    key_prefix='questions',
+    wait_timeout=settings.LLM['TIMEOUT'],
+)
+def cached_questions(role):
+    return load_from_bank(role) or generate_questions(role)
+
+
+@cached_questions.async_implementation
+async def acached_questions(role):
+    return await aload_from_bank(role) or await agenerate_questions(role)
+
+
+def record_search(role):
+    updated = RoleSearchStat.objects.filter(normalized_role=role).update(
+        search_count=F('search_count') + 1, last_searched_at=timezone.now()
+    )
+    if not updated:
+        RoleSearchStat.objects.get_or_create(normalized_role=role, defaults={'search_count': 1})
+
+
+async def arecord_search(role):
+    updated = await RoleSearchStat.objects.filter(normalized_role=role).aupdate(
+        search_count=F('search_count') + 1, last_searched_at=timezone.now()
+    )
+    if not updated:
+        await RoleSearchStat.objects.aget_or_create(normalized_role=role, defaults={'search_count': 1})
+
+
+def search_questions(query):
+    role = normalize_query(query)
+    record_search(role)
+    return cached_questions(role)
+
+
+async def asearch_questions(query):
+    role = normalize_query(query)
+    await arecord_search(role)
+    return await cached_questions.acall(role)
+
+
+def top_roles(limit):
+    """The most searched roles, topped up with QUESTION_BANK_DEFAULT_ROLES."""
+    roles = list(
+        RoleSearchStat.objects.order_by('-search_count').values_list('normalized_role', flat=True)[:limit]
+    )
+    for role in settings.QUESTION_BANK_DEFAULT_ROLES:
+        if len(roles) >= limit:
+            break
+        role = normalize_query(role)
+        if role not in roles:
+            roles.append(role)
+    return roles
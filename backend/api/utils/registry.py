@@ -0,0 +1,88 @@
+"""
+Process-wide registry of the ML models used by the analysis pipeline.
+
+Nothing is loaded at import time: each model is built on first use (or by
+warm_up() when an analysis worker starts) and then shared by every caller in
+the process. Web processes that never analyze a video never pay for them.
+"""
+import threading
+
+from django.conf import settings
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _get(key, loader):
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = _models[key] = loader()
+    return model
+
+
+def get_whisper_model(size=None):
+    config = settings.ANALYSIS_MODELS
+    size = size or config['WHISPER_MODEL']
+
+    def load():
+        import whisper
+        return whisper.load_model(size, device=config['WHISPER_DEVICE'])
+
+    return _get(f'whisper:{size}', load)
+
+
+def get_sentiment_model():
+    config = settings.ANALYSIS_MODELS
+
+    def load():
+        from transformers import pipeline
+        return pipeline("sentiment-analysis", model=config['SENTIMENT_MODEL'],
+                        device=config['TRANSFORMERS_DEVICE'])
+
+    return _get('sentiment', load)
+
+
+def get_emotion_model():
+    config = settings.ANALYSIS_MODELS
+
+    def load():
+        from transformers import pipeline
+        return pipeline("text-classification", model=config['EMOTION_MODEL'], top_k=None,
+                        device=config['TRANSFORMERS_DEVICE'])
+
+    return _get('emotion', load)
+
+
+def get_text_tokenizer():
+    """The sentiment model's tokenizer alone, for sizing text windows when the model runs elsewhere."""
+    config = settings.ANALYSIS_MODELS
+
+    def load():
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(config['SENTIMENT_MODEL'])
+
+    return _get('tokenizer', load)
+
+
+def loaded_models():
+    """Keys of the models currently held by this process."""
+    return sorted(_models)
+
+
+def warm_up():
+    """Load every configured model now, e.g. when an analysis worker starts."""
+    get_whisper_model()
+    routing = settings.ANALYSIS_WHISPER_ROUTING
+    if routing['ENABLED'] and routing['WARM_UP_TIERS']:
+        # Other tiers otherwise load on first use, at the cost of a slow first job.
+        for size in routing['TIERS']:
+            get_whisper_model(size)
+    if settings.ANALYSIS_INFERENCE['BACKEND'] == 'socket':
+        # run_inference_server holds the text models for every worker.
+        get_text_tokenizer()
+        return
+    get_sentiment_model()
+    get_emotion_model()
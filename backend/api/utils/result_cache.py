@@ -0,0 +1,108 @@
+"""
+Content-addressed cache of media analysis results.
+
+Entries are keyed by the SHA-256 of the uploaded video plus a fingerprint of
+the model configuration, so re-uploads of the same recording skip straight to
+scoring while a model change naturally invalidates old results. The table is
+kept under ANALYSIS_CACHE_MAX_BYTES by evicting least recently used entries.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from ..models import AnalysisCacheEntry
+
+HITS_KEY = 'analysis_cache:hits'
+MISSES_KEY = 'analysis_cache:misses'
+FIELDS = ('transcript', 'segments', 'sentiment_score', 'emotion_scores',
+          'sentiment_timeline', 'pause_analytics')
+
+
+def model_version(whisper_model=None):
+    """
+    Fingerprint of every setting that changes what the media analysis
+    produces, with ``whisper_model`` standing in for WHISPER_MODEL when given.
+    """
+    models = dict(settings.ANALYSIS_MODELS)
+    if whisper_model:
+        models['WHISPER_MODEL'] = whisper_model
+    config = {
+        'models': models,
+        'window_tokens': settings.ANALYSIS_TEXT_WINDOW_TOKENS,
+        'vad': settings.ANALYSIS_VAD_ENABLED,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _count(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr(); counters are best effort.
+        pass
+
+
+def lookup(content_hash, whisper_model=None):
+    """Return cached results for ``content_hash`` or None, recording a hit or miss."""
+    if not content_hash or not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+    entry = AnalysisCacheEntry.objects.filter(
+        content_hash=content_hash, model_version=model_version(whisper_model)
+    ).only('pk', *FIELDS).first()
+    if entry is None:
+        _count(MISSES_KEY)
+        return None
+    _count(HITS_KEY)
+    AnalysisCacheEntry.objects.filter(pk=entry.pk).update(
+        hit_count=F('hit_count') + 1, last_used_at=timezone.now()
+    )
+    return {field: getattr(entry, field) for field in FIELDS}
+
+
+def store(content_hash, results, whisper_model=None):
+    """Cache the media results for ``content_hash`` and evict old entries if needed."""
+    if not content_hash or not settings.ANALYSIS_CACHE_ENABLED:
+        return
+    values = {field: results[field] for field in FIELDS}
+    values['size_bytes'] = len(json.dumps(values, default=str).encode())
+    values['last_used_at'] = timezone.now()
+    AnalysisCacheEntry.objects.update_or_create(
+        content_hash=content_hash, model_version=model_version(whisper_model), defaults=values
+    )
+    evict()
+
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits in ``max_bytes``."""
+    max_bytes = settings.ANALYSIS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    total = AnalysisCacheEntry.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+    if total <= max_bytes:
+        return 0
+    doomed = []
+    for pk, size in AnalysisCacheEntry.objects.order_by('last_used_at').values_list('pk', 'size_bytes').iterator():
+        if total <= max_bytes:
+            break
+        doomed.append(pk)
+        total -= size
+    AnalysisCacheEntry.objects.filter(pk__in=doomed).delete()
+    return len(doomed)
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    totals = AnalysisCacheEntry.objects.aggregate(size=Sum('size_bytes'))
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / lookups if lookups else 0.0,
+        'entries': AnalysisCacheEntry.objects.count(),
+        'size_bytes': totals['size'] or 0,
+        'max_bytes': settings.ANALYSIS_CACHE_MAX_BYTES,
+    }
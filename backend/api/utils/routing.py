@@ -0,0 +1,69 @@
+"""
+Whisper tier routing.
+
+Every analysis has a target tier, set by its quality hint: the fastest of
+ANALYSIS_WHISPER_ROUTING['TIERS'] for 'fast', the most accurate for 'high'
+and WHISPER_MODEL for 'balanced'. The first pass may use another tier: one
+up for short clips, where the better model costs little, and one down for
+long recordings and for each BUSY_QUEUE_DEPTH analyses waiting in the
+queue, so peaks cost accuracy rather than latency. Transcripts produced
+below their target are marked for refinement, which workers only pick up
+when nothing is queued.
+"""
+from django.conf import settings
+
+from ..models import InterviewAnalysis
+
+
+def _tiers():
+    return list(settings.ANALYSIS_WHISPER_ROUTING['TIERS'])
+
+
+def target_tier(quality):
+    """The tier an analysis with this quality hint should end up transcribed with."""
+    default = settings.ANALYSIS_MODELS['WHISPER_MODEL']
+    if not settings.ANALYSIS_WHISPER_ROUTING['ENABLED']:
+        return default
+    tiers = _tiers()
+    if quality == InterviewAnalysis.Quality.FAST:
+        return tiers[0]
+    if quality == InterviewAnalysis.Quality.HIGH:
+        return tiers[-1]
+    return default if default in tiers else tiers[len(tiers) // 2]
+
+
+def queue_depth():
+    return InterviewAnalysis.objects.ready().count()
+
+
+def choose_tier(quality, audio_seconds=None, depth=None):
+    """
+    Tier for the first pass over ``audio_seconds`` of audio (None when not
+    known yet, as for streamed uploads) with ``depth`` analyses queued.
+    """
+    target = target_tier(quality)
+    config = settings.ANALYSIS_WHISPER_ROUTING
+    if not config['ENABLED']:
+        return target
+    tiers = _tiers()
+    index = tiers.index(target)
+    if audio_seconds is not None:
+        if audio_seconds <= config['SHORT_SECONDS'] and quality != InterviewAnalysis.Quality.FAST:
+            index += 1
+        elif audio_seconds >= config['LONG_SECONDS']:
+            index -= 1
+    depth = queue_depth() if depth is None else depth
+    index -= depth // config['BUSY_QUEUE_DEPTH']
+    return tiers[min(max(index, 0), len(tiers) - 1)]
+
+
+def needs_refinement(analysis):
+    """Whether the transcript came from a tier below the analysis' target."""
+    config = settings.ANALYSIS_WHISPER_ROUTING
+    if not (config['ENABLED'] and config['REFINE']):
+        return False
+    tiers = _tiers()
+    target = target_tier(analysis.quality)
+    if analysis.whisper_model not in tiers or target not in tiers:
+        return False
+    return tiers.index(analysis.whisper_model) < tiers.index(target)
@@ -0,0 +1,78 @@
+"""
+Vectorized interview scoring.
+
+The score blends sentiment, positive emotions and pause behaviour. Weights
+live in versioned configs so a scoring change is a new entry in WEIGHTS plus
+``manage.py rescore_analyses``, and every row records which version
+produced its score. ``score_arrays`` works on whole columns at once; the
+per-instance ``InterviewAnalysis.calculate_interview_score`` is a batch of
+one.
+"""
+import numpy as np
+from django.conf import settings
+
+WEIGHTS = {
+    # The original hand-tuned formula.
+    'v1': {
+        'sentiment': 0.4,
+        'positive_emotions': ('joy', 'confidence', 'enthusiasm'),
+        'emotion': 0.1,
+        'pause': 0.3,
+        'free_pauses': 5,
+        'per_extra_pause': 0.05,
+        'free_avg_pause': 2.0,
+        'per_extra_pause_second': 0.1,
+    },
+}
+
+
+def current_version():
+    return settings.ANALYSIS_SCORING_VERSION
+
+
+def extract_features(rows, version=None):
+    """Turn (sentiment_score, emotion_scores, pause_analytics) tuples into arrays."""
+    weights = WEIGHTS[version or current_version()]
+    emotions = weights['positive_emotions']
+    n = len(rows)
+    sentiment = np.zeros(n)
+    emotion = np.zeros((n, len(emotions)))
+    total_pauses = np.zeros(n)
+    avg_pause = np.zeros(n)
+    has_pauses = np.zeros(n, dtype=bool)
+    for i, (sentiment_score, emotion_scores, pause_analytics) in enumerate(rows):
+        sentiment[i] = sentiment_score or 0.0
+        if emotion_scores:
+            emotion[i] = [emotion_scores.get(name, 0) for name in emotions]
+        if pause_analytics:
+            has_pauses[i] = True
+            total_pauses[i] = pause_analytics.get('total_pauses', 0)
+            avg_pause[i] = pause_analytics.get('avg_pause', 0)
+    return {
+        'sentiment': sentiment, 'emotion': emotion, 'total_pauses': total_pauses,
+        'avg_pause': avg_pause, 'has_pauses': has_pauses,
+    }
+
+
+def score_arrays(features, version=None):
+    """Scores in [0, 1] for every row of ``features``."""
+    weights = WEIGHTS[version or current_version()]
+    score = features['sentiment'] * weights['sentiment']
+    score += features['emotion'].sum(axis=1) * weights['emotion']
+
+    # Penalize too many pauses or long pauses.
+    pause_score = (
+        1.0
+        - np.maximum(features['total_pauses'] - weights['free_pauses'], 0) * weights['per_extra_pause']
+        - np.maximum(features['avg_pause'] - weights['free_avg_pause'], 0) * weights['per_extra_pause_second']
+    )
+    score += np.where(features['has_pauses'], np.maximum(pause_score, 0.0) * weights['pause'], 0.0)
+    return np.clip(score, 0.0, 1.0)
+
+
+def score_rows(rows, version=None):
+    return score_arrays(extract_features(rows, version), version)
+
+
+def score(sentiment_score, emotion_scores, pause_analytics, version=None):
+    return float(score_rows([(sentiment_score, emotion_scores, pause_analytics)], version)[0])
@@ -0,0 +1,23 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+@contextmanager
+def scratch_dir(prefix='analysis-'):
+    """
+    Create a private scratch directory for one analysis and remove it afterwards.
+    Directories live under ANALYSIS_SCRATCH_ROOT (e.g. a tmpfs mount such as
+    /dev/shm) or the system temp dir, so concurrent jobs never share files.
+    """
+    root = settings.ANALYSIS_SCRATCH_ROOT
+    if root:
+        os.makedirs(root, exist_ok=True)
+    path = tempfile.mkdtemp(prefix=prefix, dir=root)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,230 @@
+"""
+Local search over interview transcripts and the question bank.
+
+Documents live in an SQLite FTS5 index next to the main database (no
+external service). It is updated incrementally from model signals and can be
+rebuilt with `manage.py rebuild_search_index`. An optional NumPy embedding
+index supports similarity search; its vectors come from SEARCH_EMBEDDER,
+which defaults to a dependency-free hashed bag-of-words embedding.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+KINDS = {'analysis': 1, 'question': 2}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+PUBLIC_OWNER = 0  # owner id of documents every user can see (banked questions)
+EMBEDDING_DIM = 256
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_vectors_lock = threading.Lock()
+_vectors = None  # (version, rowids, owners, kinds, matrix) cached per process
+
+
+def update_on_commit(func, *args):
+    """Run the index update ``func(*args)`` once the current transaction commits."""
+    # The index is derived data; a failure to update it must not fail the save or request.
+    def run():
+        try:
+            func(*args)
+        except Exception as e:
+            logger.exception("Search index update failed: %s", e)
+    transaction.on_commit(run)
+
+
+def doc_id(kind, ref_id):
+    return KINDS[kind] << 40 | int(ref_id)
+
+
+def connect(path=None):
+    """The calling thread's connection to the index, creating the schema on first use."""
+    path = str(path or settings.SEARCH_INDEX_PATH)
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = sqlite3.connect(path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+                title, body, kind UNINDEXED, ref_id UNINDEXED, owner_id UNINDEXED,
+                tokenize = 'porter unicode61'
+            );
+            CREATE TABLE IF NOT EXISTS embeddings (
+                id INTEGER PRIMARY KEY, kind INTEGER, owner_id INTEGER, vector BLOB
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+            INSERT OR IGNORE INTO meta VALUES ('embeddings_version', 0);
+        """)
+    return conn
+
+
+def hashed_embedding(texts):
+    """Feature-hashed, log-scaled, L2-normalized bag-of-words vectors."""
+    matrix = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = re.findall(r'\w+', text.lower())
+        if tokens:
+            buckets = np.fromiter((zlib.crc32(t.encode()) % EMBEDDING_DIM for t in tokens), dtype=np.int64)
+            matrix[row] = np.bincount(buckets, minlength=EMBEDDING_DIM)
+    matrix = np.log1p(matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+def _embed(texts):
+    return np.asarray(import_string(settings.SEARCH_EMBEDDER)(texts), dtype=np.float32)
+
+
+def index_documents(docs, path=None):
+    """
+    Add or replace documents. Each is a dict with kind, ref_id, owner_id,
+    title and body.
+    """
+    if not docs:
+        return
+    conn = connect(path)
+    rows = [(doc_id(d['kind'], d['ref_id']), d) for d in docs]
+    with conn:
+        conn.execute('BEGIN')
+        conn.executemany('DELETE FROM documents WHERE rowid = ?', [(rowid,) for rowid, _ in rows])
+        conn.executemany(
+            'INSERT INTO documents (rowid, title, body, kind, ref_id, owner_id) VALUES (?, ?, ?, ?, ?, ?)',
+            [(rowid, d['title'], d['body'], d['kind'], d['ref_id'], d['owner_id']) for rowid, d in rows]
+        )
+        if settings.SEARCH_EMBEDDINGS_ENABLED:
+            vectors = _embed([f"{d['title']}\n{d['body']}" for _, d in rows])
+            conn.executemany(
+                'INSERT OR REPLACE INTO embeddings (id, kind, owner_id, vector) VALUES (?, ?, ?, ?)',
+                [(rowid, KINDS[d['kind']], d['owner_id'], vector.tobytes())
+                 for (rowid, d), vector in zip(rows, vectors)]
+            )
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'embeddings_version'")
+
+
+def remove_documents(kind, ref_ids, path=None):
+    conn = connect(path)
+    rowids = [(doc_id(kind, ref_id),) for ref_id in ref_ids]
+    with conn:
+        conn.execute('BEGIN')
+        conn.executemany('DELETE FROM documents WHERE rowid = ?', rowids)
+        conn.executemany('DELETE FROM embeddings WHERE id = ?', rowids)
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'embeddings_version'")
+
+
+def clear(path=None):
+    conn = connect(path)
+    with conn:
+        conn.execute('BEGIN')
+        conn.execute('DELETE FROM documents')
+        conn.execute('DELETE FROM embeddings')
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'embeddings_version'")
+
+
+def _match_expression(query):
+    """Turn free text into a safe FTS5 expression: every word must match, the last as a prefix."""
+    tokens = re.findall(r'\w+', query)
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    return ' '.join(terms)
+
+
+def search(query, owner_id, kind=None, page=1, page_size=20, path=None):
+    """Full-text search ranked by BM25. Returns (total, results)."""
+    expression = _match_expression(query)
+    if expression is None:
+        return 0, []
+    conn = connect(path)
+    where = 'documents MATCH ? AND owner_id IN (?, ?)'
+    params = [expression, owner_id, PUBLIC_OWNER]
+    if kind:
+        where += ' AND kind = ?'
+        params.append(kind)
+    total = conn.execute(f'SELECT count(*) FROM documents WHERE {where}', params).fetchone()[0]
+    rows = conn.execute(
+        f"""SELECT kind, ref_id, title, snippet(documents, 1, '<mark>', '</mark>', '…', 16), bm25(documents)
+            FROM documents WHERE {where} ORDER BY rank LIMIT ? OFFSET ?""",
+        params + [page_size, (page - 1) * page_size]
+    ).fetchall()
+    return total, [
+        {'kind': k, 'id': int(ref_id), 'title': title, 'snippet': snippet, 'score': -score}
+        for k, ref_id, title, snippet, score in rows
+    ]
+
+
+def _load_vectors(conn):
+    global _vectors
+    version = conn.execute("SELECT value FROM meta WHERE key = 'embeddings_version'").fetchone()[0]
+    with _vectors_lock:
+        if _vectors is None or _vectors[0] != version:
+            rows = conn.execute('SELECT id, kind, owner_id, vector FROM embeddings').fetchall()
+            matrix = (np.frombuffer(b''.join(r[3] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+                      if rows else np.zeros((0, EMBEDDING_DIM), dtype=np.float32))
+            _vectors = (
+                version,
+                np.array([r[0] for r in rows], dtype=np.int64),
+                np.array([r[2] for r in rows], dtype=np.int64),
+                np.array([r[1] for r in rows], dtype=np.int64),
+                matrix,
+            )
+        return _vectors
+
+
+def similar(query, owner_id, kind=None, page=1, page_size=20, path=None):
+    """Cosine-similarity search over the embedding index. Returns (total, results)."""
+    if not settings.SEARCH_EMBEDDINGS_ENABLED:
+        return 0, []
+    conn = connect(path)
+    _, rowids, owners, kinds, matrix = _load_vectors(conn)
+    visible = (owners == owner_id) | (owners == PUBLIC_OWNER)
+    if kind:
+        visible &= kinds == KINDS[kind]
+    candidates = np.flatnonzero(visible)
+    if not len(candidates):
+        return 0, []
+    scores = matrix[candidates] @ _embed([query])[0]
+    end = min(page * page_size, len(candidates))
+    top = np.argpartition(-scores, end - 1)[:end]
+    top = top[np.argsort(-scores[top])][(page - 1) * page_size:]
+
+    placeholders = ','.join('?' * len(top))
+    ids = [int(rowids[candidates[i]]) for i in top]
+    details = {
+        row[0]: row[1:] for row in conn.execute(
+            f'SELECT rowid, kind, ref_id, title, substr(body, 1, 200) FROM documents WHERE rowid IN ({placeholders})',
+            ids
+        )
+    }
+    results = []
+    for i, rowid in zip(top, ids):
+        if rowid in details:
+            k, ref_id, title, snippet = details[rowid]
+            results.append({'kind': k, 'id': int(ref_id), 'title': title, 'snippet': snippet,
+                            'score': float(scores[i])})
+    return len(candidates), results
+
+
+def analysis_document(analysis):
+    return {
+        'kind': 'analysis', 'ref_id': analysis.pk, 'owner_id': analysis.user_id,
+        'title': analysis.candidate_name, 'body': analysis.transcript,
+    }
+
+
+def question_document(question):
+    return {
+        'kind': 'question', 'ref_id': question.pk, 'owner_id': PUBLIC_OWNER,
+        'title': question.question, 'body': f"{question.role}\n{question.answer}",
+    }
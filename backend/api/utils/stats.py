@@ -0,0 +1,135 @@
+"""
+Per-user profile statistics.
+
+UserStats rows hold running totals over a user's completed analyses. Saves
+apply the change in the row's contribution as a single UPDATE, so the
+profile endpoint never has to scan a user's history. A missing row, or a
+save whose previous contribution is unknown, falls back to one aggregate
+query that rebuilds the row.
+"""
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from ..models import InterviewAnalysis, UserStats
+
+
+def _completed(user_id):
+    return InterviewAnalysis.objects.filter(user_id=user_id, status=InterviewAnalysis.Status.COMPLETED)
+
+
+def recompute(user_id):
+    """Rebuild a user's stats from their analyses with one aggregate query."""
+    totals = _completed(user_id).aggregate(
+        count=Count('id'), total=Sum('interview_score'), last=Max('created_at'),
+    )
+    stats, _ = UserStats.objects.update_or_create(user_id=user_id, defaults={
+        'interviews_completed': totals['count'],
+        'total_score': totals['total'] or 0.0,
+        'last_interview_at': totals['last'],
+    })
+    return stats
+
+
+def recompute_all(chunk_size=1000):
+    """Rebuild every user's stats with one grouped aggregate.
+
+    Used after bulk writes such as rescoring, which bypass the save signals.
+    """
+    totals = (
+        InterviewAnalysis.objects.filter(status=InterviewAnalysis.Status.COMPLETED)
+        .order_by().values('user_id')
+        .annotate(count=Count('id'), total=Sum('interview_score'), last=Max('created_at'))
+    )
+    rows = [
+        UserStats(user_id=row['user_id'], interviews_completed=row['count'],
+                  total_score=row['total'] or 0.0, last_interview_at=row['last'], updated_at=timezone.now())
+        for row in totals
+    ]
+    fields = ['interviews_completed', 'total_score', 'last_interview_at', 'updated_at']
+    if connection.features.supports_update_conflicts_with_target:
+        UserStats.objects.bulk_create(
+            rows, batch_size=chunk_size, update_conflicts=True, unique_fields=['user'], update_fields=fields,
+        )
+        return len(rows)
+
+    # MySQL cannot name the conflict target, so split each chunk into updates and inserts.
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        with transaction.atomic():
+            existing = set(
+                UserStats.objects.select_for_update()
+                .filter(user_id__in=[row.user_id for row in chunk]).values_list('user_id', flat=True)
+            )
+            UserStats.objects.bulk_update([row for row in chunk if row.user_id in existing], fields)
+            UserStats.objects.bulk_create([row for row in chunk if row.user_id not in existing])
+    return len(rows)
+
+
+def get_stats(user):
+    try:
+        return UserStats.objects.get(user=user)
+    except UserStats.DoesNotExist:
+        return recompute(user.pk)
+
+
+async def aget_stats(user):
+    try:
+        return await UserStats.objects.aget(user=user)
+    except UserStats.DoesNotExist:
+        return await sync_to_async(recompute)(user.pk)
+
+
+def recent_history(user, limit=5):
+    """The user's latest completed interviews, as dicts, for the profile page."""
+    return (
+        _completed(user.pk)
+        .order_by('-created_at')
+        .values('created_at', 'interview_score', 'candidate_name', 'sentiment_score')[:limit]
+    )
+
+
+def record_save(analysis):
+    """Fold the change in ``analysis``'s contribution into its owner's stats."""
+    previous, current = analysis._stats_snapshot, analysis.stats_contribution()
+    analysis._stats_snapshot = current
+    if previous is None or current is None:
+        recompute(analysis.user_id)
+        return
+
+    count_delta, score_delta = current[0] - previous[0], current[1] - previous[1]
+    if not count_delta and not score_delta:
+        return
+    if count_delta < 0:
+        # Un-completing a row may move last_interview_at backwards.
+        recompute(analysis.user_id)
+        return
+
+    updates = {
+        'interviews_completed': F('interviews_completed') + count_delta,
+        'total_score': F('total_score') + score_delta,
+        'updated_at': timezone.now(),
+    }
+    if count_delta:
+        created = Value(analysis.created_at)
+        updates['last_interview_at'] = Greatest(Coalesce('last_interview_at', created), created)
+    if not UserStats.objects.filter(user_id=analysis.user_id).update(**updates):
+        recompute(analysis.user_id)
+
+
+def record_delete(analysis):
+    """Rebuild the owner's stats in place after one of their analyses is deleted.
+
+    Deletes are rare, so this uses correlated subqueries rather than a delta.
+    It never inserts, because deletes also run while the owning user is being
+    cascade-deleted.
+    """
+    per_user = _completed(OuterRef('user_id')).order_by().values('user_id')
+    UserStats.objects.filter(user_id=analysis.user_id).update(
+        interviews_completed=Coalesce(Subquery(per_user.annotate(n=Count('id')).values('n')), 0),
+        total_score=Coalesce(Subquery(per_user.annotate(s=Sum('interview_score')).values('s')), 0.0),
+        last_interview_at=Subquery(per_user.annotate(m=Max('created_at')).values('m')),
+        updated_at=timezone.now(),
+    )
@@ -0,0 +1,272 @@
+"""
+Content-addressed media storage on top of Django's default storage.
+
+An upload is written once, to a temporary name while it is hashed, and then
+moved to ``media/<kind>/<ab>/<cd>/<sha256><ext>``. Identical uploads resolve
+to the same MediaBlob and share its bytes. Analyses point at blobs rather
+than owning files, so an original can be swapped for an audio-only
+rendition: by the pipeline itself when ANALYSIS_MEDIA_KEEP is 'audio', or by
+the retention job (``manage.py compact_media``) once every analysis of it
+has finished. Blobs nothing references any more are deleted.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import ffmpeg
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import DefaultStorage
+from django.db import close_old_connections
+from django.db.models import ProtectedError, Q
+from django.utils import timezone
+
+from ..models import InterviewAnalysis, MediaBlob
+from .scratch import scratch_dir
+from .uploads import HashingFile
+
+logger = logging.getLogger(__name__)
+
+backend = DefaultStorage()
+
+TERMINAL_STATUSES = (InterviewAnalysis.Status.COMPLETED, InterviewAnalysis.Status.FAILED)
+
+
+def needs_audio_rendition(analysis):
+    """Whether ANALYSIS_MEDIA_KEEP asks for audio only and the analysis still references its video."""
+    if settings.ANALYSIS_MEDIA_KEEP != 'audio':
+        return False
+    return analysis.media is None or analysis.media.kind == MediaBlob.Kind.ORIGINAL
+
+
+def audio_rendition(workdir):
+    """Output path and ffmpeg options for an audio-only rendition written into ``workdir``."""
+    # 16 kHz mono is all the pipeline decodes anyway, so re-analysis loses nothing.
+    if settings.ANALYSIS_MEDIA_AUDIO_CODEC == 'flac':
+        return os.path.join(workdir, 'rendition.flac'), {'acodec': 'flac', 'ac': 1, 'ar': '16k', 'sample_fmt': 's16'}
+    return os.path.join(workdir, 'rendition.ogg'), {
+        'acodec': 'libopus', 'ac': 1, 'ar': '16k', 'audio_bitrate': settings.ANALYSIS_MEDIA_AUDIO_BITRATE,
+    }
+
+
+def blob_name(sha256, kind, extension=''):
+    return f"media/{kind}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension.lower()}"
+
+
+def _move(source, target):
+    try:
+        source_path, target_path = backend.path(source), backend.path(target)
+    except NotImplementedError:
+        # Remote storages have no rename: copy once and drop the temporary object.
+        with backend.open(source) as f:
+            target = backend.save(target, f)
+        backend.delete(source)
+        return target
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    os.replace(source_path, target_path)
+    return target
+
+
+def _promote(temp_name, sha256, size, kind, extension, source=None):
+    """Make a freshly written temporary object the blob for ``sha256``, or drop it if that exists."""
+    now = timezone.now()
+    blob = MediaBlob.objects.filter(pk=sha256).first()
+    if blob is not None and backend.exists(blob.name):
+        backend.delete(temp_name)
+        # Keeps the garbage collector off a blob that is about to be referenced again.
+        MediaBlob.objects.filter(pk=sha256).update(last_used_at=now)
+        return blob
+    name = _move(temp_name, blob_name(sha256, kind, extension))
+    blob, _ = MediaBlob.objects.update_or_create(pk=sha256, defaults={
+        'name': name, 'kind': kind, 'size_bytes': size, 'source': source, 'last_used_at': now,
+    })
+    return blob
+
+
+def put(file, kind=MediaBlob.Kind.ORIGINAL, source=None):
+    """Store ``file`` (an upload or other Django File) and return its MediaBlob."""
+    extension = os.path.splitext(file.name or '')[1]
+    upload = HashingFile(file)
+    temp_name = backend.save(f"media/tmp/{uuid.uuid4().hex}{extension}", upload)
+    return _promote(temp_name, upload.hexdigest(), upload.size, kind, extension, source)
+
+
+def adopt(name, kind=MediaBlob.Kind.ORIGINAL):
+    """Move an object already in storage, such as a finished chunked upload, into the blob store."""
+    sha256 = hashlib.sha256()
+    with backend.open(name) as f:
+        for chunk in f.chunks():
+            sha256.update(chunk)
+    return _promote(name, sha256.hexdigest(), backend.size(name), kind, os.path.splitext(name)[1])
+
+
+def adopt_uploads(limit=None):
+    """Adopt the loose files of finished analyses: chunked uploads and rows from before the blob store."""
+    idle_cutoff = timezone.now() - timedelta(seconds=settings.ANALYSIS_UPLOAD_IDLE_TIMEOUT)
+    pending = (
+        InterviewAnalysis.objects
+        .filter(media__isnull=True, status__in=TERMINAL_STATUSES)
+        .exclude(video_file='')
+        # A chunked upload may still be written to until it is finalized or abandoned.
+        .filter(
+            Q(upload_session__isnull=True)
+            | Q(upload_session__finalized_at__isnull=False)
+            | Q(upload_session__updated_at__lt=idle_cutoff)
+        )
+        .only('id', 'video_file')
+    )
+    adopted = 0
+    for analysis in pending[:limit]:
+        name = analysis.video_file.name
+        if not backend.exists(name):
+            logger.warning("Analysis %s references missing file %s", analysis.pk, name)
+            continue
+        blob = adopt(name)
+        InterviewAnalysis.objects.filter(pk=analysis.pk).update(media=blob, video_file=blob.name)
+        adopted += 1
+    return adopted
+
+
+def transcode_to_audio(blob):
+    """Return the audio-only rendition of ``blob``, transcoding it on first use."""
+    rendition = blob.renditions.filter(kind=MediaBlob.Kind.AUDIO).first()
+    if rendition is not None and backend.exists(rendition.name):
+        return rendition
+
+    with scratch_dir(prefix='transcode-') as workdir:
+        try:
+            source_path = backend.path(blob.name)
+        except NotImplementedError:
+            source_path = os.path.join(workdir, 'source' + os.path.splitext(blob.name)[1])
+            with backend.open(blob.name) as src, open(source_path, 'wb') as dst:
+                for chunk in src.chunks():
+                    dst.write(chunk)
+        audio_path, options = audio_rendition(workdir)
+        (
+            ffmpeg
+            .input(source_path)
+            .output(audio_path, vn=None, **options)
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        return store_rendition(audio_path, blob)
+
+
+def store_rendition(path, original=None):
+    with open(path, 'rb') as f:
+        return put(File(f, name=path), kind=MediaBlob.Kind.AUDIO, source=original)
+
+
+def release(blob):
+    """
+    Delete ``blob`` if no analysis references it and no upload has resolved to
+    it since it was loaded. Returns whether it was deleted.
+    """
+    try:
+        count, _ = MediaBlob.objects.filter(
+            pk=blob.pk, analyses__isnull=True, last_used_at__lte=blob.last_used_at
+        ).delete()
+    except ProtectedError:
+        return False
+    if count:
+        backend.delete(blob.name)
+    return bool(count)
+
+
+def keep_audio(analysis, rendition_path):
+    """
+    Point ``analysis`` at the audio rendition in ``rendition_path`` and drop
+    its original, unless another analysis still uses it.
+    """
+    original = analysis.media
+    loose_name = analysis.video_file.name if original is None else None
+    audio = store_rendition(rendition_path, original)
+    analysis.media, analysis.video_file.name = audio, audio.name
+    InterviewAnalysis.objects.filter(pk=analysis.pk).update(media=audio, video_file=audio.name)
+    if original is not None:
+        release(original)
+    elif loose_name and loose_name != audio.name:
+        # A file from before the blob store (or a chunked upload) belongs to this analysis alone.
+        backend.delete(loose_name)
+    return audio
+
+
+def _convert(blob):
+    """Swap every finished analysis of ``blob`` to its audio rendition; returns the bytes saved."""
+    try:
+        audio = transcode_to_audio(blob)
+    except ffmpeg.Error as e:
+        stderr = e.stderr.decode(errors='replace')[-500:] if e.stderr else e
+        logger.warning("Could not transcode blob %s to audio: %s", blob.pk, stderr)
+        return None
+    # An analysis queued since the blob was selected keeps the original.
+    InterviewAnalysis.objects.filter(media=blob, status__in=TERMINAL_STATUSES).update(
+        media=audio, video_file=audio.name
+    )
+    release(blob)
+    logger.info("Converted blob %s (%d bytes) to audio %s (%d bytes)",
+                blob.pk, blob.size_bytes, audio.pk, audio.size_bytes)
+    return blob.size_bytes - audio.size_bytes
+
+
+def convert(analysis):
+    """
+    Swap a finished analysis to audio with a separate transcode, for when the
+    extraction pass did not produce a rendition (result-cache hits, streamed
+    chunked uploads).
+    """
+    blob = analysis.media
+    if blob is None:
+        blob = adopt(analysis.video_file.name)
+        InterviewAnalysis.objects.filter(pk=analysis.pk).update(media=blob, video_file=blob.name)
+    return _convert(blob)
+
+
+def _convert_in_thread(blob):
+    close_old_connections()
+    try:
+        return _convert(blob)
+    finally:
+        close_old_connections()
+
+
+def compact(older_than, limit=None, workers=1):
+    """
+    Replace originals with audio-only renditions once every analysis using
+    them finished before ``older_than``, transcoding on ``workers`` threads
+    (ffmpeg does the work, so threads are enough). Returns how many originals
+    were converted and roughly how many bytes that saved.
+    """
+    candidates = (
+        MediaBlob.objects
+        .filter(kind=MediaBlob.Kind.ORIGINAL, analyses__isnull=False)
+        .exclude(analyses__status__in=[InterviewAnalysis.Status.QUEUED, InterviewAnalysis.Status.PROCESSING])
+        .exclude(analyses__completed_at__gte=older_than)
+        .distinct()
+    )
+    blobs = list(candidates[:limit])
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compact') as pool:
+            saved = list(pool.map(_convert_in_thread, blobs))
+    else:
+        saved = [_convert(blob) for blob in blobs]
+    saved = [saving for saving in saved if saving is not None]
+    return len(saved), sum(saved)
+
+
+def collect_garbage(grace=None):
+    """
+    Delete blobs that no analysis references and that have not been used for
+    ``grace`` seconds. Returns (blobs deleted, bytes freed).
+    """
+    grace = settings.ANALYSIS_MEDIA_GC_GRACE if grace is None else grace
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    deleted, freed = 0, 0
+    for blob in MediaBlob.objects.filter(analyses__isnull=True, last_used_at__lt=cutoff):
+        if release(blob):
+            deleted += 1
+            freed += blob.size_bytes
+    return deleted, freed
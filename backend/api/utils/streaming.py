@@ -0,0 +1,191 @@
+"""
+Incremental analysis of chunked uploads.
+
+While a client is still sending chunks, the worker that claimed the analysis
+tails the growing upload file, pipes the bytes through a single ffmpeg
+process and transcribes the decoded audio piece by piece, cutting at
+silences. By the time the upload is finalized only the last piece remains
+to be transcribed.
+
+This needs a container ffmpeg can decode from a pipe (WebM as recorded by
+browsers, fragmented MP4, MPEG-TS...). For anything else, such as an MP4 with
+its index at the end, decoding fails and the analysis falls back to the
+regular path once the upload has been finalized.
+"""
+import hashlib
+import threading
+import time
+
+import ffmpeg
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from ..models import UploadSession
+from . import vad
+from .analyzer import SAMPLE_RATE, transcribe_speech
+from .transcription import Stitcher
+
+READ_SIZE = 256 * 1024
+
+
+class UploadAbandoned(Exception):
+    pass
+
+
+def tail_upload(session, poll_interval=0.5):
+    """Yield the bytes of an upload as they are received, until it is finalized."""
+    path = session.analysis.video_file.path
+    position = 0
+    last_progress = time.monotonic()
+    with open(path, 'rb') as f:
+        while True:
+            session.refresh_from_db(fields=['received_bytes', 'finalized_at'])
+            while position < session.received_bytes:
+                data = f.read(min(READ_SIZE, session.received_bytes - position))
+                if not data:
+                    break
+                position += len(data)
+                last_progress = time.monotonic()
+                yield data
+            if session.finalized_at is not None and position >= session.received_bytes:
+                return
+            if time.monotonic() - last_progress > settings.ANALYSIS_UPLOAD_IDLE_TIMEOUT:
+                raise UploadAbandoned("Upload was abandoned before it was finalized.")
+            time.sleep(poll_interval)
+
+
+class IncrementalTranscriber:
+    """
+    Accepts decoded audio as it arrives and transcribes it in pieces of about
+    ``chunk_seconds``, each ending at a silence so no word is cut in half.
+    """
+
+    def __init__(self, chunk_seconds, sample_rate=SAMPLE_RATE, on_segments=None, model=None):
+        self.on_segments = on_segments
+        self.model = model
+        self.chunk_samples = int(chunk_seconds * sample_rate)
+        self.sample_rate = sample_rate
+        self.blocks = []
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.pending_start = 0.0
+        self.stitcher = Stitcher()
+
+    def feed(self, samples):
+        self.blocks.append(samples)
+        self.pending = np.concatenate((self.pending, samples))
+        if len(self.pending) >= self.chunk_samples:
+            speech_map = vad.detect_speech(self.pending, self.sample_rate)
+            # Cut in the middle of the last silence; keep everything after it pending.
+            if speech_map['silences']:
+                start, end = speech_map['silences'][-1]
+                self._transcribe(int((start + end) / 2 * self.sample_rate))
+            elif len(self.pending) >= 2 * self.chunk_samples:
+                # Continuous speech, music or noise: cut anyway so the buffer stays bounded.
+                self._transcribe(self._quietest_cut())
+
+    def _quietest_cut(self):
+        """Sample offset of the lowest-energy frame past the first half chunk of pending audio."""
+        energy = vad.frame_energy(self.pending, self.sample_rate)
+        frame_samples = int(vad.FRAME_SECONDS * self.sample_rate)
+        first = self.chunk_samples // 2 // frame_samples
+        return (first + int(np.argmin(energy[first:]))) * frame_samples
+
+    def finish(self):
+        if len(self.pending):
+            self._transcribe(len(self.pending))
+        audio = np.concatenate(self.blocks) if self.blocks else np.zeros(0, dtype=np.float32)
+        transcript, segments = self.stitcher.result()
+        return audio, transcript, segments
+
+    def _transcribe(self, cut):
+        piece = self.pending[:cut]
+        speech_map = vad.detect_speech(piece, self.sample_rate)
+        transcript, segments = transcribe_speech(piece, speech_map, self.model)
+        for seg in segments:
+            seg['start'] = round(seg['start'] + self.pending_start, 3)
+            seg['end'] = round(seg['end'] + self.pending_start, 3)
+            for word in seg.get('words') or []:
+                word['start'] = round(word['start'] + self.pending_start, 3)
+                word['end'] = round(word['end'] + self.pending_start, 3)
+        segments = self.stitcher.add(segments)
+        if self.on_segments is not None:
+            self.on_segments(segments)
+        self.pending = self.pending[cut:]
+        self.pending_start += cut / self.sample_rate
+
+
+def transcribe_upload(session, on_segments=None, model=None):
+    """
+    Decode and transcribe an upload while it is still being received. Returns
+    the transcript, segments, VAD silence map and SHA-256 of the upload, or
+    raises ffmpeg.Error when the container cannot be decoded from a pipe.
+    ``on_segments`` receives each piece's segments as soon as it is transcribed;
+    ``model`` is the Whisper tier to use.
+    """
+    process = (
+        ffmpeg
+        .input('pipe:')
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=SAMPLE_RATE)
+        .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
+    )
+    sha256 = hashlib.sha256()
+    stderr = []
+    feed_error = []
+
+    def feed():
+        try:
+            for data in tail_upload(session):
+                sha256.update(data)
+                process.stdin.write(data)
+        except BrokenPipeError:
+            pass  # ffmpeg gave up; its exit status is reported below
+        except Exception as e:
+            feed_error.append(e)
+        finally:
+            process.stdin.close()
+            connection.close()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    drainer = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    feeder.start()
+    drainer.start()
+
+    transcriber = IncrementalTranscriber(settings.ANALYSIS_STREAM_CHUNK_SECONDS, on_segments=on_segments, model=model)
+    block_bytes = SAMPLE_RATE * 2  # one second of s16le audio
+    leftover = b''
+    while True:
+        data = process.stdout.read(block_bytes)
+        if not data:
+            break
+        data = leftover + data
+        usable = len(data) - len(data) % 2
+        leftover = data[usable:]
+        transcriber.feed(np.frombuffer(data[:usable], np.int16).astype(np.float32) / 32768.0)
+
+    process.wait()
+    feeder.join()
+    drainer.join()
+    if feed_error:
+        raise feed_error[0]
+    if process.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', b'', b''.join(stderr))
+
+    audio, transcript, segments = transcriber.finish()
+    silences = vad.detect_speech(audio, SAMPLE_RATE)['silences'] if settings.ANALYSIS_VAD_ENABLED else None
+    return transcript, segments, silences, sha256.hexdigest()
+
+
+def wait_for_upload(session, poll_interval=0.5):
+    """Block until the client finalizes the upload (used when streaming decode is not possible)."""
+    for _ in tail_upload(session, poll_interval):
+        pass
+
+
+def is_streaming(analysis):
+    """True if the analysis belongs to a chunked upload that is still in progress."""
+    try:
+        session = analysis.upload_session
+    except UploadSession.DoesNotExist:
+        return False
+    return session.finalized_at is None
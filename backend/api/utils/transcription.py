@@ -0,0 +1,195 @@
+"""
+Parallel transcription of long recordings.
+
+The VAD speech map is cut at silence boundaries into chunks of roughly
+ANALYSIS_TRANSCRIBE_CHUNK_SECONDS of speech. Each chunk is transcribed in a
+process pool whose workers hold their own Whisper model, then the segments
+are stitched back together on the original timeline with any words repeated
+across a chunk boundary removed.
+"""
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+from . import vad
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _split_region(audio, start, end, target_seconds, sample_rate):
+    """Split one long, pause-free speech region at its quietest frames near each target length."""
+    energy = vad.frame_energy(audio[int(start * sample_rate):int(end * sample_rate)], sample_rate)
+    search = int(min(5.0, target_seconds / 4) / vad.FRAME_SECONDS)
+    pieces = []
+    position = start
+    while end - position > target_seconds * 1.5:
+        target_frame = int((position - start + target_seconds) / vad.FRAME_SECONDS)
+        window = energy[max(target_frame - search, 0):target_frame + search]
+        cut_frame = max(target_frame - search, 0) + int(np.argmin(window))
+        cut = start + cut_frame * vad.FRAME_SECONDS
+        pieces.append([position, cut])
+        position = cut
+    pieces.append([position, end])
+    return pieces
+
+
+def plan_chunks(audio, speech, target_seconds, sample_rate=16000):
+    """Group consecutive speech regions into chunks of about ``target_seconds`` of speech."""
+    regions = []
+    for start, end in speech:
+        if end - start > target_seconds * 1.5:
+            regions.extend(_split_region(audio, start, end, target_seconds, sample_rate))
+        else:
+            regions.append([start, end])
+
+    chunks = []
+    current, current_length = [], 0.0
+    for start, end in regions:
+        if current and current_length + (end - start) > target_seconds:
+            chunks.append(current)
+            current, current_length = [], 0.0
+        current.append([start, end])
+        current_length += end - start
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _init_worker(torch_threads):
+    import django
+
+    django.setup()
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    from .registry import get_whisper_model
+    get_whisper_model()
+
+
+def _transcribe_chunk(compacted, offsets, model=None):
+    from .analyzer import transcribe_whisper
+
+    transcript, segments = transcribe_whisper(compacted, model)
+    return transcript, vad.remap_segments(segments, offsets)
+
+
+def get_pool(workers):
+    """A process pool of ``workers`` Whisper workers, kept alive across jobs."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            torch_threads = max((os.cpu_count() or workers) // workers, 1)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(torch_threads,),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, 0
+
+
+def _normalize(word):
+    return re.sub(r'[^\w]', '', word.lower())
+
+
+def _drop_repeated_words(previous_text, segment, max_words=5):
+    """Remove from the start of ``segment`` any words that end ``previous_text``."""
+    previous = [_normalize(w) for w in previous_text.split()][-max_words:]
+    words = segment['text'].split()
+    current = [_normalize(w) for w in words[:max_words]]
+    for size in range(min(len(previous), len(current)), 0, -1):
+        if previous[-size:] == current[:size] and all(previous[-size:]):
+            segment['text'] = (' ' if segment['text'].startswith(' ') else '') + ' '.join(words[size:])
+            if segment.get('words'):
+                segment['words'] = segment['words'][size:]
+            break
+    return segment
+
+
+class Stitcher:
+    """
+    Joins chunk segments as they arrive. ``add`` returns a chunk's segments
+    with the words repeated from the previous chunk already removed, so live
+    progress shows the same text the final transcript will.
+    """
+
+    def __init__(self):
+        self.segments = []
+
+    def add(self, chunk_segments):
+        chunk_segments = [seg for seg in chunk_segments if seg.get('text', '').strip()]
+        if self.segments and chunk_segments:
+            _drop_repeated_words(self.segments[-1]['text'], chunk_segments[0])
+            if not chunk_segments[0]['text'].strip():
+                chunk_segments = chunk_segments[1:]
+        self.segments.extend(chunk_segments)
+        return chunk_segments
+
+    def result(self):
+        for i, seg in enumerate(self.segments):
+            seg['id'] = i
+        transcript = ''.join(seg['text'] for seg in self.segments)
+        return transcript, self.segments
+
+
+def stitch(results):
+    """Join per-chunk (transcript, segments) results in order."""
+    stitcher = Stitcher()
+    for _, chunk_segments in results:
+        stitcher.add(chunk_segments)
+    return stitcher.result()
+
+
+def transcribe_parallel(audio, speech_map, workers, sample_rate=16000, chunk_seconds=None, on_segments=None,
+                        model=None):
+    """
+    Transcribe the speech in ``audio`` across ``workers`` processes.
+    ``on_segments`` is called with each chunk's stitched segments, in order,
+    as soon as that chunk and all earlier ones are done.
+    """
+    chunk_seconds = chunk_seconds or settings.ANALYSIS_TRANSCRIBE_CHUNK_SECONDS
+    chunks = plan_chunks(audio, speech_map['speech'], chunk_seconds, sample_rate)
+    if not chunks:
+        return "", []
+    pool = get_pool(workers)
+    futures = [
+        pool.submit(_transcribe_chunk, *vad.compact(audio, regions, sample_rate), model)
+        for regions in chunks
+    ]
+    stitcher = Stitcher()
+    for future in futures:
+        segments = stitcher.add(future.result()[1])
+        if on_segments is not None:
+            on_segments(segments)
+    return stitcher.result()
+
+
+def transcribe_chunked(audio, speech_map, sample_rate=16000, chunk_seconds=None, on_segments=None, model=None):
+    """In-process, one-chunk-at-a-time variant of transcribe_parallel, for progress reporting."""
+    chunk_seconds = chunk_seconds or settings.ANALYSIS_TRANSCRIBE_CHUNK_SECONDS
+    stitcher = Stitcher()
+    for regions in plan_chunks(audio, speech_map['speech'], chunk_seconds, sample_rate):
+        segments = stitcher.add(_transcribe_chunk(*vad.compact(audio, regions, sample_rate), model)[1])
+        if on_segments is not None:
+            on_segments(segments)
+    return stitcher.result()
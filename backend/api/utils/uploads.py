@@ -0,0 +1,30 @@
+import hashlib
+
+from django.core.files import File
+
+
+class HashingFile(File):
+    """
+    Wraps an uploaded file so its SHA-256 is computed while storage writes it,
+    instead of reading the upload a second time.
+    """
+
+    def __init__(self, file):
+        super().__init__(file, name=file.name)
+        self._sha256 = hashlib.sha256()
+
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size):
+            self._sha256.update(chunk)
+            yield chunk
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,126 @@
+"""
+Energy-based voice activity detection over 16 kHz mono float32 audio.
+
+Everything is vectorized with NumPy: the signal is cut into fixed frames,
+frame energies are compared against a threshold derived from the recording's
+own noise floor, and runs of voiced frames become speech regions.
+"""
+import numpy as np
+
+FRAME_SECONDS = 0.03
+MARGIN_DB = 12.0  # how far above the noise floor a frame must be to count as voiced
+LOUD_FLOOR_DB = -35.0  # a noise floor above this means the recording has no real silence
+MIN_SILENCE = 0.5  # shorter gaps are treated as part of the surrounding speech
+MIN_SPEECH = 0.25  # shorter bursts are treated as noise
+PADDING = 0.2  # context kept around each speech region for transcription
+JOIN_GAP = 0.3  # silence inserted between regions when they are stitched together
+
+
+def frame_energy(audio, sample_rate, frame_seconds=FRAME_SECONDS):
+    """Per-frame energy in dBFS."""
+    frame_length = max(int(sample_rate * frame_seconds), 1)
+    count = len(audio) // frame_length
+    frames = np.asarray(audio[:count * frame_length], dtype=np.float32).reshape(count, frame_length)
+    return 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+
+def _runs(mask):
+    """Start (inclusive) and end (exclusive) indices of each run of True values."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _merge_close(starts, ends, min_gap):
+    if len(starts) < 2:
+        return starts, ends
+    keep_gap = (starts[1:] - ends[:-1]) >= min_gap
+    return starts[np.concatenate(([True], keep_gap))], ends[np.concatenate((keep_gap, [True]))]
+
+
+def whole_recording(audio, sample_rate=16000):
+    """A speech map covering all of ``audio``, for when VAD is switched off."""
+    duration = len(audio) / sample_rate
+    return {'speech': [[0.0, duration]] if len(audio) else [], 'silences': [], 'duration': duration}
+
+
+def detect_speech(audio, sample_rate=16000, frame_seconds=FRAME_SECONDS, margin_db=MARGIN_DB,
+                  min_silence=MIN_SILENCE, min_speech=MIN_SPEECH, padding=PADDING):
+    """
+    Find speech in ``audio``. Returns a dict with:
+
+    - ``speech``: padded ``[start, end]`` regions in seconds, ready to transcribe
+    - ``silences``: unpadded gaps between speech regions, i.e. the real pauses
+    - ``duration``: length of the recording in seconds
+    """
+    duration = len(audio) / sample_rate
+    energy = frame_energy(audio, sample_rate, frame_seconds)
+    if not len(energy):
+        return {'speech': [], 'silences': [], 'duration': duration}
+
+    noise_floor = np.percentile(energy, 10)
+    if noise_floor > LOUD_FLOOR_DB:
+        return {'speech': [[0.0, duration]], 'silences': [], 'duration': duration}
+
+    starts, ends = _runs(energy > noise_floor + margin_db)
+    starts, ends = _merge_close(starts * frame_seconds, ends * frame_seconds, min_silence)
+    long_enough = (ends - starts) >= min_speech
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    silences = np.stack((ends[:-1], starts[1:]), axis=1) if len(starts) > 1 else np.empty((0, 2))
+
+    padded_starts = np.clip(starts - padding, 0.0, duration)
+    padded_ends = np.clip(ends + padding, 0.0, duration)
+    padded_starts, padded_ends = _merge_close(padded_starts, padded_ends, 1e-9)
+
+    return {
+        'speech': np.round(np.stack((padded_starts, padded_ends), axis=1), 3).tolist(),
+        'silences': np.round(silences, 3).tolist(),
+        'duration': duration,
+    }
+
+
+def compact(audio, speech, sample_rate=16000, join_gap=JOIN_GAP):
+    """
+    Concatenate the speech regions of ``audio`` with a short silence between
+    them. Returns the compacted audio and an offset map for remap_segments().
+    """
+    gap = np.zeros(int(join_gap * sample_rate), dtype=np.float32)
+    pieces = []
+    offsets = []  # (position in compacted audio, position in original, length), in seconds
+    position = 0.0
+    for start, end in speech:
+        piece = audio[int(start * sample_rate):int(end * sample_rate)]
+        if pieces:
+            pieces.append(gap)
+            position += join_gap
+        pieces.append(piece)
+        offsets.append((position, start, len(piece) / sample_rate))
+        position += len(piece) / sample_rate
+    if not pieces:
+        return np.zeros(0, dtype=np.float32), np.zeros((0, 3))
+    return np.concatenate(pieces).astype(np.float32), np.array(offsets)
+
+
+def remap_times(times, offsets):
+    """Map timestamps in the compacted audio back onto the original timeline."""
+    times = np.asarray(times, dtype=np.float64)
+    index = np.clip(np.searchsorted(offsets[:, 0], times, side='right') - 1, 0, len(offsets) - 1)
+    within = np.clip(times - offsets[index, 0], 0.0, offsets[index, 2])
+    return offsets[index, 1] + within
+
+
+def remap_segments(segments, offsets):
+    """Rewrite Whisper segment (and word) timestamps in place onto the original timeline."""
+    if not segments or not len(offsets):
+        return segments
+    starts = remap_times([seg['start'] for seg in segments], offsets)
+    ends = remap_times([seg['end'] for seg in segments], offsets)
+    for seg, start, end in zip(segments, starts, ends):
+        seg['start'], seg['end'] = round(float(start), 3), round(float(end), 3)
+        words = seg.get('words')
+        if words:
+            word_starts = remap_times([w['start'] for w in words], offsets)
+            word_ends = remap_times([w['end'] for w in words], offsets)
+            for word, w_start, w_end in zip(words, word_starts, word_ends):
+                word['start'], word['end'] = round(float(w_start), 3), round(float(w_end), 3)
+    return segments
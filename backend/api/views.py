@@ -2,27 +2,41 @@ from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.reverse import reverse
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
-from django.http import StreamingHttpResponse
-from django.core.files.storage import DefaultStorage
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django.core.files.base import ContentFile
-from .models import InterviewAnalysis
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from .models import AnalysisBatch, InterviewAnalysis, UploadSession
 from .serializers import (
-    UserSerializer, UserLoginSerializer, InterviewAnalysisSerializer
+    UserSerializer, UserLoginSerializer, InterviewAnalysisSerializer,
+    AnalysisListSerializer, AnalysisStatusSerializer, UploadChunkSerializer, UploadInitSerializer,
+    UploadSessionSerializer
 )
-from .utils.analyzer import extract_audio, transcribe_whisper, analyze_text, get_pause_analytics
-from .utils.feedback import generate_feedback
-import json
+from .pagination import AnalysisCursorPagination
+from .utils import batches, events, metrics, result_cache, search, storage
+from .utils import stats as user_stats
+from .utils.jobs import enqueue
+from .utils.questions import search_questions
+import hmac
+import ipaddress
+import logging
 import os, uuid
 from django.conf import settings
-import google.generativeai as genai
 from rest_framework.decorators import api_view, permission_classes
-import re
 
 User = get_user_model()
-storage = DefaultStorage()
+logger = logging.getLogger(__name__)
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -62,77 +76,35 @@ class AnalyzeVideoAPIView(APIView):
     serializer_class = InterviewAnalysisSerializer
 
     def post(self, request):
+        """Persist the upload and queue it for analysis; processing happens in a worker."""
         try:
             video = request.FILES["video"]
             candidate_name = request.POST.get("candidate_name")
 
-            # Save video temporarily for processing
-            filename = f"{uuid.uuid4()}.mp4"
-            temp_video_path = os.path.join("media", "interview_videos", filename)
-            os.makedirs(os.path.dirname(temp_video_path), exist_ok=True)
-            with open(temp_video_path, "wb+") as f:
-                for chunk in video.chunks():
-                    f.write(chunk)
-
-            try:
-                # Process video
-                audio_path = extract_audio(temp_video_path)
-                transcript, segments = transcribe_whisper(audio_path)
-                try:
-                    sentiment, emotions = analyze_text(transcript)
-                    sentiment_score = float(sentiment.get('score', 0.0)) if isinstance(sentiment, dict) and sentiment.get('score') is not None else 0.0
-                    if emotions is None:
-                        emotions = {}
-                except Exception as e:
-                    sentiment_score = 0.0
-                    emotions = {}
-                    print("Sentiment analysis failed:", e)
-                pause_data = get_pause_analytics(segments) if segments else {}
-
-                analysis_data = {
-                    'candidate_name': candidate_name,
-                    'video_file': video,
-                    'transcript': transcript,
-                    'sentiment_score': sentiment_score,
-                    'emotion_scores': emotions,
-                    'pause_analytics': pause_data,
-                    # Feedback will be generated after score calculation
-                }
-
-                print("Analysis data to be saved:", analysis_data)
-
-                serializer = self.serializer_class(data=analysis_data)
-                if serializer.is_valid():
-                    analysis = serializer.save(user=request.user)
-                    # Calculate and save interview score
-                    analysis.calculate_interview_score()
-                    analysis.save()
-                    # Update serializer data with calculated score
-                    serializer = self.serializer_class(analysis)
-
-                    # Now generate feedback using the calculated score and analysis data
-                    feedback = generate_feedback(
-                        transcript,
-                        sentiment_score,
-                        emotions,
-                        pause_data,
-                        analysis.interview_score # Pass the calculated score
-                    )
-                    # Update the analysis instance with the generated feedback
-                    analysis.feedback = feedback
-                    analysis.save()
-
-                    # Return the updated serialized data
-                    serializer = self.serializer_class(analysis)
-                    return Response(serializer.data, status=status.HTTP_201_CREATED)
-                print("Serializer errors:", serializer.errors)
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-            finally:
-                if os.path.exists(temp_video_path):
-                    os.remove(temp_video_path)
-                if os.path.exists("temp.wav"):
-                    os.remove("temp.wav")
+            serializer = self.serializer_class(data={
+                'candidate_name': candidate_name,
+                'video_file': video,
+                'quality': request.POST.get('quality') or InterviewAnalysis.Quality.BALANCED,
+            })
+            if serializer.is_valid():
+                # Written once, under its hash; a re-upload of the same video shares the bytes.
+                blob = storage.put(video)
+                analysis = serializer.save(
+                    user=request.user, video_file=blob.name, media=blob, content_hash=blob.sha256
+                )
+                transaction.on_commit(lambda: enqueue(analysis))
+                return Response(
+                    {
+                        'id': analysis.pk,
+                        'status': analysis.status,
+                        'stage': analysis.stage,
+                        'status_url': reverse('analysis-status', args=[analysis.pk], request=request),
+                        'events_url': events.events_url(analysis, request),
+                    },
+                    status=status.HTTP_202_ACCEPTED
+                )
+            logger.info("Rejected analysis upload: %s", serializer.errors)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
             return Response(
@@ -140,12 +112,166 @@ class AnalyzeVideoAPIView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class AnalysisBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        """
+        Queue every recording in the `videos` files and/or the zip `archive` as
+        one batch. Candidate names are taken from the file names.
+        """
+        quality = request.data.get('quality') or InterviewAnalysis.Quality.BALANCED
+        if quality not in InterviewAnalysis.Quality.values:
+            return Response({'error': f'quality must be one of {InterviewAnalysis.Quality.values}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            batch = batches.create_batch(
+                request.user,
+                files=request.FILES.getlist('videos'),
+                archive=request.FILES.get('archive'),
+                name=request.data.get('name', ''),
+                quality=quality,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {
+                **batches.summary(batch),
+                'status_url': reverse('analysis-batch-detail', args=[batch.pk], request=request),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+class AnalysisBatchDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """Per-item status and aggregate throughput of a batch."""
+        batch = get_object_or_404(AnalysisBatch, pk=pk, user=request.user)
+        return Response(batches.summary(batch))
+
+class UploadInitView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Start a resumable chunked upload. The analysis is queued, but workers
+        only pick it up once the first chunk arrives (see
+        InterviewAnalysisQuerySet.ready); from then on they decode and
+        transcribe the chunks as they come in.
+        """
+        serializer = UploadInitSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        filename = os.path.basename(data.get('filename') or 'upload.webm')
+
+        extension = os.path.splitext(filename)[1] or '.mp4'
+        video_name = storage.backend.save(f"interview_videos/{uuid.uuid4()}{extension}", ContentFile(b''))
+        with transaction.atomic():
+            analysis = InterviewAnalysis.objects.create(
+                user=request.user, candidate_name=data['candidate_name'], video_file=video_name,
+                quality=data['quality']
+            )
+            session = UploadSession.objects.create(
+                user=request.user, analysis=analysis, filename=filename, expected_bytes=data.get('size')
+            )
+        return Response({
+            **UploadSessionSerializer(session).data,
+            'chunk_url': reverse('upload-chunk', args=[session.pk], request=request),
+            'finalize_url': reverse('upload-finalize', args=[session.pk], request=request),
+        }, status=status.HTTP_201_CREATED)
+
+class UploadSessionView(generics.RetrieveAPIView):
+    """Lets a client find out how many bytes arrived before resuming an upload."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadSessionSerializer
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user)
+
+class UploadChunkView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, pk):
+        """Append the `chunk` file at `offset`, which must equal the bytes received so far."""
+        session = get_object_or_404(
+            UploadSession.objects.select_related('analysis'), pk=pk, user=request.user
+        )
+        if session.finalized_at is not None or session.analysis.media_id is not None:
+            return Response({'error': 'Upload already finalized'}, status=status.HTTP_409_CONFLICT)
+        serializer = UploadChunkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        chunk = serializer.validated_data['chunk']
+        offset = serializer.validated_data.get('offset', session.received_bytes)
+        if offset != session.received_bytes:
+            return Response(
+                {'error': 'Unexpected offset', 'received_bytes': session.received_bytes},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        with open(session.analysis.video_file.path, 'r+b') as f:
+            f.seek(offset)
+            for part in chunk.chunks():
+                f.write(part)
+        # Publish the new length only after the bytes are on disk, so the worker
+        # tailing the file never reads past what was written.
+        received = offset + chunk.size
+        updated = UploadSession.objects.filter(pk=pk, received_bytes=offset).update(received_bytes=received)
+        if not updated:
+            return Response({'error': 'Concurrent chunk upload'}, status=status.HTTP_409_CONFLICT)
+        if offset == 0 and received:
+            enqueue(session.analysis)
+        return Response({'received_bytes': received})
+
+class UploadFinalizeView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        """
+        Mark the upload complete. The analysis has been running alongside the
+        upload: returns it if it already finished, otherwise 202 with its status
+        URL to poll (or its events URL to follow).
+        """
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        if session.expected_bytes is not None and session.received_bytes != session.expected_bytes:
+            return Response(
+                {'error': 'Upload incomplete', 'received_bytes': session.received_bytes},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        finalized = UploadSession.objects.filter(pk=pk, finalized_at__isnull=True).update(finalized_at=timezone.now())
+        if finalized and not session.received_bytes:
+            # No chunk ever enqueued it; let a worker report the empty upload.
+            enqueue(session.analysis)
+
+        analysis = InterviewAnalysis.objects.get(pk=session.analysis_id)
+        if analysis.status == InterviewAnalysis.Status.COMPLETED:
+            return Response(InterviewAnalysisSerializer(analysis).data)
+        return Response(
+            {
+                'id': analysis.pk,
+                'status': analysis.status,
+                'stage': analysis.stage,
+                'error': analysis.error,
+                'status_url': reverse('analysis-status', args=[analysis.pk], request=request),
+                'events_url': events.events_url(analysis, request),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
 class UserAnalysesView(generics.ListAPIView):
+    """Cursor-paginated slim listing; the full payload lives on AnalysisDetailView."""
     permission_classes = [IsAuthenticated]
-    serializer_class = InterviewAnalysisSerializer
+    serializer_class = AnalysisListSerializer
+    pagination_class = AnalysisCursorPagination
 
     def get_queryset(self):
-        return InterviewAnalysis.objects.filter(user=self.request.user)
+        # Load only what the list renders (plus the cursor columns) in one query.
+        columns = set(AnalysisListSerializer.selected_fields(self.request)) | {'id', 'created_at'}
+        return InterviewAnalysis.objects.for_user(self.request.user).only(*columns)
 
 class AnalysisDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
@@ -154,6 +280,90 @@ class AnalysisDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         return InterviewAnalysis.objects.filter(user=self.request.user)
 
+class AnalysisStatusView(generics.RetrieveAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = AnalysisStatusSerializer
+
+    def get_queryset(self):
+        return InterviewAnalysis.objects.for_user(self.request.user).only(
+            'id', 'user_id', 'status', 'stage', 'error',
+            'created_at', 'started_at', 'completed_at'
+        )
+
+def authenticate_token(request):
+    """The user of a JWT sent as a Bearer header."""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(header[len('Bearer '):]))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+@require_GET
+async def analysis_events(request, pk):
+    """
+    Server-Sent Events stream of an analysis' progress: stage changes, partial
+    transcript segments as they are decoded and the final status. An async
+    view, so under ASGI (backend.asgi) a waiting client does not hold a worker
+    thread; under WSGI each connected client occupies one.
+
+    EventSource clients authenticate with the ``?stream_token=`` of the
+    ``events_url`` handed out by the status view, never with their JWT.
+    """
+    stream_token = request.GET.get('stream_token')
+    if stream_token:
+        user_id = events.check_stream_token(stream_token, pk)
+    else:
+        user = await sync_to_async(authenticate_token)(request)
+        user_id = user.pk if user is not None else None
+    if user_id is None:
+        return JsonResponse({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    if not await InterviewAnalysis.objects.filter(pk=pk, user_id=user_id).aexists():
+        return JsonResponse({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else 0
+    # WSGI servers would buffer an async iterator until the job ends.
+    stream = events.stream if isinstance(request, ASGIRequest) else events.stream_sync
+    response = StreamingHttpResponse(stream(pk, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+class AnalysisCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(result_cache.stats())
+
+def profile_payload(user, stats, recent):
+    """Profile response body, shared by the sync and async profile views."""
+    return {
+        **UserSerializer(user).data,
+        'interviewsCompleted': stats.interviews_completed,
+        'averageScore': stats.average_score,
+        'lastInterview': stats.last_interview_at,
+        'interviewHistory': [
+            {
+                'date': analysis['created_at'],
+                'score': analysis['interview_score'],
+                'role': analysis['candidate_name'],
+                'interview_score': analysis['interview_score'],
+                'sentiment_score': analysis['sentiment_score']
+            }
+            for analysis in recent  # Last 5 completed interviews
+        ],
+        'skills': [],  # This would come from a separate model in a real app
+        'preferences': {
+            'notifications': True,  # These would come from user preferences in a real app
+            'emailUpdates': True,
+            'darkMode': False,
+            'language': 'English'
+        }
+    }
+
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
@@ -161,36 +371,7 @@ class UserProfileView(APIView):
     def get(self, request):
         """Get user profile data"""
         user = request.user
-        analyses = InterviewAnalysis.objects.filter(user=user)
-        
-        # Calculate average score and other stats
-        total_score = sum(analysis.interview_score for analysis in analyses)
-        avg_score = total_score / len(analyses) if analyses else 0
-        
-        profile_data = {
-            **UserSerializer(user).data,
-            'interviewsCompleted': len(analyses),
-            'averageScore': avg_score,
-            'lastInterview': analyses.first().created_at if analyses else None,
-            'interviewHistory': [
-                {
-                    'date': analysis.created_at,
-                    'score': analysis.interview_score,
-                    'role': analysis.candidate_name,
-                    'interview_score': analysis.interview_score,
-                    'sentiment_score': analysis.sentiment_score
-                }
-                for analysis in analyses[:5]  # Get last 5 interviews
-            ],
-            'skills': [],  # This would come from a separate model in a real app
-            'preferences': {
-                'notifications': True,  # These would come from user preferences in a real app
-                'emailUpdates': True,
-                'darkMode': False,
-                'language': 'English'
-            }
-        }
-        return Response(profile_data)
+        return Response(profile_payload(user, user_stats.get_stats(user), user_stats.recent_history(user)))
 
     def put(self, request):
         """Update user profile data"""
@@ -202,129 +383,65 @@ class UserProfileView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class SearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Search your transcripts and the question bank.
+        Query params: q, kind (analysis|question), mode (text|similar), page, page_size.
+        """
+        query = request.GET.get('q', '').strip()
+        kind = request.GET.get('kind') or None
+        mode = request.GET.get('mode', 'text')
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if kind and kind not in search.KINDS:
+            return Response({'error': f'kind must be one of {sorted(search.KINDS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        finder = search.similar if mode == 'similar' else search.search
+        total, results = finder(query, request.user.pk, kind=kind, page=page, page_size=page_size)
+        return Response({'count': total, 'page': page, 'page_size': page_size, 'results': results})
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def search_interview_questions(request):
     """
     Search for interview questions using Google's Gemini API.
-    Returns AI-generated questions and answers based on the role query.
+    Returns AI-generated questions and answers based on the role query,
+    served from the question cache/bank when possible.
     """
-    print("Entering search_interview_questions view")
     query = request.GET.get('query', '').strip()
-    print(f"Received query: {query}")
     if not query:
-        print("Query parameter is missing")
         return Response({'error': 'Query parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        print("Attempting to configure Gemini API")
-        # Configure Gemini API
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
-        print("Gemini API configured")
-        model = genai.GenerativeModel('models/gemini-1.5-flash')
-        print("Gemini model loaded")
-
-        # Create a prompt for the AI
-        prompt = f"""Generate 3 interview questions and detailed answers for a {query} role.
-        Format the response as a JSON array with the following structure:
-        [
-            {{
-                "role": "{query}",
-                "category": "technical",
-                "difficulty": "intermediate",
-                "question": "question text",
-                "answer": "detailed answer with examples"
-            }}
-        ]
-        Make sure the questions are relevant to the role and include code examples where appropriate.
-        The difficulty should be one of: beginner, intermediate, advanced.
-        The category should be one of: technical, behavioral, system_design, problem_solving, leadership."""
-
-        print("Prompt created, calling Gemini API")
-        # Generate response from Gemini
-        response = model.generate_content(prompt)
-        print("Received response from Gemini API")
-        
-        # Parse the response and convert to proper format
-        try:
-            print("Attempting to parse Gemini response as JSON")
-            import json
-            questions = json.loads(response.text)
-            print("Successfully parsed JSON response")
-            print('Backend returning questions (from JSON parse):', questions)
-            return Response(questions)
-        except json.JSONDecodeError:
-            print("Failed to parse JSON, attempting text extraction")
-            print('Raw Gemini API text response:', response.text)
-            
-            # Attempt to extract JSON from markdown code block
-            json_match = re.search(r'```json\n(.*?)\n```', response.text, re.DOTALL)
-            if json_match:
-                json_string = json_match.group(1)
-                print('Extracted potential JSON string from markdown:', json_string)
-                try:
-                    questions = json.loads(json_string)
-                    print("Successfully parsed JSON from extracted markdown")
-                    print('Backend returning questions (from markdown JSON parse):', questions)
-                    return Response(questions)
-                except json.JSONDecodeError:
-                    print("Failed to parse JSON from extracted markdown, falling back to line extraction")
-            
-            # Fallback to line-by-line text extraction (if markdown extraction failed or no markdown found)
-            questions = []
-            current_question = None # Initialize as None
-            lines = response.text.strip().split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue # Skip empty lines
-
-                # More flexible pattern matching for questions
-                # Look for lines that might be questions (e.g., ends with ?, starts with a number/bullet point, or contains common question words)
-                is_potential_question = (
-                    line.endswith('?') or
-                    line[0].isdigit() or # Starts with a number
-                    line.startswith('-') or line.startswith('*') or # Starts with a bullet point
-                    any(line.lower().startswith(word) for word in ['what', 'how', 'why', 'describe', 'explain', 'tell'])
-                )
-
-                if is_potential_question:
-                    if current_question:
-                        # Append the previous question if found
-                        questions.append({
-                            'role': query,
-                            'category': 'technical', # Default category
-                            'difficulty': 'intermediate', # Default difficulty
-                            'question': current_question['question'].strip(),
-                            'answer': current_question['answer'].strip() if 'answer' in current_question else ''
-                        })
-                    # Start a new question
-                    current_question = {
-                        'question': line,
-                        'answer': ''
-                    }
-                elif current_question is not None:
-                    # Append line to the current question's answer
-                    if current_question['answer']:
-                        current_question['answer'] += '\n' + line
-                    else:
-                        current_question['answer'] = line
-
-            # Append the last question after the loop
-            if current_question:
-                 questions.append({
-                     'role': query,
-                     'category': 'technical', # Default category
-                     'difficulty': 'intermediate', # Default difficulty
-                     'question': current_question['question'].strip(),
-                     'answer': current_question['answer'].strip() if 'answer' in current_question else ''
-                 })
-
-            print(f"Successfully extracted {len(questions)} questions from text (line by line fallback)")
-            print('Backend returning questions (from line extraction fallback):', questions)
-            return Response(questions)
-
+        return Response(search_questions(query))
     except Exception as e:
-        print(f"An error occurred in search_interview_questions: {e}")
+        logger.exception("An error occurred in search_interview_questions: %s", e)
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _metrics_allowed(request):
+    if settings.METRICS_PUBLIC:
+        return True
+    if settings.METRICS_TOKEN:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}')
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS)
+
+def prometheus_metrics(request):
+    """
+    Pipeline metrics in Prometheus text format. Requires METRICS_TOKEN when it
+    is set, otherwise a client address in METRICS_ALLOWED_NETWORKS.
+    """
+    if not _metrics_allowed(request):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
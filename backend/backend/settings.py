@@ -78,6 +78,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+# Needed for the async views: the SSE progress stream and API_ASYNC_VIEWS. Under WSGI the
+# event stream falls back to a blocking iterator that holds a worker thread per client.
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
@@ -202,6 +205,179 @@ SESSION_CACHE_ALIAS = 'default'
 # Google API Key for Gemini
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY', '')
 
+# Shared LLM client (api/utils/llm.py)
+LLM = {
+    # 'gemini', 'stub' (canned offline responses for load tests) or a dotted backend class path
+    'BACKEND': os.getenv('LLM_BACKEND', 'gemini'),
+    'MODEL': 'models/gemini-1.5-flash',
+    'TIMEOUT': 20,  # seconds per call, retries included
+    'FEEDBACK_TIMEOUT': 45,
+    'MAX_RETRIES': 2,
+    'MAX_CONCURRENCY': int(os.getenv('LLM_MAX_CONCURRENCY', '8')),  # in-flight calls per process
+    # In-flight calls per event loop from async views (LLMClient.agenerate).
+    'MAX_ASYNC_CONCURRENCY': int(os.getenv('LLM_MAX_ASYNC_CONCURRENCY', '64')),
+    'CACHE_TTL': 60 * 60 * 24,
+    'STUB_LATENCY': float(os.getenv('LLM_STUB_LATENCY', '0')),  # simulated seconds per stub call
+}
+
+# Interview question search: cached results are fresh for QUESTION_CACHE_FRESH seconds,
+# then served stale (while refreshing in the background) until QUESTION_CACHE_STALE.
+QUESTION_CACHE_FRESH = 60 * 60 * 6
+QUESTION_CACHE_STALE = 60 * 60 * 24 * 7
+QUESTION_BANK_MAX_AGE = 60 * 60 * 24 * 30  # banked questions older than this are regenerated
+QUESTION_BANK_DEFAULT_ROLES = [
+    'software engineer', 'data analyst', 'data scientist', 'product manager',
+    'frontend developer', 'backend developer', 'devops engineer', 'ui/ux designer',
+    'business analyst', 'project manager',
+]
+
+# Local full-text search index (SQLite FTS5) over transcripts and the question bank.
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', os.path.join(BASE_DIR, 'search_index.sqlite3'))
+# Optional NumPy similarity index; SEARCH_EMBEDDER maps a list of texts to a 2-D array.
+SEARCH_EMBEDDINGS_ENABLED = os.getenv('SEARCH_EMBEDDINGS_ENABLED', 'false').lower() == 'true'
+SEARCH_EMBEDDER = 'api.utils.search.hashed_embedding'
+
+# Analysis job queue
+# 'worker' leaves queued analyses for `manage.py run_analysis_worker`;
+# 'thread' runs them on an in-process thread pool (handy for local development).
+ANALYSIS_JOB_BACKEND = os.getenv('ANALYSIS_JOB_BACKEND', 'worker')
+ANALYSIS_THREAD_WORKERS = int(os.getenv('ANALYSIS_THREAD_WORKERS', '1'))
+ANALYSIS_WORKER_PROCESSES = int(os.getenv('ANALYSIS_WORKER_PROCESSES', '2'))
+ANALYSIS_WORKER_POLL_INTERVAL = 1.0  # seconds between polls of an empty queue
+# Workers bump a running job's updated_at every ANALYSIS_JOB_HEARTBEAT seconds; a job
+# without a heartbeat for ANALYSIS_JOB_TIMEOUT seconds counts as abandoned and is requeued.
+ANALYSIS_JOB_HEARTBEAT = 60
+ANALYSIS_JOB_TIMEOUT = 10 * 60
+# Batch submissions (POST /api/batches/, `manage.py analyze_batch`): a worker claims up
+# to ANALYSIS_BATCH_GROUP_SIZE queued items of a batch at once and runs their sentiment
+# and emotion inference together.
+ANALYSIS_BATCH_GROUP_SIZE = int(os.getenv('ANALYSIS_BATCH_GROUP_SIZE', '8'))
+ANALYSIS_BATCH_MAX_ITEMS = 100
+ANALYSIS_BATCH_MAX_BYTES = 10 * 1024 ** 3  # uncompressed size of the recordings in one archive
+ANALYSIS_BATCH_EXTENSIONS = ('.mp4', '.webm', '.mov', '.mkv', '.m4a', '.mp3', '.wav', '.ogg')
+# Per-job scratch directories are created here; point it at a tmpfs mount
+# (e.g. /dev/shm) to keep intermediate audio off disk. None uses the system temp dir.
+ANALYSIS_SCRATCH_ROOT = os.getenv('ANALYSIS_SCRATCH_ROOT') or None
+# Models used by the analysis pipeline. They are loaded lazily on first use,
+# or up front when an analysis worker starts if ANALYSIS_WARM_UP_MODELS is set.
+ANALYSIS_MODELS = {
+    'WHISPER_MODEL': os.getenv('WHISPER_MODEL', 'base'),
+    'WHISPER_DEVICE': os.getenv('WHISPER_DEVICE') or None,  # None: CUDA when available, else CPU
+    'SENTIMENT_MODEL': os.getenv('SENTIMENT_MODEL', 'distilbert/distilbert-base-uncased-finetuned-sst-2-english'),
+    'EMOTION_MODEL': os.getenv('EMOTION_MODEL', 'j-hartmann/emotion-english-distilroberta-base'),
+    'TRANSFORMERS_DEVICE': int(os.getenv('TRANSFORMERS_DEVICE', '-1')),  # -1: CPU, 0+: CUDA device index
+}
+ANALYSIS_WARM_UP_MODELS = os.getenv('ANALYSIS_WARM_UP_MODELS', 'true').lower() == 'true'
+# Whisper tier routing (api.utils.routing). An analysis' target tier follows its quality
+# hint ('balanced' is WHISPER_MODEL); the first pass goes one tier up for clips of at
+# most SHORT_SECONDS, one down from LONG_SECONDS and one down per BUSY_QUEUE_DEPTH
+# queued analyses. With REFINE on, idle workers re-transcribe results that came from a
+# tier below the target.
+ANALYSIS_WHISPER_ROUTING = {
+    'ENABLED': os.getenv('WHISPER_ROUTING_ENABLED', 'true').lower() == 'true',
+    'TIERS': ['tiny', 'base', 'small'],  # fastest first
+    'SHORT_SECONDS': 60,
+    'LONG_SECONDS': 30 * 60,
+    'BUSY_QUEUE_DEPTH': int(os.getenv('WHISPER_ROUTING_BUSY_QUEUE_DEPTH', '10')),
+    'REFINE': os.getenv('WHISPER_REFINE', 'true').lower() == 'true',
+    # Load every tier when a worker starts rather than WHISPER_MODEL only. Costs the
+    # memory of all tiers in each worker process.
+    'WARM_UP_TIERS': os.getenv('WHISPER_WARM_UP_TIERS', 'false').lower() == 'true',
+}
+# Sentiment/emotion scoring runs over windows of at most this many tokens,
+# ANALYSIS_TEXT_BATCH_SIZE windows per forward pass.
+ANALYSIS_TEXT_WINDOW_TOKENS = 256
+ANALYSIS_TEXT_BATCH_SIZE = 16
+# Where sentiment/emotion inference runs (api.utils.inference): 'local' calls this
+# process' models directly; 'batched' funnels the threads of a process through a
+# micro-batcher that waits up to MAX_WAIT_MS to fill a batch of MAX_BATCH windows;
+# 'socket' sends windows to `manage.py run_inference_server` on SOCKET, which batches
+# across all worker processes and holds the only copy of the models.
+ANALYSIS_INFERENCE = {
+    'BACKEND': os.getenv('ANALYSIS_INFERENCE_BACKEND', 'local'),
+    'SOCKET': os.getenv('ANALYSIS_INFERENCE_SOCKET', os.path.join(BASE_DIR, 'inference.sock')),
+    'MAX_BATCH': int(os.getenv('ANALYSIS_INFERENCE_MAX_BATCH', '64')),
+    'MAX_WAIT_MS': float(os.getenv('ANALYSIS_INFERENCE_MAX_WAIT_MS', '5')),
+    'TIMEOUT': 120,  # seconds a worker waits for the server's reply
+}
+# Skip silence before transcription and measure pauses from the detected silences.
+ANALYSIS_VAD_ENABLED = os.getenv('ANALYSIS_VAD_ENABLED', 'true').lower() == 'true'
+# With more than one worker, long recordings are cut at silences into chunks of about
+# ANALYSIS_TRANSCRIBE_CHUNK_SECONDS of speech and transcribed in a process pool.
+ANALYSIS_TRANSCRIBE_WORKERS = int(os.getenv('ANALYSIS_TRANSCRIBE_WORKERS', '1'))
+ANALYSIS_TRANSCRIBE_CHUNK_SECONDS = 120
+# Chunked uploads are transcribed in pieces of about this many seconds while they arrive.
+ANALYSIS_STREAM_CHUNK_SECONDS = 30
+ANALYSIS_UPLOAD_IDLE_TIMEOUT = 10 * 60  # seconds without a new chunk before an upload is abandoned
+# Re-uploads of an identical video reuse cached transcript/sentiment/pause results.
+ANALYSIS_CACHE_ENABLED = True
+ANALYSIS_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Uploads are stored content-addressed (api.utils.storage). With ANALYSIS_MEDIA_KEEP set
+# to 'audio' the pipeline replaces each video with a 16 kHz mono rendition written by
+# the audio extraction pass ('opus' at ANALYSIS_MEDIA_AUDIO_BITRATE, or lossless 'flac');
+# convert existing rows with `manage.py convert_media_to_audio`. Otherwise
+# `manage.py compact_media` does the same once all of an original's analyses finished
+# ANALYSIS_MEDIA_RETENTION_DAYS ago. Blobs unreferenced for ANALYSIS_MEDIA_GC_GRACE
+# seconds are deleted.
+ANALYSIS_MEDIA_KEEP = os.getenv('ANALYSIS_MEDIA_KEEP', 'original')
+ANALYSIS_MEDIA_AUDIO_CODEC = os.getenv('ANALYSIS_MEDIA_AUDIO_CODEC', 'opus')
+ANALYSIS_MEDIA_AUDIO_BITRATE = '24k'
+ANALYSIS_MEDIA_RETENTION_DAYS = int(os.getenv('ANALYSIS_MEDIA_RETENTION_DAYS', '7'))
+ANALYSIS_MEDIA_GC_GRACE = 24 * 60 * 60
+# Pipe decoded audio from ffmpeg straight into Whisper instead of going through a WAV file.
+ANALYSIS_AUDIO_IN_MEMORY = os.getenv('ANALYSIS_AUDIO_IN_MEMORY', 'true').lower() == 'true'
+# Weight config (api.utils.scoring.WEIGHTS) used for new scores; rescore old rows with
+# `manage.py rescore_analyses` after changing it.
+ANALYSIS_SCORING_VERSION = os.getenv('ANALYSIS_SCORING_VERSION', 'v1')
+# Progress events for GET /api/analyses/<id>/events/ (Server-Sent Events). With live
+# segments on, single-worker transcription runs chunk by chunk so partial transcripts
+# can be published as each chunk finishes.
+ANALYSIS_LIVE_SEGMENTS = os.getenv('ANALYSIS_LIVE_SEGMENTS', 'true').lower() == 'true'
+ANALYSIS_EVENTS_POLL_INTERVAL = 0.5
+ANALYSIS_EVENTS_KEEPALIVE = 15
+# Lifetime in seconds of the signed stream token in the events_url of status responses.
+ANALYSIS_EVENTS_TOKEN_MAX_AGE = int(os.getenv('ANALYSIS_EVENTS_TOKEN_MAX_AGE', str(6 * 60 * 60)))
+# `manage.py prune_analysis_events` deletes the events of analyses that finished this
+# many seconds ago; late clients then only get the final status.
+ANALYSIS_EVENTS_RETENTION = int(os.getenv('ANALYSIS_EVENTS_RETENTION', str(60 * 60)))
+# /metrics summarizes the stage timings of this many most recent completed analyses.
+ANALYSIS_METRICS_WINDOW = int(os.getenv('ANALYSIS_METRICS_WINDOW', '1000'))
+# When set, /metrics requires "Authorization: Bearer <token>"; otherwise it only answers
+# clients in METRICS_ALLOWED_NETWORKS (behind a proxy, REMOTE_ADDR is the proxy's). Set
+# METRICS_PUBLIC to serve it to anyone.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_NETWORKS = os.getenv('METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128').split(',')
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', 'false').lower() == 'true'
+
+# Serve question search, the profile and the analysis list from the async views in
+# api/async_views.py. Meant for backend.asgi (uvicorn, daphne...); it is
+# not a known speed-up, so measure with `manage.py loadtest_api` before enabling it.
+API_ASYNC_VIEWS = os.getenv('API_ASYNC_VIEWS', 'false').lower() == 'true'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{asctime} {levelname} {name} [{process}] {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 
 
 
@@ -83,15 +83,98 @@ class ApiService {
             onUploadProgress,
         });
 
+        // The upload is queued and analyzed in the background; poll until it finishes.
+        return ApiService.waitForAnalysis(response.data.id);
+    }
+
+    // Resumable chunked upload: the backend starts analyzing while chunks arrive.
+    static async analyzeVideoInChunks(videoFile, candidateName, onUploadProgress = null, chunkSize = 5 * 1024 * 1024) {
+        const session = (await api.post('/uploads/', {
+            candidate_name: candidateName,
+            filename: videoFile.name,
+            size: videoFile.size,
+        })).data;
+
+        let offset = 0;
+        while (offset < videoFile.size) {
+            const formData = new FormData();
+            formData.append('chunk', videoFile.slice(offset, offset + chunkSize));
+            formData.append('offset', offset);
+            const response = await api.post(`/uploads/${session.id}/chunks/`, formData, {
+                headers: { 'Content-Type': 'multipart/form-data' },
+            });
+            offset = response.data.received_bytes;
+            if (onUploadProgress) onUploadProgress({ loaded: offset, total: videoFile.size });
+        }
+
+        const response = await api.post(`/uploads/${session.id}/finalize/`);
+        if (response.status === 202) {
+            return ApiService.waitForAnalysis(response.data.id);
+        }
         return response.data;
     }
 
-    // Fetch all analyses
-    static async getAnalyses() {
-        const response = await api.get('/analyses/');
+    static async getAnalysisStatus(id) {
+        const response = await api.get(`/analyses/${id}/status/`);
         return response.data;
     }
 
+    static async waitForAnalysis(id, onStageChange = null, intervalMs = 2000) {
+        for (;;) {
+            const job = await ApiService.getAnalysisStatus(id);
+            if (onStageChange) onStageChange(job.stage);
+            if (job.status === 'completed') {
+                return ApiService.getAnalysisById(id);
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Analysis failed');
+            }
+            await new Promise((resolve) => setTimeout(resolve, intervalMs));
+        }
+    }
+
+    // Live progress over Server-Sent Events: stage changes and the transcript as it is
+    // decoded. Resolves with the finished analysis. EventSource cannot set headers, so
+    // the stream is opened with the events_url of the status response, which carries a
+    // short-lived token for this analysis only rather than the access token.
+    static async watchAnalysis(id, { onStage, onSegments } = {}) {
+        const job = await ApiService.getAnalysisStatus(id);
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(job.events_url);
+            source.addEventListener('snapshot', (e) => onStage && onStage(JSON.parse(e.data).stage));
+            source.addEventListener('stage', (e) => onStage && onStage(JSON.parse(e.data).stage));
+            source.addEventListener('segments', (e) => onSegments && onSegments(JSON.parse(e.data).segments));
+            source.addEventListener('status', (e) => {
+                source.close();
+                const job = JSON.parse(e.data);
+                if (job.status === 'completed') {
+                    resolve(ApiService.getAnalysisById(id));
+                } else {
+                    reject(new Error(job.error || 'Analysis failed'));
+                }
+            });
+            source.onerror = () => {
+                // EventSource reconnects on its own; fall back to polling if the stream is refused.
+                if (source.readyState === EventSource.CLOSED) {
+                    ApiService.waitForAnalysis(id, onStage).then(resolve, reject);
+                }
+            };
+        });
+    }
+
+    // Fetch all analyses, following the cursor pages. The list endpoint is slim by
+    // default, so ask for the fields the dashboard charts need.
+    static async getAnalyses(fields = 'id,candidate_name,created_at,sentiment_score,emotion_scores,pause_analytics') {
+        const analyses = [];
+        let url = `/analyses/?page_size=100&fields=${encodeURIComponent(fields)}`;
+        while (url) {
+            const response = await api.get(url);
+            analyses.push(...response.data.results);
+            url = response.data.next;
+        }
+        return analyses;
+    }
+
     static async getAnalysisById(id) {
         const response = await api.get(`/analyses/${id}/`);
         return response.data;